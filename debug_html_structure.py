@@ -1,9 +1,16 @@
 import asyncio
 from playwright.async_api import async_playwright
+import sys
+from pathlib import Path
+
+# Reuse the persistent browser server when it is running (python -m harness server start)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "testsprite_tests"))
+from harness.browser_server import connect_or_launch
+from harness.inspector import inspect, write_jsonl
 
 async def debug_html_structure():
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
+        browser = await connect_or_launch(p,
             headless=False,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -38,42 +45,11 @@ async def debug_html_structure():
         direct_links = await page.locator('body > a').all()
         print(f"\nLinks diretos no body: {len(direct_links)}")
         
-        # Verificar todos os links na página
-        all_links = await page.locator('a').all()
-        print(f"Total de links na página: {len(all_links)}")
-        
-        for i, link in enumerate(all_links):
-            try:
-                href = await link.get_attribute('href')
-                text = await link.inner_text()
-                # Obter o xpath do link
-                xpath = await page.evaluate('''
-                    (element) => {
-                        function getXPath(node) {
-                            if (node.id !== '') {
-                                return 'id("' + node.id + '")';
-                            }
-                            if (node === document.body) {
-                                return 'html/body';
-                            }
-                            var ix = 0;
-                            var siblings = node.parentNode.childNodes;
-                            for (var i = 0; i < siblings.length; i++) {
-                                var sibling = siblings[i];
-                                if (sibling === node) {
-                                    return getXPath(node.parentNode) + '/' + node.tagName.toLowerCase() + '[' + (ix + 1) + ']';
-                                }
-                                if (sibling.nodeType === 1 && sibling.tagName === node.tagName) {
-                                    ix++;
-                                }
-                            }
-                        }
-                        return getXPath(element);
-                    }
-                ''', link)
-                print(f"Link {i+1}: '{text}' -> {href} (XPath: {xpath})")
-            except Exception as e:
-                print(f"Erro ao obter informações do link {i+1}: {e}")
+        # Links, botões, inputs e diálogos com XPath, caminho CSS, role e posição,
+        # obtidos numa única chamada e escritos em JSON lines
+        elements = await inspect(page)
+        print(f"Total de elementos na página: {len(elements)}")
+        write_jsonl(elements)
         
         await browser.close()
 
@@ -1,9 +1,16 @@
 import asyncio
 from playwright.async_api import async_playwright
+import sys
+from pathlib import Path
+
+# Reuse the persistent browser server when it is running (python -m harness server start)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "testsprite_tests"))
+from harness.browser_server import connect_or_launch
+from harness.inspector import inspect, write_jsonl
 
 async def debug_page_behavior():
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
+        browser = await connect_or_launch(p,
             headless=False,
             args=[
                 '--disable-blink-features=AutomationControlled',
@@ -33,17 +40,10 @@ async def debug_page_behavior():
         
         print(f"URL após 2s: {page.url}")
         
-        # Verificar se existem links na página
-        links = await page.locator('a').all()
+        # Verificar se existem links na página (uma única chamada, em JSON lines)
+        links = await inspect(page, ["links"])
         print(f"Número de links encontrados: {len(links)}")
-        
-        for i, link in enumerate(links):
-            try:
-                href = await link.get_attribute('href')
-                text = await link.inner_text()
-                print(f"Link {i+1}: '{text}' -> {href}")
-            except Exception as e:
-                print(f"Erro ao obter informações do link {i+1}: {e}")
+        write_jsonl(links)
         
         # Tentar encontrar o link específico que o teste procura
         try:
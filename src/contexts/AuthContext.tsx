@@ -265,6 +265,11 @@ export function AuthProvider({ children }: { children: React.ReactNode }) {
     }
   };
 
+  // Sinal de prontidão lido pelos testes E2E (testsprite_tests/harness/readiness.py)
+  useEffect(() => {
+    document.documentElement.dataset.auth = loading ? 'loading' : session ? 'signed-in' : 'signed-out';
+  }, [loading, session]);
+
   return (
     <AuthContext.Provider value={{ user, session, loading, login, register, resetPassword, logout }}>
       {children}
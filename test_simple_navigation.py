@@ -1,5 +1,11 @@
 import asyncio
 from playwright import async_api
+import sys
+from pathlib import Path
+
+# Reuse the persistent browser server when it is running (python -m harness server start)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "testsprite_tests"))
+from harness.browser_server import connect_or_launch
 import time
 
 async def run_test():
@@ -14,7 +20,7 @@ async def run_test():
         pw = await async_api.async_playwright().start()
         
         # Launch browser with different settings
-        browser = await pw.chromium.launch(
+        browser = await connect_or_launch(pw,
             headless=False,  # Changed to see what's happening
             slow_mo=1000,    # Slow down actions
             args=[
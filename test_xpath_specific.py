@@ -1,9 +1,15 @@
 import asyncio
 from playwright.async_api import async_playwright
+import sys
+from pathlib import Path
+
+# Reuse the persistent browser server when it is running (python -m harness server start)
+sys.path.insert(0, str(Path(__file__).resolve().parent / "testsprite_tests"))
+from harness.browser_server import connect_or_launch
 
 async def test_xpath_specific():
     async with async_playwright() as p:
-        browser = await p.chromium.launch(
+        browser = await connect_or_launch(p,
             headless=False,
             args=[
                 '--disable-blink-features=AutomationControlled',
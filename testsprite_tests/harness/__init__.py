@@ -0,0 +1,5 @@
+"""Execution harness for the TestSprite-generated scenarios in testsprite_tests/."""
+from .runner import FAILED, PASSED, Plugin, Runner, ScenarioResult
+from .scenarios import Scenario, discover
+
+__all__ = ["FAILED", "PASSED", "Plugin", "Runner", "Scenario", "ScenarioResult", "discover"]
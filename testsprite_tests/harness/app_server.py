@@ -0,0 +1,215 @@
+"""Production build of the app, served by the harness itself.
+
+Against the Vite dev server every fresh context has the server transform and
+send hundreds of `/src/...` modules one by one. With `--app build` the harness
+runs `npm run build` (only when the sources changed since the last build),
+serves `dist/` on the port of the base URL with gzip and cache headers, waits
+for it to answer and stops it when the run ends. Hashed files under
+`/assets/` are immutable, so the browser cache keeps them; `index.html` and
+the service worker are always revalidated.
+"""
+import gzip
+import hashlib
+import json
+import mimetypes
+import shutil
+import subprocess
+import threading
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from .config import REPO_ROOT, TMP_DIR, base_url
+from .runner import Plugin
+
+DIST_DIR = REPO_ROOT / "dist"
+BUILD_STAMP_PATH = TMP_DIR / "app_build.json"
+APP_MODES = ("dev", "build")
+READY_TIMEOUT_S = 15
+
+# What `vite build` reads; a change in any of them makes dist/ stale
+BUILD_INPUTS = ("src", "public", "index.html", "package.json", "package-lock.json",
+                "vite.config.ts", "tailwind.config.ts", "postcss.config.js", ".env", ".env.local",
+                ".env.production")
+
+COMPRESSIBLE = ("text/", "application/javascript", "application/json", "application/manifest+json",
+                "image/svg+xml")
+MIN_COMPRESS_BYTES = 1024
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+
+class AppServerError(RuntimeError):
+    pass
+
+
+def sources_fingerprint(root=REPO_ROOT) -> str:
+    digest = hashlib.sha1()
+    for name in BUILD_INPUTS:
+        path = Path(root) / name
+        files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+        for file in files:
+            try:
+                stat = file.stat()
+            except FileNotFoundError:
+                continue
+            digest.update(f"{file.relative_to(root).as_posix()}:{stat.st_mtime_ns}:{stat.st_size}\n".encode())
+    return digest.hexdigest()
+
+
+def build(force=False, root=REPO_ROOT, stamp_path=BUILD_STAMP_PATH) -> bool:
+    """Run `npm run build` unless dist/ already matches the sources. True when it built."""
+    fingerprint = sources_fingerprint(root)
+    try:
+        stamp = json.loads(Path(stamp_path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        stamp = {}
+    dist = Path(root) / "dist"
+    if not force and stamp.get("fingerprint") == fingerprint and (dist / "index.html").exists():
+        return False
+    npm = shutil.which("npm")
+    if npm is None:
+        raise AppServerError("npm was not found on PATH; it is needed to build the app")
+    started = time.monotonic()
+    completed = subprocess.run([npm, "run", "build"], cwd=root)
+    if completed.returncode != 0:
+        raise AppServerError(f"npm run build exited with {completed.returncode}")
+    stamp_path = Path(stamp_path)
+    stamp_path.parent.mkdir(parents=True, exist_ok=True)
+    stamp_path.write_text(json.dumps({"fingerprint": fingerprint, "built_at": time.time(),
+                                      "build_s": round(time.monotonic() - started, 1)}), encoding="utf-8")
+    return True
+
+
+class StaticFiles:
+    """dist/ contents with their ETags and gzip bodies, read once per file."""
+
+    def __init__(self, root):
+        self.root = Path(root).resolve()
+        self.lock = threading.Lock()
+        self.files = {}
+
+    def resolve(self, url_path):
+        relative = unquote(urlsplit(url_path).path).lstrip("/")
+        path = (self.root / relative).resolve()
+        if path != self.root and self.root not in path.parents:
+            return None
+        if path.is_file():
+            return path
+        # Client-side routes (/family/dashboard) get the SPA shell; missing files stay 404
+        if not Path(relative).suffix:
+            return self.root / "index.html"
+        return None
+
+    def get(self, path) -> dict:
+        with self.lock:
+            entry = self.files.get(path)
+            if entry is None:
+                body = path.read_bytes()
+                content_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+                entry = self.files[path] = {
+                    "body": body,
+                    "type": content_type,
+                    "etag": '"' + hashlib.sha1(body).hexdigest()[:16] + '"',
+                    "gzip": gzip.compress(body, 6) if content_type.startswith(COMPRESSIBLE)
+                    and len(body) >= MIN_COMPRESS_BYTES else None,
+                }
+            return entry
+
+    def cache_control(self, path) -> str:
+        relative = path.relative_to(self.root).as_posix()
+        return IMMUTABLE if relative.startswith("assets/") else REVALIDATE
+
+
+def _handler(files):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_HEAD(self):
+            self.do_GET(head=True)
+
+        def do_GET(self, head=False):
+            path = files.resolve(self.path)
+            if path is None:
+                self.send_response(404)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            entry = files.get(path)
+            not_modified = self.headers.get("If-None-Match") == entry["etag"]
+            self.send_response(304 if not_modified else 200)
+            self.send_header("ETag", entry["etag"])
+            self.send_header("Cache-Control", files.cache_control(path))
+            self.send_header("Vary", "Accept-Encoding")
+            if not_modified:
+                self.end_headers()
+                return
+            body = entry["body"]
+            if entry["gzip"] is not None and "gzip" in self.headers.get("Accept-Encoding", ""):
+                body = entry["gzip"]
+                self.send_header("Content-Encoding", "gzip")
+            self.send_header("Content-Type", entry["type"])
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            if not head:
+                self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def wait_ready(url, timeout=READY_TIMEOUT_S):
+    """Poll `url` until it answers 200, raising AppServerError after `timeout` seconds."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, OSError):
+            pass
+        if time.monotonic() > deadline:
+            raise AppServerError(f"{url} did not answer within {timeout}s")
+        time.sleep(0.1)
+
+
+@contextmanager
+def serving(url=None, dist=DIST_DIR, rebuild=False):
+    """Build if needed, serve dist/ on the port of `url` and stop it on exit."""
+    url = (url or base_url()).rstrip("/")
+    parsed = urlsplit(url)
+    if build(force=rebuild):
+        print("app built into dist/")
+    try:
+        server = ThreadingHTTPServer((parsed.hostname or "localhost", parsed.port or 80),
+                                     _handler(StaticFiles(dist)))
+    except OSError as exc:
+        raise AppServerError(f"cannot serve the build on {url} ({exc}); is the dev server running?") from exc
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, name="app-server", daemon=True)
+    thread.start()
+    try:
+        wait_ready(url + "/")
+        yield url
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+class AppServerPlugin(Plugin):
+    """Keeps the production service worker out of the scenario contexts.
+
+    A registered service worker would answer requests itself, out of reach of
+    the `context.route` handlers and with caches that outlive the context.
+    """
+
+    name = "app"
+
+    def context_options(self, scenario) -> dict:
+        return {"service_workers": "block"}
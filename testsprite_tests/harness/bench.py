@@ -0,0 +1,216 @@
+"""Repeatable load benchmark of the key pages, with percentiles.
+
+One pass of TC018 says nothing about the spread of load times. `bench` loads
+each page `iterations` times after `warmup` discarded loads, in cold-cache
+contexts (a new context per load) and in a warm-cache context (one context,
+page loaded again), signed in with the first credential of tmp/config.json
+and under one of the `profiles` (desktop by default).
+Each load records:
+
+    navigation_ms   domContentLoadedEventEnd of the navigation timing entry
+    first_render_ms first-contentful-paint; for a tab, until its panel is visible
+    data_ready_ms   until React mounted, auth resolved and no Supabase request
+                    is in flight (the readiness probe); for a tab, from the click
+
+p50/p90/p99 (nearest rank) go to tmp/bench/<commit>.json with the raw
+samples, so two commits can be compared with `bench-diff`.
+"""
+import json
+import math
+import subprocess
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from playwright import async_api
+
+from . import browser_server
+from .config import DEFAULT_LAUNCH_ARGS, REPO_ROOT, TMP_DIR, base_url
+from .profiles import DEFAULT_PROFILE, PROFILES, apply_profile
+from .readiness import BackendTracker, Readiness
+from .session import SessionCache, credentials_from_config
+
+BENCH_DIR = TMP_DIR / "bench"
+BENCH_SCHEMA = 1
+MODES = ("cold", "warm")
+METRICS = ("navigation_ms", "first_render_ms", "data_ready_ms")
+PERCENTILES = (50, 90, 99)
+DEFAULT_ITERATIONS = 10
+DEFAULT_WARMUP = 2
+LOAD_TIMEOUT_MS = 30000
+
+TIMING_JS = """() => {
+    const navigation = performance.getEntriesByType("navigation")[0];
+    const paint = performance.getEntriesByName("first-contentful-paint")[0];
+    return {
+        navigation_ms: navigation ? navigation.domContentLoadedEventEnd : null,
+        first_render_ms: paint ? paint.startTime : null,
+    };
+}"""
+
+
+@dataclass(frozen=True)
+class BenchPage:
+    name: str
+    path: str
+    tab: str = ""
+
+
+PAGES = (
+    BenchPage("dashboard", "/app"),
+    BenchPage("reports-overview", "/app/reports"),
+    BenchPage("reports-categories", "/app/reports", "Categorias"),
+    BenchPage("reports-evolution", "/app/reports", "Evolução"),
+    BenchPage("reports-goals", "/app/reports", "Objetivos"),
+    BenchPage("transactions", "/personal/transactions"),
+    BenchPage("family", "/family/dashboard"),
+)
+
+
+def percentile(values, p):
+    """Nearest-rank percentile of `values`, or None when empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+
+def summarize(samples) -> dict:
+    summary = {}
+    for metric in METRICS:
+        values = [s[metric] for s in samples if s.get(metric) is not None]
+        summary[metric] = {f"p{p}": _round(percentile(values, p)) for p in PERCENTILES}
+        summary[metric]["n"] = len(values)
+    return summary
+
+
+def _round(value):
+    return None if value is None else round(value, 1)
+
+
+def git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True, text=True).stdout.strip()
+
+    return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+            "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+
+
+def result_path(revision, directory=BENCH_DIR) -> Path:
+    suffix = "-dirty" if revision["dirty"] else ""
+    return Path(directory) / f"{revision['commit']}{suffix}.json"
+
+
+class Bench:
+    def __init__(self, browser, url, storage_state, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+                 profile=PROFILES[DEFAULT_PROFILE]):
+        self.browser = browser
+        self.url = url.rstrip("/")
+        self.storage_state = storage_state
+        self.iterations = iterations
+        self.warmup = warmup
+        self.profile = profile
+
+    async def _context(self):
+        context = await self.browser.new_context(storage_state=self.storage_state,
+                                                 **self.profile.context_options())
+        await apply_profile(context, self.profile)
+        tracker = BackendTracker()
+        tracker.attach(context)
+        return context, await context.new_page(), Readiness(tracker, LOAD_TIMEOUT_MS), tracker
+
+    async def measure(self, bench_page, page, ready, tracker) -> dict:
+        await ready(page, self.url + bench_page.path)
+        sample = {"data_ready_ms": ready.probes[-1]["ms"], "ready": ready.probes[-1]["ready"]}
+        sample.update(await page.evaluate(TIMING_JS))
+        if not bench_page.tab:
+            return sample
+        started = time.monotonic()
+        await page.get_by_role("tab", name=bench_page.tab).click(timeout=LOAD_TIMEOUT_MS)
+        await page.locator("[role=tabpanel][data-state=active]").wait_for(state="visible",
+                                                                           timeout=LOAD_TIMEOUT_MS)
+        first_render = (time.monotonic() - started) * 1000
+        quiet = await tracker.quiet(LOAD_TIMEOUT_MS)
+        return {"navigation_ms": None, "first_render_ms": first_render,
+                "data_ready_ms": (time.monotonic() - started) * 1000, "ready": quiet}
+
+    async def run_mode(self, bench_page, mode) -> list:
+        samples = []
+        warm = None
+        try:
+            for index in range(self.warmup + self.iterations):
+                if mode == "warm":
+                    warm = warm or await self._context()
+                    context, page, ready, tracker = warm
+                else:
+                    context, page, ready, tracker = await self._context()
+                try:
+                    sample = await self.measure(bench_page, page, ready, tracker)
+                except async_api.Error as exc:
+                    sample = {"error": str(exc).splitlines()[0]}
+                finally:
+                    if mode == "cold":
+                        await context.close()
+                if index >= self.warmup:
+                    samples.append({k: _round(v) if isinstance(v, float) else v for k, v in sample.items()})
+        finally:
+            if warm is not None:
+                await warm[0].close()
+        return samples
+
+
+async def run_bench(pages=PAGES, modes=MODES, iterations=DEFAULT_ITERATIONS, warmup=DEFAULT_WARMUP,
+                    url=None, headless=True, profile=PROFILES[DEFAULT_PROFILE]) -> dict:
+    url = (url or base_url()).rstrip("/")
+    credentials = credentials_from_config()
+    if not credentials:
+        raise ValueError("bench needs a login in tmp/config.json (loginUser/loginPassword)")
+    async with async_api.async_playwright() as playwright:
+        browser = await browser_server.connect_or_launch(playwright, headless=headless, args=DEFAULT_LAUNCH_ARGS)
+        try:
+            state = await SessionCache(url).storage_state(browser, credentials[0])
+            bench = Bench(browser, url, state, iterations, warmup, profile)
+            report = {}
+            for bench_page in pages:
+                report[bench_page.name] = {}
+                for mode in modes:
+                    samples = await bench.run_mode(bench_page, mode)
+                    report[bench_page.name][mode] = {"summary": summarize(samples), "samples": samples}
+                    data_ready = report[bench_page.name][mode]["summary"]["data_ready_ms"]
+                    print(f"{bench_page.name:<20} {mode:<5} data ready p50 {data_ready['p50']} ms"
+                          f"  p90 {data_ready['p90']} ms")
+        finally:
+            await browser.close()
+    return {
+        "schema": BENCH_SCHEMA,
+        **git_revision(),
+        "created": time.time(),
+        "base_url": url,
+        "settings": {"iterations": iterations, "warmup": warmup, "modes": list(modes), "profile": profile.name},
+        "pages": report,
+    }
+
+
+def write_report(report, path=None) -> Path:
+    path = Path(path) if path else result_path(report)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def diff(base, head) -> list:
+    """(page, mode, metric, percentile, base, head, change %) rows for the pages in both reports."""
+    rows = []
+    for name, modes in head["pages"].items():
+        for mode, entry in modes.items():
+            before = base["pages"].get(name, {}).get(mode)
+            if before is None:
+                continue
+            for metric in METRICS:
+                for p in PERCENTILES:
+                    old = before["summary"][metric][f"p{p}"]
+                    new = entry["summary"][metric][f"p{p}"]
+                    change = round((new - old) / old * 100, 1) if old and new is not None else None
+                    rows.append((name, mode, metric, f"p{p}", old, new, change))
+    return rows
+
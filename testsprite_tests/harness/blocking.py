@@ -0,0 +1,154 @@
+"""Resource blocking for functional scenarios.
+
+No functional assertion depends on fonts, images, media or third-party
+analytics, yet every fresh context loads them again. With blocking on, a
+`context.route` handler aborts requests whose resource type or URL is on the
+blocklist and reports how many requests and bytes were avoided. Performance
+scenarios (TC018) always load everything.
+
+Sizes are not known for requests that never ran. With `learn_sizes`, they
+are learned from the scenarios that load the same URLs unblocked (one
+`request.sizes()` round trip per blocklisted request) and kept in
+tmp/resource_sizes.json. The blocklist can be extended under `blocklist` in
+tmp/config.json:
+
+    "blocklist": {"resourceTypes": ["image"], "urlPatterns": ["ui-avatars\\\\.com"]}
+"""
+import json
+import re
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from .config import TMP_DIR, load_config
+from .runner import Plugin
+
+SIZES_PATH = TMP_DIR / "resource_sizes.json"
+
+BLOCKED_TYPES = ("image", "font", "media")
+BLOCKED_URLS = (
+    r"fonts\.(googleapis|gstatic)\.com",
+    r"(google-analytics|googletagmanager|doubleclick)\.",
+    r"(hotjar|clarity\.ms|segment\.(io|com)|mixpanel|plausible\.io)",
+    r"(gravatar\.com|ui-avatars\.com)",
+    r"/storage/v1/object/(public|sign)/avatars/",
+)
+
+# Scenarios that measure loading and therefore never block anything
+UNBLOCKED_SCENARIOS = frozenset({"TC018"})
+
+
+class Blocklist:
+    def __init__(self, resource_types=BLOCKED_TYPES, url_patterns=BLOCKED_URLS):
+        self.resource_types = frozenset(resource_types)
+        self.pattern = re.compile("|".join(f"(?:{p})" for p in url_patterns)) if url_patterns else None
+
+    @classmethod
+    def from_config(cls, config=None):
+        config = load_config() if config is None else config
+        extra = config.get("blocklist", {})
+        return cls(BLOCKED_TYPES + tuple(extra.get("resourceTypes", ())),
+                   BLOCKED_URLS + tuple(extra.get("urlPatterns", ())))
+
+    def reason(self, resource_type, url):
+        """The resource type or "url" that blocks a request, or None."""
+        if resource_type in self.resource_types:
+            return resource_type
+        if self.pattern is not None and self.pattern.search(url):
+            return "url"
+        return None
+
+
+def size_key(url) -> str:
+    # Vite appends ?t=... and ?v=... cache busters to the same asset
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}{parts.path}"
+
+
+def load_sizes(path=SIZES_PATH) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+class BlockingPlugin(Plugin):
+    """Aborts blocklisted requests and reports the requests and bytes avoided."""
+
+    name = "blocking"
+
+    def __init__(self, enabled=True, learn_sizes=False, blocklist=None, unblocked=(), sizes_path=SIZES_PATH):
+        self.enabled = enabled
+        self.learn_sizes = learn_sizes
+        self.blocklist = blocklist or Blocklist.from_config()
+        # Performance scenarios always load everything; `unblocked` only adds to them
+        self.unblocked = UNBLOCKED_SCENARIOS | frozenset(unblocked)
+        self.sizes_path = sizes_path
+        self.sizes = {}
+        self.reports = {}
+
+    async def setup(self, runner):
+        self.sizes = load_sizes(self.sizes_path)
+
+    async def on_context(self, context, scenario):
+        report = self.reports[scenario.id] = {"requests": 0, "bytes": 0, "unknown_size": 0,
+                                              "reasons": {}, "learned": {}}
+        if not self.enabled or scenario.id in self.unblocked:
+            report["blocking"] = False
+            if not self.learn_sizes:
+                return
+
+            async def learn(request):
+                if self.blocklist.reason(request.resource_type, request.url) is None:
+                    return
+                try:
+                    sizes = await request.sizes()
+                except Exception:
+                    return
+                report["learned"][size_key(request.url)] = sizes["responseBodySize"]
+
+            context.on("requestfinished", learn)
+            return
+
+        async def block(route, request):
+            reason = self.blocklist.reason(request.resource_type, request.url)
+            if reason is None:
+                # Leave the request to other handlers (HAR replay, fake backend)
+                await route.fallback()
+                return
+            await route.abort("blockedbyclient")
+            report["requests"] += 1
+            report["reasons"][reason] = report["reasons"].get(reason, 0) + 1
+            size = self.sizes.get(size_key(request.url))
+            if size is None:
+                report["unknown_size"] += 1
+            else:
+                report["bytes"] += size
+
+        await context.route("**/*", block)
+
+    async def after_scenario(self, context, scenario, result):
+        report = self.reports.pop(scenario.id, None)
+        if report is not None:
+            result.extras["blocked"] = report
+
+
+def update_sizes(results, path=SIZES_PATH):
+    """Fold the sizes learned by unblocked scenarios into tmp/resource_sizes.json.
+
+    Runs in the parent process, like impact.update_map.
+    """
+    sizes = load_sizes(path)
+    learned = {}
+    for result in results:
+        report = result.extras.get("blocked")
+        if report is None:
+            continue
+        learned.update(report.pop("learned", {}))
+        if report.pop("blocking", True) is False:
+            del result.extras["blocked"]
+    if learned:
+        sizes.update(learned)
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(sizes, indent=1, sort_keys=True), encoding="utf-8")
+    return sizes
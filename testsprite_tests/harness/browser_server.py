@@ -0,0 +1,303 @@
+"""Long-lived local Chromium that scripts attach to instead of launching their own.
+
+`python -m harness server start` spawns a daemon that keeps one Chromium
+running with a remote-debugging port and serves a small HTTP control API:
+
+    GET  /health    browser pid, contexts served, attached clients
+    POST /lease     attach a client, returns the CDP endpoint
+    POST /release   detach a client, reporting how many contexts it opened
+    POST /shutdown  stop Chromium and the daemon
+
+Clients attach with `chromium.connect_over_cdp()`. After `recycle_after`
+contexts the browser is restarted as soon as no client is attached, which
+bounds memory growth over a long debugging session.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .config import DEFAULT_LAUNCH_ARGS, TESTS_DIR, TMP_DIR
+
+STATE_PATH = TMP_DIR / "browser_server.json"
+DEFAULT_CONTROL_PORT = 9323
+DEFAULT_RECYCLE_AFTER = 200
+STARTUP_TIMEOUT_S = 20
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _chromium_executable() -> str:
+    from playwright.sync_api import sync_playwright
+
+    with sync_playwright() as playwright:
+        return playwright.chromium.executable_path
+
+
+class BrowserDaemon:
+    def __init__(self, recycle_after=DEFAULT_RECYCLE_AFTER, headless=True):
+        self.recycle_after = recycle_after
+        self.headless = headless
+        self.executable = _chromium_executable()
+        self.lock = threading.Lock()
+        self.process = None
+        self.profile_dir = None
+        self.cdp_port = None
+        self.started = 0.0
+        self.contexts = 0
+        self.active = 0
+        self.recycles = 0
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.cdp_port}"
+
+    def launch(self):
+        self.cdp_port = _free_port()
+        self.profile_dir = tempfile.mkdtemp(prefix="harness-chromium-")
+        args = [
+            self.executable,
+            f"--remote-debugging-port={self.cdp_port}",
+            f"--user-data-dir={self.profile_dir}",
+            "--no-first-run",
+            "--no-default-browser-check",
+            *DEFAULT_LAUNCH_ARGS,
+        ]
+        if self.headless:
+            args.append("--headless=new")
+        self.process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self.started = time.time()
+        self.contexts = 0
+        deadline = time.monotonic() + STARTUP_TIMEOUT_S
+        while not self.cdp_alive():
+            if time.monotonic() > deadline or self.process.poll() is not None:
+                raise RuntimeError("Chromium did not expose its debugging port")
+            time.sleep(0.1)
+
+    def terminate(self):
+        if self.process and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        if self.profile_dir:
+            shutil.rmtree(self.profile_dir, ignore_errors=True)
+        self.process = None
+
+    def recycle(self):
+        self.terminate()
+        self.launch()
+        self.recycles += 1
+
+    def cdp_alive(self) -> bool:
+        try:
+            with urllib.request.urlopen(f"{self.endpoint}/json/version", timeout=1):
+                return True
+        except (urllib.error.URLError, OSError):
+            return False
+
+    def lease(self) -> dict:
+        with self.lock:
+            if self.process is None or self.process.poll() is not None:
+                self.launch()
+            elif self.active == 0 and self.contexts >= self.recycle_after:
+                self.recycle()
+            self.active += 1
+            return {"endpoint": self.endpoint}
+
+    def release(self, contexts=0) -> dict:
+        with self.lock:
+            self.active = max(self.active - 1, 0)
+            self.contexts += contexts
+            if self.active == 0 and self.contexts >= self.recycle_after:
+                self.recycle()
+            return self.health()
+
+    def health(self) -> dict:
+        return {
+            "pid": self.process.pid if self.process else None,
+            "alive": self.process is not None and self.process.poll() is None and self.cdp_alive(),
+            "endpoint": self.endpoint,
+            "uptime_s": round(time.time() - self.started, 1),
+            "contexts": self.contexts,
+            "active": self.active,
+            "recycle_after": self.recycle_after,
+            "recycles": self.recycles,
+        }
+
+
+def _handler(daemon, server_ref):
+    class Handler(BaseHTTPRequestHandler):
+        def _reply(self, payload, status=200):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}")
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._reply(daemon.health())
+            else:
+                self._reply({"error": "not found"}, 404)
+
+        def do_POST(self):
+            try:
+                if self.path == "/lease":
+                    self._reply(daemon.lease())
+                elif self.path == "/release":
+                    self._reply(daemon.release(int(self._body().get("contexts", 0))))
+                elif self.path == "/shutdown":
+                    self._reply({"stopping": True})
+                    threading.Thread(target=server_ref[0].shutdown, daemon=True).start()
+                else:
+                    self._reply({"error": "not found"}, 404)
+            except RuntimeError as exc:
+                self._reply({"error": str(exc)}, 503)
+
+        def log_message(self, *_):
+            pass
+
+    return Handler
+
+
+def serve(port=DEFAULT_CONTROL_PORT, recycle_after=DEFAULT_RECYCLE_AFTER, headless=True):
+    daemon = BrowserDaemon(recycle_after, headless)
+    daemon.launch()
+    server_ref = []
+    server = ThreadingHTTPServer(("127.0.0.1", port), _handler(daemon, server_ref))
+    server_ref.append(server)
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    STATE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    STATE_PATH.write_text(json.dumps({"pid": os.getpid(), "port": port}), encoding="utf-8")
+    try:
+        server.serve_forever()
+    finally:
+        daemon.terminate()
+        STATE_PATH.unlink(missing_ok=True)
+
+
+# Client side
+
+def control_url(port=None) -> str:
+    if port is None:
+        try:
+            port = json.loads(STATE_PATH.read_text(encoding="utf-8"))["port"]
+        except (FileNotFoundError, ValueError, KeyError):
+            port = DEFAULT_CONTROL_PORT
+    return f"http://127.0.0.1:{port}"
+
+
+def _request(path, payload=None, port=None, timeout=STARTUP_TIMEOUT_S) -> dict:
+    data = None if payload is None else json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(control_url(port) + path, data=data,
+                                     method="GET" if data is None else "POST")
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def health(port=None):
+    """The daemon's /health payload, or None when no daemon is listening."""
+    try:
+        return _request("/health", port=port, timeout=2)
+    except (urllib.error.URLError, OSError, ValueError):
+        return None
+
+
+def start(port=DEFAULT_CONTROL_PORT, recycle_after=DEFAULT_RECYCLE_AFTER, headless=True) -> dict:
+    status = health(port)
+    if status is not None:
+        return status
+    command = [sys.executable, "-m", "harness.browser_server", "--port", str(port),
+               "--recycle-after", str(recycle_after)]
+    if not headless:
+        command.append("--headed")
+    subprocess.Popen(command, cwd=TESTS_DIR, start_new_session=True,
+                     stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + STARTUP_TIMEOUT_S
+    while time.monotonic() < deadline:
+        status = health(port)
+        if status is not None:
+            return status
+        time.sleep(0.2)
+    raise RuntimeError(f"Browser server did not answer on port {port}")
+
+
+def stop(port=None) -> bool:
+    try:
+        _request("/shutdown", {}, port=port, timeout=5)
+    except (urllib.error.URLError, OSError):
+        return False
+    return True
+
+
+class Attachment:
+    """A browser borrowed from the daemon; `close()` disconnects and releases the lease."""
+
+    def __init__(self, browser, port):
+        self.browser = browser
+        self.port = port
+        self.contexts = 0
+
+    async def new_context(self, **options):
+        self.contexts += 1
+        return await self.browser.new_context(**options)
+
+    async def close(self):
+        try:
+            # Closes the contexts this client created and disconnects; Chromium keeps running
+            await self.browser.close()
+        finally:
+            await asyncio.to_thread(_request, "/release", {"contexts": self.contexts}, self.port)
+
+    def __getattr__(self, name):
+        return getattr(self.browser, name)
+
+
+async def attach(playwright, port=None) -> Attachment:
+    """Lease the daemon's browser and connect to it over CDP."""
+    lease = await asyncio.to_thread(_request, "/lease", {}, port)
+    browser = await playwright.chromium.connect_over_cdp(lease["endpoint"])
+    return Attachment(browser, port)
+
+
+async def connect_or_launch(playwright, port=None, **launch_options):
+    """Attach to a running daemon, falling back to launching a private browser."""
+    if await asyncio.to_thread(health, port) is not None:
+        return await attach(playwright, port)
+    return await playwright.chromium.launch(**launch_options)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="harness.browser_server")
+    parser.add_argument("--port", type=int, default=DEFAULT_CONTROL_PORT)
+    parser.add_argument("--recycle-after", type=int, default=DEFAULT_RECYCLE_AFTER)
+    parser.add_argument("--headed", action="store_true")
+    options = parser.parse_args(argv)
+    serve(options.port, options.recycle_after, headless=not options.headed)
+
+
+if __name__ == "__main__":
+    main()
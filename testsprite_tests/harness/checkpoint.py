@@ -0,0 +1,198 @@
+"""Checkpoint and resume of scenario state.
+
+With checkpoints enabled, the runner records a checkpoint after the login and
+after every step of a scenario: the context's `storage_state`, the page URL
+and any app data IDs the script registered. Scripts can add their own named
+checkpoints with `await harness_checkpoint(page, "after opening the modal",
+data={"transaction_id": ...})`.
+
+On resume the steps up to the chosen checkpoint are dropped, the context
+starts from its storage_state and the page opens the saved URL. A checkpoint
+is only used while the steps before it are unchanged, so an edited scenario
+resumes from the last checkpoint that precedes the edit.
+"""
+import ast
+import hashlib
+import json
+import time
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from .config import TMP_DIR
+from .runner import Plugin
+from .scenarios import run_test_try, split_steps, step_comment
+from .session import SESSION_READY_NAME, find_login_steps
+
+CHECKPOINTS_DIR = TMP_DIR / "checkpoints"
+CHECKPOINT_NAME = "__harness_checkpoint__"
+RESTORE_NAME = "__harness_restore__"
+AFTER_LOGIN = "after login"
+
+
+@dataclass
+class Checkpoint:
+    name: str
+    step: int
+    prefix_hash: str
+    url: str
+    storage_state: dict
+    data: dict = field(default_factory=dict)
+    created: float = 0.0
+
+
+def prefix_hashes(steps) -> list:
+    """hashes[n] identifies the code of steps[:n], ignoring line numbers."""
+    digest = hashlib.sha1()
+    hashes = [digest.hexdigest()]
+    for step in steps:
+        for stmt in step:
+            digest.update(ast.dump(stmt).encode("utf-8"))
+        hashes.append(digest.hexdigest())
+    return hashes
+
+
+def load_checkpoints(scenario_id, directory=CHECKPOINTS_DIR) -> list:
+    try:
+        entries = json.loads((Path(directory) / f"{scenario_id}.json").read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return []
+    return [Checkpoint(**entry) for entry in entries]
+
+
+def save_checkpoints(scenario_id, checkpoints, directory=CHECKPOINTS_DIR):
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    payload = [asdict(checkpoint) for checkpoint in checkpoints]
+    (directory / f"{scenario_id}.json").write_text(json.dumps(payload), encoding="utf-8")
+
+
+def choose_checkpoint(checkpoints, hashes, name=None):
+    """The latest checkpoint still valid for the current steps, optionally by name."""
+    valid = [c for c in checkpoints if c.step < len(hashes) and hashes[c.step] == c.prefix_hash]
+    if name is not None:
+        valid = [c for c in valid if c.name == name]
+    return max(valid, key=lambda c: (c.step, c.created), default=None)
+
+
+def _await_call(name, args, origin):
+    call = ast.Call(func=ast.Name(name, ast.Load()), args=args, keywords=[])
+    return ast.copy_location(ast.Expr(ast.Await(call)), origin)
+
+
+def _calls(statements, name) -> bool:
+    return any(isinstance(node, ast.Name) and node.id == name
+               for stmt in statements for node in ast.walk(stmt))
+
+
+class CheckpointInserter(ast.NodeTransformer):
+    """Adds a checkpoint after every step and, when resuming, drops the steps already done."""
+
+    def __init__(self, source, checkpointer, checkpoints=(), resume_name=None, credentials=()):
+        self.source_lines = source.splitlines()
+        self.checkpointer = checkpointer
+        self.checkpoints = list(checkpoints)
+        self.resume_name = resume_name
+        self.credentials = credentials
+
+    def visit_Module(self, tree):
+        block = run_test_try(tree)
+        if block is None:
+            return tree
+        prefix, steps = split_steps(block.body)
+        hashes = prefix_hashes(steps)
+        resumed = choose_checkpoint(self.checkpoints, hashes, self.resume_name)
+        if resumed is not None:
+            self.checkpointer.resume_from(resumed)
+        start = resumed.step if resumed else 0
+        page = ast.Name("page", ast.Load())
+        login = find_login_steps(steps, self.credentials)
+        body = list(prefix)
+        if _calls(prefix, SESSION_READY_NAME) and start == 0:
+            body.append(_await_call(CHECKPOINT_NAME, [page, ast.Constant(AFTER_LOGIN),
+                                                      ast.Constant(0), ast.Constant(hashes[0])], prefix[-1]))
+        if resumed is not None:
+            body.append(_await_call(RESTORE_NAME, [page], prefix[-1]))
+        for index in range(start, len(steps)):
+            step = steps[index]
+            body.extend(step)
+            done = index + 1
+            if login is not None and index == login[1]:
+                label = AFTER_LOGIN
+            else:
+                label = f"step {done}: {step_comment(self.source_lines, step)[:80]}".rstrip(": ")
+            body.append(_await_call(CHECKPOINT_NAME, [page, ast.Constant(label), ast.Constant(done),
+                                                      ast.Constant(hashes[done])], step[-1]))
+        block.body = body
+        return tree
+
+
+class Checkpointer:
+    def __init__(self):
+        self.resumed = None
+        self.data = {}
+        self.captured = []
+        self._step = 0
+        self._hash = prefix_hashes([])[0]
+
+    def resume_from(self, checkpoint):
+        self.resumed = checkpoint
+        self.data.update(checkpoint.data)
+        self._step, self._hash = checkpoint.step, checkpoint.prefix_hash
+
+    async def capture(self, page, name, step, prefix_hash):
+        self._step, self._hash = step, prefix_hash
+        state = await page.context.storage_state()
+        self.captured.append(Checkpoint(name, step, prefix_hash, page.url, state, dict(self.data), time.time()))
+
+    async def __call__(self, page, name, data=None):
+        """Named checkpoint for use inside scripts; `data` holds app IDs to carry over."""
+        self.data.update(data or {})
+        await self.capture(page, name, self._step, self._hash)
+
+    async def restore(self, page):
+        await page.goto(self.resumed.url)
+
+
+class CheckpointPlugin(Plugin):
+    """Captures checkpoints during each scenario and resumes from them on request."""
+
+    name = "checkpoint"
+
+    def __init__(self, resume=False, resume_name=None, credentials=(), directory=CHECKPOINTS_DIR):
+        self.resume = resume or resume_name is not None
+        self.resume_name = resume_name
+        self.credentials = credentials
+        self.directory = directory
+        self.inserters = {}
+        self.checkpointers = {}
+
+    def scenario_globals(self, scenario) -> dict:
+        previous = load_checkpoints(scenario.id, self.directory) if self.resume else []
+        checkpointer = self.checkpointers[scenario.id] = Checkpointer()
+        self.inserters[scenario.id] = CheckpointInserter(
+            scenario.source, checkpointer, previous, self.resume_name, self.credentials)
+        return {CHECKPOINT_NAME: checkpointer.capture, RESTORE_NAME: checkpointer.restore,
+                "harness_checkpoint": checkpointer, "harness_checkpoint_data": checkpointer.data}
+
+    def transformers(self, scenario) -> list:
+        return [self.inserters.pop(scenario.id)]
+
+    def context_options(self, scenario) -> dict:
+        checkpointer = self.checkpointers.get(scenario.id)
+        if checkpointer is None or checkpointer.resumed is None:
+            return {}
+        return {"storage_state": checkpointer.resumed.storage_state}
+
+    async def after_scenario(self, context, scenario, result):
+        checkpointer = self.checkpointers.pop(scenario.id, None)
+        if checkpointer is None:
+            return
+        resumed = checkpointer.resumed
+        if resumed is not None:
+            result.extras["resumed_from"] = resumed.name
+        if not checkpointer.captured:
+            return
+        kept = [c for c in load_checkpoints(scenario.id, self.directory)
+                if resumed is not None and c.step <= resumed.step]
+        save_checkpoints(scenario.id, kept + checkpointer.captured, self.directory)
+        result.extras["checkpoints"] = len(checkpointer.captured)
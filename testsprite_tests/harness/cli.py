@@ -0,0 +1,594 @@
+"""Command line entry point: `python -m harness <command>` from testsprite_tests/."""
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from . import (app_server, bench, blocking, browser_server, checkpoint, console, fake_supabase, har, history, impact,
+               inspector, interpreter, leaks, locators, objects, profiles, quarantine, readiness, tracing, vitals)
+from .config import HARNESS_RESULTS_PATH, RESULTS_PATH, base_url
+from .results import iso_timestamp, known_test_ids, load_records, to_record, write_records
+from .retry import DEFAULT_STEP_RETRIES, StepRetryPlugin
+from .runner import DEFAULT_CONCURRENCY, Runner
+from .scenarios import discover
+from .session import AUTH_SCENARIOS, SessionPlugin, credentials_from_config
+from .sharding import estimate_durations, merge_records, parse_shard, plan_shards, record_durations
+from .waiting import DEFAULT_STEP_TIMEOUT_MS, EventWaitPlugin
+
+
+def build_plugins(options) -> list:
+    plugins = []
+    if options.interpret:
+        plugins.append(interpreter.InterpreterPlugin())
+    if not options.fixed_delays:
+        plugins.append(EventWaitPlugin(options.step_timeout))
+    if not options.no_readiness:
+        plugins.append(readiness.ReadinessPlugin(options.ready_timeout))
+    if options.backend == "fake":
+        plugins.append(fake_supabase.FakeBackendPlugin())
+    else:
+        plugins.append(har.HarPlugin(options.backend))
+    if not options.no_session_cache and options.backend != "fake":
+        # The cache logs in on a context of its own, which would reach the real backend
+        plugins.append(SessionPlugin(real_login=options.real_login))
+    if options.app == "build":
+        plugins.append(app_server.AppServerPlugin())
+    plugins.append(profiles.ProfilePlugin(options.profile))
+    if options.block_resources or options.learn_resource_sizes:
+        plugins.append(blocking.BlockingPlugin(options.block_resources, options.learn_resource_sizes,
+                                               unblocked=options.unblocked))
+    if options.vitals:
+        plugins.append(vitals.VitalsPlugin(options.vitals, enforce=not options.vitals_report_only))
+    if options.console_signatures > 0:
+        # After vitals so a scenario failed over budget also gets its console logs
+        plugins.append(console.ConsolePlugin(options.console_signatures))
+    if not options.no_impact_map:
+        plugins.append(impact.ImpactPlugin())
+    if getattr(options, "lane", None):
+        plugins.append(quarantine.QuarantinePlugin(smoke=options.lane == "smoke"))
+    if options.checkpoints or options.resume or options.resume_from:
+        # After the session plugin so a resumed storage_state wins over the cached login
+        plugins.append(checkpoint.CheckpointPlugin(options.resume, options.resume_from,
+                                                   credentials_from_config()))
+    if not options.no_locator_cache:
+        # After the checkpoint plugin so its step hashes do not depend on this rewrite
+        plugins.append(locators.LocatorCachePlugin())
+    if options.trace:
+        # After the checkpoint plugin for the same reason, and after vitals so over-budget vitals keep their trace
+        plugins.append(tracing.TracePlugin(options.trace_budget))
+    if options.step_retries > 0:
+        # Registered after the plugins whose rewrites look for bare `await elem.click(...)` actions
+        plugins.append(StepRetryPlugin(options.step_retries))
+    return plugins
+
+
+def build_runner(scenarios, options, worker="w0") -> Runner:
+    return Runner(
+        scenarios,
+        concurrency=options.concurrency,
+        headless=not options.headed,
+        scenario_timeout=options.timeout,
+        plugins=build_plugins(options),
+        worker=worker,
+        server_port=options.server_port if options.server else None,
+    )
+
+
+def load_scenarios(ids, options) -> list:
+    scenarios = discover(ids=ids)
+    if options.interpret:
+        scenarios = interpreter.interpret(scenarios, options.plans)
+    return scenarios
+
+
+def _run_shard(ids, options, worker):
+    # Runs in a worker process: one browser, one event loop
+    scenarios = load_scenarios(ids, options)
+    return asyncio.run(build_runner(scenarios, options, worker).run())
+
+
+def execute(scenarios, options, durations) -> list:
+    workers = max(1, min(options.workers, len(scenarios)))
+    shards = plan_shards(scenarios, workers, durations)
+    if workers == 1:
+        return asyncio.run(build_runner(shards[0], options).run())
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_run_shard, [s.id for s in shard], options, f"w{index}")
+            for index, shard in enumerate(shards)
+        ]
+        return [result for future in futures for result in future.result()]
+
+
+def print_summary(results):
+    for result in sorted(results, key=lambda r: r.scenario_id):
+        line = f"{result.status:<11} {result.scenario_id} {result.duration:7.1f}s [{result.worker}]"
+        if result.error:
+            line += f"  {result.error.splitlines()[0][:120]}"
+        print(line)
+    passed = sum(r.passed for r in results)
+    print(f"\n{passed}/{len(results)} passed")
+    flaky = [r.scenario_id for r in results if r.extras.get("steps", {}).get("classification") == "flaky"]
+    if flaky:
+        print(f"flaky steps recovered by retries in: {' '.join(flaky)}")
+    blocked = [r.extras["blocked"] for r in results if "blocked" in r.extras]
+    if blocked:
+        requests = sum(b["requests"] for b in blocked)
+        size = sum(b["bytes"] for b in blocked) / 1024
+        unknown = sum(b["unknown_size"] for b in blocked)
+        print(f"{requests} requests blocked, {size:.0f} KiB avoided"
+              + (f" ({unknown} of unknown size)" if unknown else ""))
+    saved = sum(r.extras.get("waits", {}).get("saved_s", 0) for r in results)
+    skipped = sum(r.extras.get("waits", {}).get("skipped_s", 0) for r in results)
+    if saved or skipped:
+        print(f"{saved:.1f}s of fixed delays avoided, {skipped:.1f}s of closing sleeps skipped")
+
+
+def command_run(options) -> int:
+    scenarios = load_scenarios(options.ids, options)
+    if not scenarios:
+        print("No scenarios matched")
+        return 1
+    by_id = {s.id: s for s in scenarios}
+    if options.changed_since:
+        scenarios = impact.affected_scenarios(scenarios, impact.changed_files(options.changed_since))
+        print(f"{len(scenarios)} scenarios affected by changes since {options.changed_since}")
+        if not scenarios:
+            return 0
+    if options.durations and not Path(options.durations).exists():
+        print(f"Durations file {options.durations} not found")
+        return 1
+    durations = estimate_durations(history_path=options.durations) if options.durations else estimate_durations()
+    if options.shard:
+        index, total = options.shard
+        # Every host must compute the same plan, so only a shared durations file counts
+        shard_durations = estimate_durations((), options.durations) if options.durations else {}
+        scenarios = plan_shards(scenarios, total, shard_durations)[index]
+        if not scenarios:
+            print(f"Shard {index + 1}/{total} has no scenarios")
+            return 0
+    if options.server:
+        browser_server.start(options.server_port, headless=not options.headed)
+    runnable, quarantined = quarantine.partition(scenarios)
+    app = app_server.serving(rebuild=options.rebuild) if options.app == "build" else contextlib.nullcontext()
+    try:
+        with app:
+            results = execute(runnable, options, durations) if runnable else []
+            lane_results = run_quarantine_lane(quarantined, options, durations)
+    except app_server.AppServerError as exc:
+        print(exc)
+        return 1
+    timed = results + (lane_results if options.quarantine == "last" else [])
+    record_durations(timed)
+    if not options.no_impact_map:
+        impact.update_map(results + lane_results)
+    if not options.no_locator_cache:
+        locators.update_cache(results + lane_results)
+    if options.block_resources or options.learn_resource_sizes:
+        blocking.update_sizes(results + lane_results)
+    test_ids = known_test_ids()
+    records = [to_record(r, by_id[r.scenario_id], test_ids) for r in results + lane_results]
+    if not options.keep_code:
+        objects.pack_records(records)
+    write_records(records, options.output)
+    if not options.keep_code:
+        objects.add_root(options.output)
+    if not options.no_history:
+        history.append_run(records, bench.git_revision())
+    print_summary(results + lane_results)
+    if quarantined:
+        print(f"{len(quarantined)} quarantined (placeholder assertions, lane '{options.quarantine}'): "
+              + " ".join(s.id for s in quarantined))
+    # Quarantined scenarios fail by construction and do not gate the run
+    return 0 if all(r.passed for r in results) else 1
+
+
+def run_quarantine_lane(quarantined, options, durations) -> list:
+    if not quarantined or options.quarantine == "skip":
+        return []
+    lane_options = argparse.Namespace(**vars(options))
+    lane_options.lane = options.quarantine
+    if options.quarantine == "smoke":
+        lane_options.timeout = options.smoke_budget
+    return execute(quarantined, lane_options, durations)
+
+
+def _id_list(value) -> list:
+    return [item.strip().upper() for item in value.split(",") if item.strip()]
+
+
+def add_run_arguments(parser):
+    parser.add_argument("ids", nargs="*", help="scenario ids such as TC002 (default: all)")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="scenarios running at once per worker")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="worker processes, each with its own browser")
+    parser.add_argument("--timeout", type=float, default=None,
+                        help="per-scenario budget in seconds")
+    parser.add_argument("--headed", action="store_true")
+    parser.add_argument("--fixed-delays", action="store_true",
+                        help="keep the scripts' wait_for_timeout() sleeps")
+    parser.add_argument("--step-timeout", type=float, default=DEFAULT_STEP_TIMEOUT_MS,
+                        help="upper bound in ms for each event-driven wait")
+    parser.add_argument("--step-retries", type=int, default=DEFAULT_STEP_RETRIES,
+                        help="retries of a failed locator action before the scenario fails (0 disables)")
+    parser.add_argument("--ready-timeout", type=float, default=readiness.DEFAULT_READY_TIMEOUT_MS,
+                        help="ms the opening readiness probe may take before the scenario goes on")
+    parser.add_argument("--no-readiness", action="store_true",
+                        help="keep the scripts' goto(commit) and per-frame domcontentloaded waits")
+    parser.add_argument("--backend", choices=har.BACKEND_MODES + ("fake",), default="auto",
+                        help="record the Supabase traffic to tmp/har/, replay it, use the live backend "
+                             "(auto: replay where a recording exists) or the in-process fake")
+    parser.add_argument("--app", choices=app_server.APP_MODES, default="dev",
+                        help="dev: use the server already running on the base URL; "
+                             "build: build the app and serve dist/ there for the run")
+    parser.add_argument("--rebuild", action="store_true", help="with --app build, build even if dist/ is current")
+    parser.add_argument("--profile", choices=sorted(profiles.PROFILES), default=profiles.DEFAULT_PROFILE,
+                        help="device viewport plus CPU and network throttling for every scenario")
+    parser.add_argument("--block-resources", action="store_true",
+                        help="abort images, fonts, media and third-party analytics requests")
+    parser.add_argument("--learn-resource-sizes", action="store_true",
+                        help="record the sizes of blocklisted resources in unblocked scenarios, "
+                             "for the bytes avoided by --block-resources")
+    parser.add_argument("--unblocked", type=_id_list, default=[],
+                        help="comma-separated scenarios that never block resources, besides TC018")
+    parser.add_argument("--vitals", type=_id_list, default=sorted(vitals.VITALS_SCENARIOS),
+                        help="comma-separated scenarios whose Core Web Vitals are measured (empty to disable)")
+    parser.add_argument("--vitals-report-only", action="store_true",
+                        help="report web vitals over budget without failing the scenario")
+    parser.add_argument("--console-signatures", type=int, default=console.MAX_SIGNATURES,
+                        help="distinct console messages and page errors kept per scenario (0 disables)")
+    parser.add_argument("--trace", action="store_true",
+                        help="record Playwright and performance traces, kept in tmp/traces/ for failed runs")
+    parser.add_argument("--trace-budget", type=float,
+                        help="also keep the traces of scenarios that pass but take longer than this many seconds")
+    parser.add_argument("--no-locator-cache", action="store_true",
+                        help="do not heal absolute XPaths from tmp/locators.json")
+    parser.add_argument("--no-session-cache", action="store_true",
+                        help="log in through the UI in every scenario")
+    parser.add_argument("--real-login", type=_id_list, default=sorted(AUTH_SCENARIOS),
+                        help="comma-separated scenarios that keep their UI login steps")
+    parser.add_argument("--interpret", action="store_true",
+                        help="run scenarios from their declarative plans where one can be extracted")
+    parser.add_argument("--plans", default=str(interpreter.PLANS_DIR),
+                        help="directory of saved plans, preferred over extraction")
+    parser.add_argument("--shard", type=parse_shard, default=None, metavar="I/N",
+                        help="run only shard I of N, for splitting a run across hosts")
+    parser.add_argument("--durations", metavar="FILE",
+                        help="scenario durations to plan with, in the tmp/durations.json format; with --shard, "
+                             "the same file on every host (without it, shards follow scenario id order)")
+    parser.add_argument("--changed-since", metavar="REF",
+                        help="run only scenarios affected by files changed since this git ref")
+    parser.add_argument("--no-impact-map", action="store_true",
+                        help="do not record routes and modules in tmp/impact_map.json")
+    parser.add_argument("--checkpoints", action="store_true",
+                        help="save a checkpoint after the login and after every step")
+    parser.add_argument("--resume", action="store_true",
+                        help="resume each scenario from its latest valid checkpoint")
+    parser.add_argument("--resume-from", metavar="NAME",
+                        help="resume from the checkpoint with this name, e.g. 'after login'")
+    parser.add_argument("--quarantine", choices=quarantine.LANE_MODES, default="last",
+                        help="how to run scenarios ending in a placeholder `assert False`")
+    parser.add_argument("--smoke-budget", type=float, default=quarantine.DEFAULT_SMOKE_BUDGET_S,
+                        help="per-scenario budget in seconds for --quarantine smoke")
+    parser.add_argument("--keep-code", action="store_true",
+                        help="embed the scripts in the results instead of referencing tmp/objects/ by hash")
+    parser.add_argument("--no-history", action="store_true",
+                        help="do not append the results to tmp/history.sqlite")
+    parser.add_argument("--server", action="store_true",
+                        help="attach to the persistent browser server, starting it if needed")
+    parser.add_argument("--server-port", type=int, default=browser_server.DEFAULT_CONTROL_PORT)
+    parser.add_argument("--output", default=str(HARNESS_RESULTS_PATH))
+
+
+def command_fake_backend(options) -> int:
+    backend = fake_supabase.FakeSupabase(fake_supabase.load_seed(options.seed),
+                                         credentials_from_config())
+    try:
+        asyncio.run(fake_supabase.serve(options.port, backend))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+def command_inspect(options) -> int:
+    stream = open(options.output, "w", encoding="utf-8") if options.output else None
+    try:
+        count = asyncio.run(inspector.inspect_url(options.url, options.kinds, stream,
+                                                  options.storage_state, not options.headed))
+    finally:
+        if stream is not None:
+            stream.close()
+    if options.output:
+        print(f"{count} elements written to {options.output}")
+    return 0
+
+
+def command_bench(options) -> int:
+    by_name = {page.name: page for page in bench.PAGES}
+    unknown = [name for name in options.pages if name not in by_name]
+    if unknown:
+        print(f"Unknown pages: {' '.join(unknown)} (known: {' '.join(by_name)})")
+        return 1
+    pages = [by_name[name] for name in options.pages] or list(bench.PAGES)
+    app = app_server.serving(rebuild=options.rebuild) if options.app == "build" else contextlib.nullcontext()
+    try:
+        with app:
+            report = asyncio.run(bench.run_bench(pages, options.modes, options.iterations, options.warmup,
+                                                 headless=not options.headed,
+                                                 profile=profiles.PROFILES[options.profile]))
+    except (ValueError, app_server.AppServerError) as exc:
+        print(exc)
+        return 1
+    path = bench.write_report(report, options.output)
+    print(f"benchmark of {report['commit']}{' (dirty)' if report['dirty'] else ''} written to {path}")
+    return 0
+
+
+def command_bench_diff(options) -> int:
+    base, head = (json.loads(open(path, encoding="utf-8").read()) for path in (options.base, options.head))
+    print(f"{'page':<20} {'mode':<5} {'metric':<16} {'':<4} {base['commit']:>10} {head['commit']:>10}  change")
+    for name, mode, metric, p, old, new, change in bench.diff(base, head):
+        if options.percentile and p != options.percentile:
+            continue
+        shown = f"{change:+.1f}%" if change is not None else "-"
+        print(f"{name:<20} {mode:<5} {metric:<16} {p:<4} {old!s:>10} {new!s:>10}  {shown}")
+    return 0
+
+
+def command_leaks(options) -> int:
+    routes = options.routes or list(leaks.ROUTES)
+    app = app_server.serving(rebuild=options.rebuild) if options.app == "build" else contextlib.nullcontext()
+    try:
+        with app:
+            report = asyncio.run(leaks.detect(routes, options.passes, headless=not options.headed))
+    except (ValueError, app_server.AppServerError) as exc:
+        print(exc)
+        return 1
+    path = leaks.write_report(report, options.output)
+    leaking = {route: entry["leaking"] for route, entry in report["routes"].items() if entry["leaking"]}
+    for route, entry in report["routes"].items():
+        growth = ", ".join(f"{name} {value:+d}" for name, value in entry["growth"].items())
+        print(f"{'LEAK' if entry['leaking'] else 'ok':<5} {route:<28} {growth}")
+    print(f"report written to {path}")
+    return 1 if leaking else 0
+
+
+def command_history_import(options) -> int:
+    for source in options.files:
+        stored = history.import_file(source, options.revision, options.database)
+        print(f"{source}: " + ("already imported" if stored is None else f"{stored} results"))
+    return 0
+
+
+def command_history(options) -> int:
+    started = time.perf_counter()
+    with contextlib.closing(history.connect(options.database)) as db:
+        if options.list:
+            since = time.time() - options.days * history.DAY_S
+            for row in history.iter_tests(db, options.ids[0] if len(options.ids) == 1 else None, since,
+                                          options.revision):
+                if options.ids and row["test_id"] not in options.ids:
+                    continue
+                duration = f"{row['duration']:7.1f}s" if row["duration"] is not None else "      -"
+                print(f"{iso_timestamp(row['started'] or 0)}  {row['test_id']}  {row['status']:<8}"
+                      f"  {duration}  {row['revision'] or '-':<8}  {(row['code_hash'] or '-')[7:19]}")
+            return 0
+        ids = options.ids or [row[0] for row in db.execute("SELECT DISTINCT test_id FROM tests ORDER BY test_id")]
+        for test_id in ids:
+            summary = history.metric_percentiles(db, test_id, options.metric, options.days, options.scope)
+            print(f"{test_id}  {options.metric}  n={summary['n']:<4} "
+                  + "  ".join(f"p{p} {summary[f'p{p}']}" for p in bench.PERCENTILES))
+    print(f"({(time.perf_counter() - started) * 1000:.1f} ms)")
+    return 0
+
+
+def command_extract(options) -> int:
+    unsupported = 0
+    for scenario in discover(ids=options.ids):
+        try:
+            plan = interpreter.extract(scenario)
+        except interpreter.UnsupportedStep as exc:
+            print(f"{scenario.id}  kept as a script: {exc}")
+            unsupported += 1
+            continue
+        path = interpreter.save_plan(plan, options.output_dir)
+        print(f"{scenario.id}  {len(plan['steps']):>3} steps  ->  {path}")
+    return 1 if unsupported and options.strict else 0
+
+
+def command_checkpoints(options) -> int:
+    for scenario in discover(ids=options.ids):
+        for saved in checkpoint.load_checkpoints(scenario.id):
+            print(f"{scenario.id}  step {saved.step:>3}  {saved.name}  ->  {saved.url}")
+    return 0
+
+
+def command_quarantine(options) -> int:
+    for line in quarantine.report(discover(ids=options.ids)):
+        print(line)
+    return 0
+
+
+def command_affected(options) -> int:
+    files = options.files or impact.changed_files(options.since)
+    for scenario in impact.affected_scenarios(discover(), files):
+        print(scenario.id)
+    return 0
+
+
+def command_compact(options) -> int:
+    records = load_records(options.input)
+    saved = console.compact_records(records)
+    code = 0 if options.keep_code else objects.pack_records(records)
+    write_records(records, options.output or options.input)
+    if not options.keep_code:
+        objects.add_root(options.output or options.input)
+    print(f"{saved / 1024:.0f} KiB of repeated console logs and {code / 1024:.0f} KiB of scripts "
+          f"removed from {len(records)} results")
+    return 0
+
+
+def command_objects_gc(options) -> int:
+    refs = set()
+    for path in sorted(set(map(Path, options.results)) | set(objects.root_files())):
+        if not path.exists():
+            continue
+        try:
+            refs |= objects.referenced(history.iter_records(path))
+        except ValueError:
+            # Not a result file (tmp/config.json, tmp/durations.json, ...)
+            continue
+    with contextlib.closing(history.connect(options.database)) as db:
+        refs |= history.code_hashes(db)
+    removed = objects.gc(refs, dry_run=options.dry_run)
+    print(f"{len(removed)} unreferenced objects " + ("would be removed" if options.dry_run else "removed"))
+    return 0
+
+
+def command_code(options) -> int:
+    try:
+        print(objects.get(options.ref), end="")
+    except KeyError as exc:
+        print(exc.args[0])
+        return 1
+    return 0
+
+
+def command_merge(options) -> int:
+    records = merge_records(options.inputs)
+    write_records(records, options.output)
+    if objects.referenced(records):
+        objects.add_root(options.output)
+    print(f"{len(records)} results from {len(options.inputs)} files written to {options.output}")
+    return 0
+
+
+def command_server(options) -> int:
+    if options.action == "start":
+        status = browser_server.start(options.port, options.recycle_after, not options.headed)
+    elif options.action == "stop":
+        stopped = browser_server.stop(options.port)
+        print("stopped" if stopped else "not running")
+        return 0
+    else:
+        status = browser_server.health(options.port)
+        if status is None:
+            print("not running")
+            return 1
+    print(json.dumps(status, indent=2))
+    return 0 if status["alive"] else 1
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="harness")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="run scenarios against a shared browser")
+    add_run_arguments(run)
+    run.set_defaults(handler=command_run)
+    fake = commands.add_parser("fake-backend", help="serve the fake Supabase backend over HTTP")
+    fake.add_argument("--port", type=int, default=fake_supabase.DEFAULT_PORT)
+    fake.add_argument("--seed", default=str(fake_supabase.SEED_PATH),
+                      help="Supabase backup JSON to seed the tables from")
+    fake.set_defaults(handler=command_fake_backend)
+    inspect = commands.add_parser("inspect", help="list a page's links, buttons, inputs and dialogs as JSON lines")
+    inspect.add_argument("url", nargs="?", default=base_url())
+    inspect.add_argument("--kinds", type=lambda value: [k.strip() for k in value.split(",") if k.strip()],
+                         default=list(inspector.KINDS), help="comma-separated subset of " + ",".join(inspector.KINDS))
+    inspect.add_argument("--storage-state", help="storage_state file to open the page signed in, "
+                                                 "e.g. one from tmp/sessions/")
+    inspect.add_argument("--output", help="JSON lines file (default: stdout)")
+    inspect.add_argument("--headed", action="store_true")
+    inspect.set_defaults(handler=command_inspect)
+    benchmark = commands.add_parser("bench", help="load the key pages repeatedly and report percentiles")
+    benchmark.add_argument("pages", nargs="*", help="subset of " + ",".join(p.name for p in bench.PAGES))
+    benchmark.add_argument("--iterations", type=int, default=bench.DEFAULT_ITERATIONS)
+    benchmark.add_argument("--warmup", type=int, default=bench.DEFAULT_WARMUP,
+                           help="loads per page and mode discarded before measuring")
+    benchmark.add_argument("--modes", type=lambda value: [m.strip() for m in value.split(",") if m.strip()],
+                           default=list(bench.MODES), help="comma-separated subset of cold,warm")
+    benchmark.add_argument("--app", choices=app_server.APP_MODES, default="dev")
+    benchmark.add_argument("--profile", choices=sorted(profiles.PROFILES), default=profiles.DEFAULT_PROFILE)
+    benchmark.add_argument("--rebuild", action="store_true")
+    benchmark.add_argument("--output", help="report file (default: tmp/bench/<commit>.json)")
+    benchmark.add_argument("--headed", action="store_true")
+    benchmark.set_defaults(handler=command_bench)
+    bench_diff = commands.add_parser("bench-diff", help="compare two benchmark reports")
+    bench_diff.add_argument("base")
+    bench_diff.add_argument("head")
+    bench_diff.add_argument("--percentile", choices=[f"p{p}" for p in bench.PERCENTILES])
+    bench_diff.set_defaults(handler=command_bench_diff)
+    leak = commands.add_parser("leaks", help="navigate a loop of routes and flag steady memory growth")
+    leak.add_argument("routes", nargs="*", help="app paths (default: " + " ".join(leaks.ROUTES) + ")")
+    leak.add_argument("--passes", type=int, default=leaks.DEFAULT_PASSES,
+                      help="times the loop is repeated; the first pass is warmup")
+    leak.add_argument("--app", choices=app_server.APP_MODES, default="dev")
+    leak.add_argument("--rebuild", action="store_true")
+    leak.add_argument("--output", default=str(leaks.LEAKS_PATH))
+    leak.add_argument("--headed", action="store_true")
+    leak.set_defaults(handler=command_leaks)
+    history_import = commands.add_parser("history-import", help="append result files to the run history")
+    history_import.add_argument("files", nargs="+")
+    history_import.add_argument("--revision", help="git commit the results were produced at")
+    history_import.add_argument("--database", default=str(history.HISTORY_PATH))
+    history_import.set_defaults(handler=command_history_import)
+    trend = commands.add_parser("history", help="percentiles of a metric per scenario from the run history")
+    trend.add_argument("ids", nargs="*", help="scenario ids (default: all in the history)")
+    trend.add_argument("--metric", default="duration_s",
+                       help="duration_s, ready_ms, waits_saved_s, blocked_bytes or a web vital such as lcp_ms")
+    trend.add_argument("--scope", default="", help="route of a web vital, e.g. /app/reports")
+    trend.add_argument("--days", type=float, default=30)
+    trend.add_argument("--revision", help="with --list, only runs at this commit")
+    trend.add_argument("--list", action="store_true", help="list the runs instead of percentiles")
+    trend.add_argument("--database", default=str(history.HISTORY_PATH))
+    trend.set_defaults(handler=command_history)
+    objects_gc = commands.add_parser("objects-gc", help="remove stored scripts no result or history references")
+    objects_gc.add_argument("results", nargs="*",
+                            help="more result files whose scripts are kept, besides the recorded roots and tmp/*.json")
+    objects_gc.add_argument("--database", default=str(history.HISTORY_PATH))
+    objects_gc.add_argument("--dry-run", action="store_true")
+    objects_gc.set_defaults(handler=command_objects_gc)
+    code = commands.add_parser("code", help="print a stored script by its codeHash")
+    code.add_argument("ref", help="sha256:<hex> or a prefix of at least 3 hex digits")
+    code.set_defaults(handler=command_code)
+    extract = commands.add_parser("extract", help="save the declarative plans of the scripts")
+    extract.add_argument("ids", nargs="*")
+    extract.add_argument("--output-dir", default=str(interpreter.PLANS_DIR))
+    extract.add_argument("--strict", action="store_true",
+                         help="exit with 1 when a script cannot be expressed as a plan")
+    extract.set_defaults(handler=command_extract)
+    checkpoints = commands.add_parser("checkpoints", help="list saved checkpoints")
+    checkpoints.add_argument("ids", nargs="*")
+    checkpoints.set_defaults(handler=command_checkpoints)
+    placeholders = commands.add_parser("quarantine", help="list placeholder assertions")
+    placeholders.add_argument("ids", nargs="*")
+    placeholders.set_defaults(handler=command_quarantine)
+    affected = commands.add_parser("affected", help="list scenarios affected by changed files")
+    affected.add_argument("files", nargs="*", help="repository paths (default: git changes)")
+    affected.add_argument("--since", default="HEAD", help="git ref to diff against")
+    affected.set_defaults(handler=command_affected)
+    compact = commands.add_parser("compact", help="deduplicate the console logs in a results file")
+    compact.add_argument("input", nargs="?", default=str(RESULTS_PATH))
+    compact.add_argument("--output", help="results file to write (default: the input)")
+    compact.add_argument("--keep-code", action="store_true", help="leave the scripts embedded in `code`")
+    compact.set_defaults(handler=command_compact)
+    merge = commands.add_parser("merge", help="combine shard result files into one")
+    merge.add_argument("inputs", nargs="+")
+    merge.add_argument("--output", default=str(HARNESS_RESULTS_PATH))
+    merge.set_defaults(handler=command_merge)
+    server = commands.add_parser("server", help="manage the persistent browser server")
+    server.add_argument("action", choices=["start", "stop", "status"])
+    server.add_argument("--port", type=int, default=browser_server.DEFAULT_CONTROL_PORT)
+    server.add_argument("--recycle-after", type=int, default=browser_server.DEFAULT_RECYCLE_AFTER,
+                        help="restart Chromium after this many contexts")
+    server.add_argument("--headed", action="store_true")
+    server.set_defaults(handler=command_server)
+    return parser
+
+
+def main(argv=None) -> int:
+    options = build_parser().parse_args(argv)
+    return options.handler(options)
@@ -0,0 +1,33 @@
+"""Paths and settings shared by the harness modules."""
+import json
+from pathlib import Path
+
+TESTS_DIR = Path(__file__).resolve().parent.parent
+REPO_ROOT = TESTS_DIR.parent
+TMP_DIR = TESTS_DIR / "tmp"
+CONFIG_PATH = TMP_DIR / "config.json"
+TEST_PLAN_PATH = TESTS_DIR / "testsprite_frontend_test_plan.json"
+RESULTS_PATH = TMP_DIR / "test_results.json"
+HARNESS_RESULTS_PATH = TMP_DIR / "harness_results.json"
+
+DEFAULT_BASE_URL = "http://localhost:8081"
+
+# Same Chromium flags the generated scripts pass to chromium.launch()
+DEFAULT_LAUNCH_ARGS = [
+    "--window-size=1280,720",
+    "--disable-dev-shm-usage",
+    "--ipc=host",
+]
+
+
+def load_config(path=CONFIG_PATH) -> dict:
+    """Read tmp/config.json, returning an empty dict when it is missing."""
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+
+
+def base_url(config=None) -> str:
+    config = load_config() if config is None else config
+    return config.get("localEndpoint") or DEFAULT_BASE_URL
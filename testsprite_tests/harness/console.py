@@ -0,0 +1,169 @@
+"""Deduplicated capture of browser console messages and page errors.
+
+TestSprite appends every console line to `testError`, so TC008 and TC011
+carry 80+ KB of the same few warnings. `ConsolePlugin` listens to
+`page.on("console")` and `page.on("pageerror")` instead and keeps one entry
+per signature: message type, normalized text (timestamps, UUIDs, numbers and
+Vite cache busters masked) and source location (URL, line and column, without
+Vite's `?v=`/`?t=` cache busters). Each entry has a count, the
+first and last time it was seen and up to SAMPLES raw examples. At most
+MAX_SIGNATURES are kept; the least recently seen one is dropped first.
+
+`harness.console` in the results holds the entries. A failed scenario's
+`testError` gets the same "Browser Console Logs:" section as TestSprite's,
+one line per signature with its count. `compact_records` rewrites existing
+result files that way.
+"""
+import re
+import time
+from collections import OrderedDict, deque
+
+from .results import iso_timestamp, parse_timestamp
+from .runner import Plugin, watch_pages
+
+MAX_SIGNATURES = 100
+SAMPLES = 3
+SAMPLE_CHARS = 500
+ERROR_LINES = 20
+LOGS_HEADER = "Browser Console Logs:"
+
+MASKS = (
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"), "<ts>"),
+    (re.compile(r"[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}", re.I), "<uuid>"),
+    (re.compile(r"([?&]v=)[0-9a-f]+"), r"\1<v>"),
+    (re.compile(r"\b\d+(\.\d+)?\b"), "<n>"),
+)
+CACHE_BUSTER = re.compile(r"[?&][vt]=[0-9a-f]+(?=[&:]|$)")
+LOCATION = re.compile(r"\s*\(at (\S+)\)\s*$")
+STACK_FRAME = re.compile(r"^\s*at (?:.*\()?(\S+:\d+:\d+)\)?\s*$", re.M)
+ENTRY_START = re.compile(r"^\[([A-Z]+)\] ", re.M)
+# Most important first when a failure message has to be cut short
+SEVERITY = {"pageerror": 0, "error": 1, "warning": 2}
+
+
+def source_location(location) -> str:
+    """`location` without cache busters, keeping its line and column."""
+    return CACHE_BUSTER.sub("", location.strip())
+
+
+def normalize(text) -> str:
+    for pattern, replacement in MASKS:
+        text = pattern.sub(replacement, text)
+    return text.strip()[:SAMPLE_CHARS]
+
+
+class ConsoleLog:
+    """Ring buffer of console signatures for one scenario."""
+
+    def __init__(self, max_signatures=MAX_SIGNATURES):
+        self.max_signatures = max_signatures
+        self.entries = OrderedDict()
+        self.total = 0
+        self.dropped = 0
+
+    def add(self, kind, text, location="", at=None):
+        at = time.time() if at is None else at
+        location = source_location(location)
+        key = (kind, normalize(text), location)
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            if len(self.entries) >= self.max_signatures:
+                self.entries.popitem(last=False)
+                self.dropped += 1
+            entry = {"type": kind, "message": key[1], "location": location, "count": 0,
+                     "first": at, "last": at, "samples": deque(maxlen=SAMPLES)}
+        entry["count"] += 1
+        entry["last"] = at
+        entry["samples"].append(text[:SAMPLE_CHARS])
+        # Most recently seen last, so eviction drops the stalest signature
+        self.entries[key] = entry
+        self.total += 1
+
+    def summary(self) -> dict:
+        entries = sorted(self.entries.values(), key=lambda e: (SEVERITY.get(e["type"], 3), -e["count"]))
+        return {
+            "total": self.total,
+            "signatures": len(self.entries),
+            "dropped": self.dropped,
+            "entries": [{**entry, "first": iso_timestamp(entry["first"]), "last": iso_timestamp(entry["last"]),
+                         "samples": list(entry["samples"])} for entry in entries],
+        }
+
+
+def format_logs(summary, limit=ERROR_LINES) -> str:
+    """A "Browser Console Logs:" section with one line per signature."""
+    lines = [LOGS_HEADER]
+    for entry in summary["entries"][:limit]:
+        first_line = entry["samples"][-1].splitlines()[0] if entry["samples"] else entry["message"]
+        location = f" (at {entry['location']})" if entry["location"] else ""
+        lines.append(f"[{entry['type'].upper()}] x{entry['count']} {first_line}{location}")
+    hidden = len(summary["entries"]) - limit
+    if hidden > 0:
+        lines.append(f"... {hidden} more signatures in harness.console")
+    return "\n".join(lines)
+
+
+def parse_logs(text, at=None) -> ConsoleLog:
+    """Signatures of a TestSprite "Browser Console Logs:" dump."""
+    log = ConsoleLog()
+    starts = list(ENTRY_START.finditer(text))
+    for match, following in zip(starts, starts[1:] + [None]):
+        body = text[match.end():following.start() if following else len(text)].rstrip()
+        location = LOCATION.search(body)
+        message = body[:location.start()] if location else body
+        log.add(match.group(1).lower(), message, location.group(1) if location else "", at)
+    return log
+
+
+def compact_records(records) -> int:
+    """Replace raw console dumps in `testError` with deduplicated ones; returns bytes saved."""
+    saved = 0
+    for record in records:
+        error = record.get("testError") or ""
+        index = error.find(LOGS_HEADER)
+        if index < 0:
+            continue
+        at = parse_timestamp(record["modified"]) if record.get("modified") else None
+        summary = parse_logs(error[index + len(LOGS_HEADER):], at).summary()
+        compacted = error[:index] + format_logs(summary)
+        saved += len(error) - len(compacted)
+        record["testError"] = compacted
+        record.setdefault("harness", {})["console"] = summary
+    return saved
+
+
+class ConsolePlugin(Plugin):
+    """Collects console messages and page errors per scenario, deduplicated."""
+
+    name = "console"
+
+    def __init__(self, max_signatures=MAX_SIGNATURES):
+        self.max_signatures = max_signatures
+        self.logs = {}
+
+    async def on_context(self, context, scenario):
+        log = self.logs[scenario.id] = ConsoleLog(self.max_signatures)
+
+        def on_console(message):
+            location = message.location or {}
+            url = location.get("url", "")
+            where = f"{url}:{location.get('lineNumber', 0)}:{location.get('columnNumber', 0)}" if url else ""
+            log.add(message.type, message.text, where)
+
+        def on_page_error(error):
+            frame = STACK_FRAME.search(error.stack or "")
+            log.add("pageerror", f"{error.name}: {error.message}", frame.group(1) if frame else "")
+
+        async def watch(page):
+            page.on("console", on_console)
+            page.on("pageerror", on_page_error)
+
+        watch_pages(context, watch)
+
+    async def after_scenario(self, context, scenario, result):
+        log = self.logs.pop(scenario.id, None)
+        if log is None or not log.total:
+            return
+        summary = result.extras["console"] = log.summary()
+        if not result.passed:
+            result.error = f"{result.error}\n{format_logs(summary)}"
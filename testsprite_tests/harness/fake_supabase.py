@@ -0,0 +1,672 @@
+"""In-process stand-in for the Supabase REST (PostgREST) and auth (GoTrue) APIs.
+
+The app only talks to Supabase through supabase-js, so a small subset of
+both APIs is enough to run the scenarios offline: table reads with filters,
+ordering, ranges, counts and embedded resources; inserts, upserts, updates and
+deletes; RPC calls; and password sign-in, sign-up, token refresh, user
+lookup and logout.
+
+Data lives in memory and is seeded from SupabaseV28_07_2025_Backup.json plus an
+optional per-scenario fixture in fixtures/<TC>.json. Every scenario gets its
+own namespace, a private copy of the seed, so scenarios can run in parallel
+and mutate data freely. Row visibility follows the app's RLS policies in
+spirit: a user sees global rows, their own rows and the rows of their
+families.
+
+The runner plugin answers the app's requests from `context.route` without any
+network. `python -m harness fake-backend` serves the same backend over HTTP
+for running the app by hand with VITE_SUPABASE_URL pointing at it.
+"""
+import asyncio
+import base64
+import copy
+import json
+import re
+import time
+import uuid
+from dataclasses import dataclass, field
+from pathlib import Path
+from urllib.parse import parse_qsl, urlparse
+
+from .config import REPO_ROOT, TESTS_DIR
+from .har import BACKEND_URL, REALTIME_URL, silent_realtime
+from .runner import Plugin
+from .session import credentials_from_config
+
+SEED_PATH = REPO_ROOT / "SupabaseV28_07_2025_Backup.json"
+FIXTURES_DIR = TESTS_DIR / "fixtures"
+DEFAULT_PORT = 54329
+DEFAULT_NAMESPACE = "default"
+NAMESPACE_HEADER = "x-harness-namespace"
+TOKEN_LIFETIME_S = 3600
+
+# Foreign-key columns used to resolve embedded resources such as `categorias:categoria_id(nome)`
+FOREIGN_KEYS = {
+    "categoria_id": ("categories", "id"),
+    "account_id": ("accounts", "id"),
+    "goal_id": ("goals", "id"),
+    "family_id": ("families", "id"),
+    "user_id": ("profiles", "user_id"),
+}
+
+# Query parameters that are not column filters
+RESERVED_PARAMS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+CORS_HEADERS = {
+    "access-control-allow-origin": "*",
+    "access-control-allow-headers": "*",
+    "access-control-allow-methods": "GET, POST, PATCH, PUT, DELETE, HEAD, OPTIONS",
+    "access-control-expose-headers": "content-range, x-total-count",
+}
+
+
+def _now() -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime())
+
+
+def _b64(data) -> str:
+    return base64.urlsafe_b64encode(json.dumps(data).encode("utf-8")).rstrip(b"=").decode("ascii")
+
+
+def make_jwt(claims) -> str:
+    # supabase-js only decodes the payload; nothing verifies the signature here
+    return f"{_b64({'alg': 'HS256', 'typ': 'JWT'})}.{_b64(claims)}.{_b64('fake-supabase')}"
+
+
+def jwt_claims(token) -> dict:
+    try:
+        payload = token.split(".")[1]
+        return json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+    except (IndexError, ValueError):
+        return {}
+
+
+@dataclass
+class Request:
+    method: str
+    url: str
+    headers: dict = field(default_factory=dict)
+    body: str = ""
+
+    def __post_init__(self):
+        self.headers = {name.lower(): value for name, value in self.headers.items()}
+        parsed = urlparse(self.url)
+        self.path = parsed.path
+        self.params = parse_qsl(parsed.query, keep_blank_values=True)
+
+    def json(self):
+        return json.loads(self.body) if self.body else None
+
+    @property
+    def token(self) -> str:
+        return self.headers.get("authorization", "").removeprefix("Bearer ").strip()
+
+
+@dataclass
+class Response:
+    status: int = 200
+    body: object = None
+    headers: dict = field(default_factory=dict)
+
+    def encoded(self) -> bytes:
+        return b"" if self.body is None else json.dumps(self.body).encode("utf-8")
+
+    def all_headers(self) -> dict:
+        headers = {**CORS_HEADERS, "content-type": "application/json; charset=utf-8"}
+        headers.update(self.headers)
+        return headers
+
+
+def _error(status, message, code="") -> Response:
+    # Carries both the PostgREST and the GoTrue error fields
+    return Response(status, {"code": code or str(status), "error_code": code, "message": message,
+                             "msg": message, "error_description": message, "details": None, "hint": None})
+
+
+class UniqueViolation(Exception):
+    """An insert that repeats an existing key; PostgREST answers 409 with Postgres' 23505."""
+
+
+# --- seed data ------------------------------------------------------------
+
+
+def load_seed(path=SEED_PATH) -> dict:
+    try:
+        backup = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return backup.get("data", backup)
+
+
+def seed_users(tables, credentials) -> list:
+    """Auth users for the configured credentials, matched to profiles by e-mail name."""
+    profiles = {row.get("nome"): row for row in tables.get("profiles", [])}
+    users = []
+    for credential in credentials:
+        profile = profiles.get(credential.email.split("@")[0])
+        user_id = profile["user_id"] if profile else str(uuid.uuid4())
+        users.append({"id": user_id, "email": credential.email, "password": credential.password,
+                      "user_metadata": {}})
+    return users
+
+
+def load_fixture(name, directory=FIXTURES_DIR):
+    try:
+        return json.loads((Path(directory) / f"{name}.json").read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+# --- PostgREST query language ---------------------------------------------
+
+
+def _split_top_level(text, separator=",") -> list:
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == separator and depth == 0:
+            parts.append(current)
+            current = ""
+        else:
+            current += char
+    if current:
+        parts.append(current)
+    return [part.strip() for part in parts if part.strip()]
+
+
+def _coerce(value):
+    if isinstance(value, int):
+        return float(value)
+    if isinstance(value, str):
+        try:
+            return float(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _compare(left, right) -> int:
+    if isinstance(left, bool):
+        left = str(left).lower()
+    left, right = _coerce(left), _coerce(right)
+    if isinstance(left, float) != isinstance(right, float):
+        left, right = str(left), str(right)
+    return (left > right) - (left < right)
+
+
+def _like(value, pattern, flags=0) -> bool:
+    regex = "^" + re.escape(pattern).replace("%", ".*").replace(r"\*", ".*").replace("_", ".") + "$"
+    return value is not None and re.match(regex, str(value), flags | re.DOTALL) is not None
+
+
+def _in_values(text) -> list:
+    return [item.strip().strip('"') for item in _split_top_level(text.strip("()"))]
+
+
+def _test(row, column, operator, value) -> bool:
+    actual = row.get(column)
+    if operator == "eq":
+        return actual is not None and _compare(actual, value) == 0
+    if operator == "neq":
+        return actual is not None and _compare(actual, value) != 0
+    if operator in ("gt", "gte", "lt", "lte"):
+        if actual is None:
+            return False
+        order = _compare(actual, value)
+        return {"gt": order > 0, "gte": order >= 0, "lt": order < 0, "lte": order <= 0}[operator]
+    if operator == "is":
+        expected = {"null": None, "true": True, "false": False}.get(value.lower(), value)
+        return actual is expected if expected in (None, True, False) else actual == expected
+    if operator == "in":
+        return actual is not None and any(_compare(actual, item) == 0 for item in _in_values(value))
+    if operator == "like":
+        return _like(actual, value)
+    if operator == "ilike":
+        return _like(actual, value, re.IGNORECASE)
+    if operator == "cs":
+        wanted = json.loads(value) if value.startswith(("[", "{\"")) else _in_values(value.strip("{}"))
+        if isinstance(actual, dict):
+            return all(actual.get(k) == v for k, v in wanted.items())
+        return isinstance(actual, list) and all(item in actual for item in wanted)
+    raise ValueError(f"unsupported operator {operator!r}")
+
+
+def _condition(column, expression):
+    """A row predicate for `column=op.value` / `column=not.op.value`."""
+    negate = expression.startswith("not.")
+    if negate:
+        expression = expression[4:]
+    operator, _, value = expression.partition(".")
+    return lambda row: _test(row, column, operator, value) != negate
+
+
+def _logic(expression, conjunction):
+    """A row predicate for `or=(a.eq.1,and(b.eq.2,c.is.null))`."""
+    predicates = []
+    for item in _split_top_level(expression.strip()[1:-1]):
+        nested = re.match(r"^(not\.)?(and|or)(\(.*\))$", item)
+        if nested:
+            predicate = _logic(nested.group(3), nested.group(2))
+            predicates.append((lambda p: lambda row: not p(row))(predicate) if nested.group(1) else predicate)
+            continue
+        column, _, rest = item.partition(".")
+        predicates.append(_condition(column, rest))
+    combine = any if conjunction == "or" else all
+    return lambda row: combine(predicate(row) for predicate in predicates)
+
+
+def parse_filters(params) -> list:
+    predicates = []
+    for name, value in params:
+        if name in RESERVED_PARAMS:
+            continue
+        if name in ("or", "and"):
+            predicates.append(_logic(value, name))
+        elif name in ("not.or", "not.and"):
+            predicate = _logic(value, name[4:])
+            predicates.append(lambda row, p=predicate: not p(row))
+        else:
+            predicates.append(_condition(name, value))
+    return predicates
+
+
+@dataclass
+class Field:
+    name: str
+    alias: str
+    embed: list = None
+    hint: str = ""
+
+
+def parse_select(text) -> list:
+    fields = []
+    for item in _split_top_level(text or "*"):
+        embed = None
+        match = re.match(r"^(.*?)\((.*)\)$", item, re.DOTALL)
+        if match:
+            item, embed = match.group(1).strip(), parse_select(match.group(2))
+        # `alias:column::cast`; the cast is dropped before looking for the alias
+        alias, _, name = item.split("::")[0].rpartition(":")
+        name = name.strip()
+        name, _, hint = name.partition("!")
+        fields.append(Field(name, alias.strip() or name, embed, hint))
+    return fields
+
+
+# --- the backend ----------------------------------------------------------
+
+
+class Dataset:
+    """The tables and auth users of one namespace."""
+
+    def __init__(self, tables, users):
+        self.tables = tables
+        self.users = {user["id"]: user for user in users}
+        self.refresh_tokens = {}
+
+    def table(self, name) -> list:
+        return self.tables.setdefault(name, [])
+
+    def user_by_email(self, email):
+        return next((u for u in self.users.values() if u["email"].lower() == (email or "").lower()), None)
+
+    def family_ids(self, user_id) -> set:
+        return {m["family_id"] for m in self.table("family_members") if m.get("user_id") == user_id}
+
+    def visible(self, table, row, user_id) -> bool:
+        families = self.family_ids(user_id) if user_id else set()
+        if table == "families":
+            return row.get("id") in families or row.get("created_by") == user_id
+        if table == "profiles":
+            members = {m["user_id"] for m in self.table("family_members") if m.get("family_id") in families}
+            return row.get("user_id") == user_id or row.get("user_id") in members
+        if "user_id" not in row and "family_id" not in row:
+            return True
+        if row.get("user_id") is None and row.get("family_id") is None:
+            return True
+        return (user_id is not None and row.get("user_id") == user_id) or row.get("family_id") in families
+
+
+class FakeSupabase:
+    """Answers supabase-js requests from in-memory, per-namespace data.
+
+    Tests program it with `rpc(name)` for database functions and `override`
+    for any other response, e.g. to inject an error.
+    """
+
+    def __init__(self, seed=None, credentials=(), fixtures_dir=FIXTURES_DIR):
+        self.seed = load_seed() if seed is None else seed
+        self.credentials = list(credentials)
+        self.fixtures_dir = fixtures_dir
+        self.namespaces = {}
+        self.functions = {}
+        self.overrides = []
+        self.requests = 0
+
+    def dataset(self, namespace=DEFAULT_NAMESPACE) -> Dataset:
+        if namespace not in self.namespaces:
+            tables = copy.deepcopy(self.seed)
+            users = seed_users(tables, self.credentials)
+            fixture = load_fixture(namespace, self.fixtures_dir) or {}
+            for name, rows in fixture.get("tables", {}).items():
+                if fixture.get("replace"):
+                    tables[name] = []
+                tables.setdefault(name, []).extend(copy.deepcopy(rows))
+            users.extend(fixture.get("users", []))
+            self.namespaces[namespace] = Dataset(tables, users)
+        return self.namespaces[namespace]
+
+    def reset(self, namespace=None):
+        if namespace is None:
+            self.namespaces.clear()
+        else:
+            self.namespaces.pop(namespace, None)
+
+    def rpc(self, name):
+        """Register `handler(dataset, user_id, arguments)` for /rest/v1/rpc/<name>."""
+        def register(handler):
+            self.functions[name] = handler
+            return handler
+        return register
+
+    def override(self, method, path_pattern, handler):
+        """Answer matching requests with `handler(request)`, which returns a Response or None."""
+        self.overrides.append((method.upper(), re.compile(path_pattern), handler))
+
+    def handle(self, request, namespace=DEFAULT_NAMESPACE) -> Response:
+        self.requests += 1
+        if request.method == "OPTIONS":
+            return Response(204)
+        dataset = self.dataset(namespace)
+        try:
+            for method, pattern, handler in self.overrides:
+                if method in (request.method, "*") and pattern.search(request.path):
+                    response = handler(request)
+                    if response is not None:
+                        return response
+            if request.path.startswith("/auth/v1/"):
+                return self.auth(dataset, request, request.path[len("/auth/v1/"):])
+            if request.path.startswith("/rest/v1/rpc/"):
+                return self.call_function(dataset, request, request.path[len("/rest/v1/rpc/"):])
+            if request.path.startswith("/rest/v1/"):
+                return self.rest(dataset, request, request.path[len("/rest/v1/"):])
+        except UniqueViolation as exc:
+            return _error(409, str(exc), "23505")
+        except (ValueError, TypeError, KeyError) as exc:
+            return _error(400, str(exc), "PGRST100")
+        except Exception as exc:
+            # Anything else is a gap in the fake; an unfulfilled route would hang the app until its timeout
+            return _error(500, f"{type(exc).__name__}: {exc}", "XX000")
+        return _error(404, f"no fake endpoint for {request.path}")
+
+    # --- GoTrue --------------------------------------------------------
+
+    def session(self, dataset, user) -> dict:
+        now = int(time.time())
+        refresh = uuid.uuid4().hex
+        dataset.refresh_tokens[refresh] = user["id"]
+        public = self.public_user(user)
+        claims = {"sub": user["id"], "email": user["email"], "role": "authenticated",
+                  "aud": "authenticated", "iat": now, "exp": now + TOKEN_LIFETIME_S,
+                  "session_id": uuid.uuid4().hex}
+        return {"access_token": make_jwt(claims), "token_type": "bearer", "expires_in": TOKEN_LIFETIME_S,
+                "expires_at": now + TOKEN_LIFETIME_S, "refresh_token": refresh, "user": public}
+
+    @staticmethod
+    def public_user(user) -> dict:
+        created = user.setdefault("created_at", _now())
+        return {
+            "id": user["id"], "aud": "authenticated", "role": "authenticated", "email": user["email"],
+            "email_confirmed_at": created, "confirmed_at": created, "last_sign_in_at": _now(),
+            "phone": "", "app_metadata": {"provider": "email", "providers": ["email"]},
+            "user_metadata": user.get("user_metadata", {}), "identities": [],
+            "created_at": created, "updated_at": _now(),
+        }
+
+    def current_user(self, dataset, request):
+        return dataset.users.get(jwt_claims(request.token).get("sub"))
+
+    def auth(self, dataset, request, endpoint) -> Response:
+        payload = request.json() or {}
+        if endpoint == "token":
+            grant = dict(request.params).get("grant_type")
+            if grant == "password":
+                user = dataset.user_by_email(payload.get("email"))
+                if user is None or user["password"] != payload.get("password"):
+                    return _error(400, "Invalid login credentials", "invalid_credentials")
+                return Response(200, self.session(dataset, user))
+            if grant == "refresh_token":
+                user_id = dataset.refresh_tokens.pop(payload.get("refresh_token"), None)
+                if user_id is None:
+                    return _error(400, "Invalid Refresh Token: Refresh Token Not Found", "refresh_token_not_found")
+                return Response(200, self.session(dataset, dataset.users[user_id]))
+            return _error(400, f"unsupported grant_type {grant}", "unsupported_grant_type")
+        if endpoint == "signup":
+            if dataset.user_by_email(payload.get("email")):
+                return _error(422, "User already registered", "user_already_exists")
+            user = {"id": str(uuid.uuid4()), "email": payload["email"], "password": payload.get("password"),
+                    "user_metadata": payload.get("data") or {}}
+            dataset.users[user["id"]] = user
+            dataset.table("profiles").append({"id": str(uuid.uuid4()), "user_id": user["id"],
+                                              "nome": user["user_metadata"].get("nome") or user["email"].split("@")[0],
+                                              "created_at": _now(), "updated_at": _now()})
+            return Response(200, self.session(dataset, user))
+        if endpoint == "user":
+            user = self.current_user(dataset, request)
+            if user is None:
+                return _error(401, "invalid JWT", "bad_jwt")
+            if request.method == "PUT":
+                user["user_metadata"] = {**user.get("user_metadata", {}), **(payload.get("data") or {})}
+                if payload.get("password"):
+                    user["password"] = payload["password"]
+            return Response(200, self.public_user(user))
+        if endpoint == "logout":
+            return Response(204)
+        if endpoint in ("recover", "otp", "resend"):
+            return Response(200, {})
+        if endpoint == "settings":
+            return Response(200, {"external": {"email": True, "google": True}, "disable_signup": False,
+                                  "mailer_autoconfirm": True})
+        return _error(404, f"no fake auth endpoint {endpoint}")
+
+    # --- PostgREST -----------------------------------------------------
+
+    def call_function(self, dataset, request, name) -> Response:
+        user = self.current_user(dataset, request)
+        handler = self.functions.get(name)
+        if handler is None:
+            # Unregistered functions answer with an empty result
+            return Response(200, [] if name.startswith("get_") else None)
+        return Response(200, handler(dataset, user["id"] if user else None, request.json() or {}))
+
+    def embed(self, dataset, table, row, spec, user_id):
+        target, key = None, None
+        if spec.name in FOREIGN_KEYS:
+            target, key = FOREIGN_KEYS[spec.name]
+            value = row.get(spec.name)
+        elif spec.hint in FOREIGN_KEYS:
+            target, key = spec.name, FOREIGN_KEYS[spec.hint][1]
+            value = row.get(spec.hint)
+        else:
+            column = next((c for c, (t, _) in FOREIGN_KEYS.items() if t == spec.name and c in row), None)
+            if column is not None:
+                target, key, value = spec.name, FOREIGN_KEYS[column][1], row.get(column)
+        if target is not None:
+            match = next((r for r in dataset.table(target) if r.get(key) == value
+                          and dataset.visible(target, r, user_id)), None)
+            return self.project(dataset, target, match, spec.embed, user_id) if match else None
+        # One-to-many: child rows pointing back at this row
+        back = next((c for c, (t, _) in FOREIGN_KEYS.items() if t == table), None)
+        children = [r for r in dataset.table(spec.name)
+                    if back and r.get(back) == row.get(FOREIGN_KEYS[back][1])
+                    and dataset.visible(spec.name, r, user_id)]
+        return [self.project(dataset, spec.name, child, spec.embed, user_id) for child in children]
+
+    def project(self, dataset, table, row, fields, user_id) -> dict:
+        projected = {}
+        for spec in fields:
+            if spec.embed is not None:
+                projected[spec.alias] = self.embed(dataset, table, row, spec, user_id)
+            elif spec.name == "*":
+                projected.update(row)
+            else:
+                projected[spec.alias] = row.get(spec.name)
+        return projected
+
+    def rest(self, dataset, request, table) -> Response:
+        user = self.current_user(dataset, request)
+        user_id = user["id"] if user else None
+        params = dict(request.params)
+        prefer = request.headers.get("prefer", "")
+        rows = dataset.table(table)
+        predicates = parse_filters(request.params)
+        matching = [row for row in rows if dataset.visible(table, row, user_id)
+                    and all(predicate(row) for predicate in predicates)]
+
+        if request.method == "POST":
+            payload = request.json()
+            matching = self.insert(rows, payload if isinstance(payload, list) else [payload],
+                                   params.get("on_conflict"), "merge-duplicates" in prefer, "ignore-duplicates" in prefer)
+        elif request.method == "PATCH":
+            changes = request.json() or {}
+            for row in matching:
+                row.update(changes)
+                if "updated_at" in row:
+                    row["updated_at"] = _now()
+        elif request.method == "DELETE":
+            doomed = {id(row) for row in matching}
+            rows[:] = [row for row in rows if id(row) not in doomed]
+        elif request.method not in ("GET", "HEAD"):
+            return _error(405, f"{request.method} not supported")
+
+        for column, descending, nulls_first in reversed(self.ordering(params.get("order", ""))):
+            present = [row for row in matching if row.get(column) is not None]
+            missing = [row for row in matching if row.get(column) is None]
+            present.sort(key=lambda row: _coerce(row.get(column)), reverse=descending)
+            matching = missing + present if nulls_first else present + missing
+        total = len(matching)
+        offset = int(params.get("offset", 0))
+        limit = params.get("limit")
+        page = matching[offset:offset + int(limit)] if limit is not None else matching[offset:]
+
+        headers = {}
+        if "count=" in prefer:
+            end = offset + len(page) - 1
+            headers["content-range"] = f"{offset}-{end}/{total}" if page else f"*/{total}"
+        if request.method in ("POST", "PATCH", "DELETE") and "return=representation" not in prefer:
+            return Response(201 if request.method == "POST" else 204, None, headers)
+        fields = parse_select(params.get("select", "*"))
+        if [spec.name for spec in fields] == ["count"]:
+            body = [{"count": total}]
+        else:
+            body = [self.project(dataset, table, row, fields, user_id) for row in page]
+        if request.method == "HEAD":
+            return Response(200, None, headers)
+        if "vnd.pgrst.object" in request.headers.get("accept", ""):
+            if len(body) != 1:
+                return Response(406, {"code": "PGRST116", "details": f"The result contains {len(body)} rows",
+                                      "hint": None,
+                                      "message": "JSON object requested, multiple (or no) rows returned"})
+            body = body[0]
+        return Response(201 if request.method == "POST" else 200, body, headers)
+
+    @staticmethod
+    def ordering(order) -> list:
+        found = []
+        for item in _split_top_level(order):
+            parts = item.split(".")
+            found.append((parts[0], "desc" in parts[1:], "nullsfirst" in parts[1:]))
+        return found
+
+    @staticmethod
+    def insert(rows, payload, on_conflict, merge, ignore) -> list:
+        keys = [key.strip() for key in (on_conflict or "id").split(",")]
+        written = []
+        for values in payload:
+            values = dict(values)
+            values.setdefault("id", str(uuid.uuid4()))
+            values.setdefault("created_at", _now())
+            existing = next((row for row in rows if all(row.get(k) == values.get(k) for k in keys)), None)
+            if existing is not None and (merge or ignore):
+                if merge:
+                    existing.update({k: v for k, v in values.items() if k not in ("id", "created_at")})
+                written.append(existing)
+                continue
+            if existing is not None:
+                raise UniqueViolation(f"duplicate key value violates unique constraint on {', '.join(keys)}")
+            rows.append(values)
+            written.append(values)
+        return written
+
+
+class FakeBackendPlugin(Plugin):
+    """Serves each scenario's Supabase traffic from its own namespace of the fake backend."""
+
+    name = "fake_backend"
+
+    def __init__(self, backend=None):
+        self.backend = backend or FakeSupabase(credentials=credentials_from_config())
+        self.counts = {}
+
+    async def on_context(self, context, scenario):
+        self.counts[scenario.id] = 0
+
+        async def handle(route, request):
+            headers = await request.all_headers()
+            fake = Request(request.method, request.url, headers, request.post_data or "")
+            response = self.backend.handle(fake, scenario.id)
+            self.counts[scenario.id] += 1
+            await route.fulfill(status=response.status, headers=response.all_headers(),
+                                body=response.encoded())
+
+        await context.route(BACKEND_URL, handle)
+        await context.route_web_socket(REALTIME_URL, silent_realtime)
+
+    async def after_scenario(self, context, scenario, result):
+        if scenario.id in self.counts:
+            result.extras["backend"] = {"mode": "fake", "requests": self.counts.pop(scenario.id)}
+        self.backend.reset(scenario.id)
+
+
+async def _serve_connection(backend, reader, writer):
+    try:
+        while True:
+            request_line = await reader.readline()
+            if not request_line.strip():
+                break
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while True:
+                line = (await reader.readline()).decode("latin-1")
+                if line in ("\r\n", "\n", ""):
+                    break
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+            length = int(headers.get("content-length") or 0)
+            body = (await reader.readexactly(length)).decode("utf-8") if length else ""
+            namespace = headers.get(NAMESPACE_HEADER, DEFAULT_NAMESPACE)
+            response = backend.handle(Request(method, target, headers, body), namespace)
+            payload = response.encoded()
+            head = [f"HTTP/1.1 {response.status} {'OK' if response.status < 400 else 'Error'}"]
+            head += [f"{name}: {value}" for name, value in response.all_headers().items()]
+            head.append(f"content-length: {len(payload)}")
+            writer.write(("\r\n".join(head) + "\r\n\r\n").encode("latin-1") + payload)
+            await writer.drain()
+            if headers.get("connection", "").lower() == "close":
+                break
+    except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(port=DEFAULT_PORT, backend=None):
+    """Serve the fake backend over HTTP until cancelled."""
+    backend = backend or FakeSupabase(credentials=credentials_from_config())
+    server = await asyncio.start_server(lambda r, w: _serve_connection(backend, r, w), "127.0.0.1", port)
+    print(f"fake Supabase on http://127.0.0.1:{port}  (VITE_SUPABASE_URL=http://127.0.0.1:{port})")
+    async with server:
+        await server.serve_forever()
@@ -0,0 +1,176 @@
+"""Record and replay of the Supabase traffic as HAR files.
+
+In record mode every scenario context captures its REST, auth, storage and
+functions calls into tmp/har/<TC>.har (Playwright's `record_har_path`). In
+replay mode those responses are served back through `context.route`, so the
+scenario never reaches the backend and its results no longer depend on
+Supabase latency or errors. Realtime websockets are routed without a server
+and simply stay silent.
+
+Requests are matched on method, path, query and body after applying the
+`MatchRule`s, which drop volatile parameters (cache busters, refresh tokens)
+and mask timestamps. Identical requests get the recorded responses in order.
+Extra rules can be listed under `harRules` in tmp/config.json:
+
+    "harRules": [{"url": "/rest/v1/transactions", "ignoreParams": ["created_at"]}]
+"""
+import base64
+import json
+import re
+from collections import defaultdict, deque
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlparse
+
+from .config import TMP_DIR, load_config
+from .runner import Plugin
+
+HAR_DIR = TMP_DIR / "har"
+BACKEND_MODES = ("auto", "live", "record", "replay")
+
+BACKEND_URL = re.compile(r"/(rest|auth|storage|functions)/v1/")
+REALTIME_URL = re.compile(r"/realtime/v1/")
+
+# The body is already decoded in the HAR, so these would no longer be true
+DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+VOLATILE_VALUES = (
+    (re.compile(r"\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:?\d{2})?"), "<timestamp>"),
+)
+
+
+@dataclass(frozen=True)
+class MatchRule:
+    url: str
+    ignore_params: tuple = ()
+    ignore_body: bool = False
+
+    def applies(self, path) -> bool:
+        return re.search(self.url, path) is not None
+
+
+DEFAULT_RULES = (
+    # supabase-js sends the current refresh token, which changes on every login
+    MatchRule(r"/auth/v1/token", ignore_body=True),
+    MatchRule(r"/auth/v1/logout", ignore_body=True),
+    MatchRule(r"/rest/v1/", ignore_params=("_", "t")),
+)
+
+
+def rules_from_config(config=None) -> tuple:
+    config = load_config() if config is None else config
+    extra = tuple(
+        MatchRule(entry["url"], tuple(entry.get("ignoreParams", ())), bool(entry.get("ignoreBody")))
+        for entry in config.get("harRules", [])
+    )
+    return extra + DEFAULT_RULES
+
+
+def _mask(value) -> str:
+    for pattern, replacement in VOLATILE_VALUES:
+        value = pattern.sub(replacement, value)
+    return value
+
+
+def request_key(method, url, body, rules=DEFAULT_RULES) -> tuple:
+    """What two requests must share for a recorded response to answer both."""
+    parsed = urlparse(url)
+    matching = [rule for rule in rules if rule.applies(parsed.path)]
+    ignored = {name for rule in matching for name in rule.ignore_params}
+    query = sorted((name, _mask(value)) for name, value in parse_qsl(parsed.query, keep_blank_values=True)
+                   if name not in ignored)
+    if any(rule.ignore_body for rule in matching):
+        body = ""
+    return method.upper(), parsed.path, urlencode(query), _mask(body or "")
+
+
+def har_path(scenario_id, directory=HAR_DIR) -> Path:
+    return Path(directory) / f"{scenario_id}.har"
+
+
+class HarReplayer:
+    def __init__(self, path, rules=DEFAULT_RULES):
+        self.path = Path(path)
+        self.rules = rules
+        self.responses = defaultdict(deque)
+        self.last = {}
+        self.hits = 0
+        self.missed = []
+        har = json.loads(self.path.read_text(encoding="utf-8"))
+        for entry in har["log"]["entries"]:
+            request = entry["request"]
+            body = (request.get("postData") or {}).get("text", "")
+            key = request_key(request["method"], request["url"], body, self.rules)
+            self.responses[key].append(entry["response"])
+
+    def find(self, method, url, body):
+        key = request_key(method, url, body, self.rules)
+        queue = self.responses.get(key)
+        if queue:
+            # Repeated requests get the recorded responses in order, then the last one again
+            self.last[key] = queue.popleft()
+        return self.last.get(key)
+
+    async def handle(self, route, request):
+        response = self.find(request.method, request.url, request.post_data or "")
+        if response is None:
+            self.missed.append(f"{request.method} {urlparse(request.url).path}")
+            await route.abort()
+            return
+        self.hits += 1
+        content = response.get("content", {})
+        text = content.get("text", "")
+        body = base64.b64decode(text) if content.get("encoding") == "base64" else text.encode("utf-8")
+        headers = {h["name"]: h["value"] for h in response.get("headers", [])
+                   if h["name"].lower() not in DROPPED_HEADERS}
+        await route.fulfill(status=response["status"], headers=headers, body=body)
+
+    def summary(self) -> dict:
+        return {"mode": "replay", "hits": self.hits, "misses": len(self.missed),
+                "missed": sorted(set(self.missed))[:20]}
+
+
+async def silent_realtime(websocket):
+    # Not connecting to the server leaves the socket open with no messages
+    pass
+
+
+class HarPlugin(Plugin):
+    """Records the backend traffic of each scenario, or replays it from tmp/har/."""
+
+    name = "har"
+
+    def __init__(self, mode="auto", directory=HAR_DIR, rules=None):
+        self.mode = mode
+        self.directory = Path(directory)
+        self.rules = rules_from_config() if rules is None else rules
+        self.replayers = {}
+
+    def scenario_mode(self, scenario) -> str:
+        if self.mode == "auto":
+            return "replay" if har_path(scenario.id, self.directory).exists() else "live"
+        return self.mode
+
+    def context_options(self, scenario) -> dict:
+        if self.scenario_mode(scenario) != "record":
+            return {}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        return {
+            "record_har_path": str(har_path(scenario.id, self.directory)),
+            "record_har_url_filter": BACKEND_URL,
+            "record_har_content": "embed",
+        }
+
+    async def on_context(self, context, scenario):
+        if self.scenario_mode(scenario) != "replay":
+            return
+        replayer = self.replayers[scenario.id] = HarReplayer(har_path(scenario.id, self.directory), self.rules)
+        await context.route(BACKEND_URL, replayer.handle)
+        await context.route_web_socket(REALTIME_URL, silent_realtime)
+
+    async def after_scenario(self, context, scenario, result):
+        replayer = self.replayers.pop(scenario.id, None)
+        if replayer is not None:
+            result.extras["backend"] = replayer.summary()
+        else:
+            result.extras["backend"] = {"mode": self.scenario_mode(scenario)}
@@ -0,0 +1,282 @@
+"""Append-only run history in SQLite.
+
+tmp/test_results.json holds one run. Every harness run, and every result file
+passed to `history-import`, is appended to tmp/history.sqlite instead:
+
+    runs      one row per run: time, git commit, source file
+    tests     one row per scenario result, with its status, error and duration
+    steps     interpreted step timings and retried locator actions
+    metrics   numbers worth trending: duration, readiness, waits, blocked bytes,
+              Core Web Vitals per route
+    console   the deduplicated console signatures of `harness.console`
+
+Rows are only ever inserted; importing the same file twice is a no-op. Tests
+are indexed by scenario id and time, runs by commit and time, so a question
+such as the p90 duration of TC018 over the last 30 days is answered from the
+indexes without reading other rows. `iter_tests` and `iter_records` stream
+rows and JSON records one at a time, so neither the database nor a large
+result file is ever loaded whole.
+"""
+import hashlib
+import json
+import math
+import sqlite3
+import time
+from contextlib import closing
+from pathlib import Path
+
+from . import objects
+from .bench import PERCENTILES
+from .config import TMP_DIR
+from .results import parse_timestamp
+
+HISTORY_PATH = TMP_DIR / "history.sqlite"
+CHUNK_SIZE = 64 * 1024
+DAY_S = 24 * 60 * 60
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created REAL NOT NULL,
+    revision TEXT,
+    dirty INTEGER,
+    source TEXT,
+    digest TEXT UNIQUE
+);
+CREATE TABLE IF NOT EXISTS tests (
+    id INTEGER PRIMARY KEY,
+    run INTEGER NOT NULL REFERENCES runs(id),
+    test_id TEXT NOT NULL,
+    test_uuid TEXT,
+    title TEXT,
+    status TEXT,
+    error TEXT,
+    started REAL,
+    duration REAL,
+    code_hash TEXT,
+    harness TEXT
+);
+CREATE TABLE IF NOT EXISTS steps (
+    test INTEGER NOT NULL REFERENCES tests(id),
+    step INTEGER,
+    line INTEGER,
+    action TEXT,
+    ms REAL,
+    attempts INTEGER,
+    passed INTEGER
+);
+CREATE TABLE IF NOT EXISTS metrics (
+    test INTEGER NOT NULL REFERENCES tests(id),
+    name TEXT NOT NULL,
+    scope TEXT NOT NULL DEFAULT '',
+    value REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS console (
+    test INTEGER NOT NULL REFERENCES tests(id),
+    type TEXT,
+    message TEXT,
+    location TEXT,
+    count INTEGER,
+    first REAL,
+    last REAL
+);
+CREATE INDEX IF NOT EXISTS tests_by_test_id ON tests (test_id, started);
+CREATE INDEX IF NOT EXISTS tests_by_started ON tests (started);
+CREATE INDEX IF NOT EXISTS tests_by_run ON tests (run);
+CREATE INDEX IF NOT EXISTS runs_by_revision ON runs (revision);
+CREATE INDEX IF NOT EXISTS runs_by_created ON runs (created);
+CREATE INDEX IF NOT EXISTS steps_by_test ON steps (test);
+CREATE INDEX IF NOT EXISTS metrics_by_test ON metrics (test, name);
+CREATE INDEX IF NOT EXISTS console_by_test ON console (test);
+CREATE INDEX IF NOT EXISTS console_by_message ON console (message);
+"""
+
+VITALS_METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "inp_ms")
+
+
+def connect(path=HISTORY_PATH) -> sqlite3.Connection:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path)
+    db.row_factory = sqlite3.Row
+    db.execute("PRAGMA journal_mode = WAL")
+    db.executescript(SCHEMA)
+    return db
+
+
+def iter_records(path, chunk_size=CHUNK_SIZE):
+    """Yield the records of a JSON result array one at a time, reading `path` in chunks."""
+    decoder = json.JSONDecoder()
+    with open(path, encoding="utf-8") as stream:
+        buffer = stream.read(chunk_size).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path} is not a JSON array of results")
+        buffer = buffer[1:]
+        eof = False
+        while True:
+            buffer = buffer.lstrip().removeprefix(",").lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                record, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                chunk = stream.read(chunk_size)
+                eof = not chunk
+                buffer += chunk
+                continue
+            yield record
+            buffer = buffer[end:]
+
+
+def file_digest(path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as stream:
+        for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _timestamp(value):
+    try:
+        return parse_timestamp(value) if value else None
+    except ValueError:
+        return None
+
+
+def metrics_of(record) -> list:
+    """(name, scope, value) rows for the numbers in a result record."""
+    harness = record.get("harness") or {}
+    rows = []
+    started, finished = _timestamp(record.get("created")), _timestamp(record.get("modified"))
+    if started is not None and finished is not None:
+        rows.append(("duration_s", "", round(finished - started, 3)))
+    probes = harness.get("ready") or []
+    if probes:
+        rows.append(("ready_ms", "", probes[0]["ms"]))
+    for key in ("waited_s", "saved_s"):
+        if key in harness.get("waits", {}):
+            rows.append((f"waits_{key}", "", harness["waits"][key]))
+    if "blocked" in harness:
+        rows.append(("blocked_bytes", "", harness["blocked"]["bytes"]))
+    for segment in harness.get("vitals", {}).get("segments", []):
+        for name in VITALS_METRICS:
+            if segment.get(name) is not None:
+                rows.append((name, segment["route"], segment[name]))
+    return rows
+
+
+def steps_of(record) -> list:
+    """(step, line, action, ms, attempts, passed) rows for a result record."""
+    harness = record.get("harness") or {}
+    rows = [(s["step"], None, s["action"], s["ms"], None, None)
+            for s in harness.get("plan", {}).get("steps", [])]
+    rows.extend((None, r["line"], r["action"], None, r["attempts"], int(r["passed"]))
+                for r in harness.get("steps", {}).get("retried", []))
+    return rows
+
+
+def console_of(record) -> list:
+    entries = (record.get("harness") or {}).get("console", {}).get("entries", [])
+    return [(e["type"], e["message"], e["location"], e["count"], _timestamp(e["first"]), _timestamp(e["last"]))
+            for e in entries]
+
+
+class HistoryWriter:
+    """Appends one run, creating its `runs` row on the first record."""
+
+    def __init__(self, db, revision=None, dirty=None, source=None, digest=None):
+        self.db = db
+        self.run = {"revision": revision, "dirty": dirty, "source": source, "digest": digest}
+        self.run_id = None
+        self.count = 0
+
+    def add(self, record):
+        started = _timestamp(record.get("created"))
+        if self.run_id is None:
+            cursor = self.db.execute(
+                "INSERT INTO runs (created, revision, dirty, source, digest) VALUES (?, ?, ?, ?, ?)",
+                (started or time.time(), self.run["revision"], self.run["dirty"], self.run["source"],
+                 self.run["digest"]))
+            self.run_id = cursor.lastrowid
+        finished = _timestamp(record.get("modified"))
+        duration = finished - started if started is not None and finished is not None else None
+        harness = record.get("harness")
+        cursor = self.db.execute(
+            "INSERT INTO tests (run, test_id, test_uuid, title, status, error, started, duration, code_hash,"
+            " harness) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.run_id, record.get("title", "")[:5], record.get("testId"), record.get("title"),
+             record.get("testStatus"), record.get("testError"), started, duration,
+             record.get("codeHash") or (objects.put(record["code"]) if record.get("code") is not None else None),
+             json.dumps({k: v for k, v in harness.items() if k != "console"}, ensure_ascii=False)
+             if harness else None))
+        test = cursor.lastrowid
+        self.db.executemany("INSERT INTO steps (test, step, line, action, ms, attempts, passed)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)", [(test, *row) for row in steps_of(record)])
+        self.db.executemany("INSERT INTO metrics (test, name, scope, value) VALUES (?, ?, ?, ?)",
+                            [(test, *row) for row in metrics_of(record)])
+        self.db.executemany("INSERT INTO console (test, type, message, location, count, first, last)"
+                            " VALUES (?, ?, ?, ?, ?, ?, ?)", [(test, *row) for row in console_of(record)])
+        self.count += 1
+
+
+def append_run(records, revision=None, path=HISTORY_PATH) -> int:
+    """Append the records of a harness run; returns how many were stored."""
+    with closing(connect(path)) as db, db:
+        writer = HistoryWriter(db, revision.get("commit") if revision else None,
+                               revision.get("dirty") if revision else None, "harness")
+        for record in records:
+            writer.add(record)
+        return writer.count
+
+
+def import_file(source, revision=None, path=HISTORY_PATH):
+    """Append a result file as one run; returns the records stored, or None if it was imported before."""
+    digest = file_digest(source)
+    with closing(connect(path)) as db, db:
+        if db.execute("SELECT 1 FROM runs WHERE digest = ?", (digest,)).fetchone():
+            return None
+        writer = HistoryWriter(db, revision, None, str(source), digest)
+        for record in iter_records(source):
+            writer.add(record)
+        return writer.count
+
+
+def iter_tests(db, test_id=None, since=None, revision=None):
+    """Yield test rows oldest first, straight from the cursor."""
+    clauses, params = [], []
+    if test_id:
+        clauses.append("tests.test_id = ?")
+        params.append(test_id)
+    if since is not None:
+        clauses.append("tests.started >= ?")
+        params.append(since)
+    if revision:
+        clauses.append("runs.revision = ?")
+        params.append(revision)
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    yield from db.execute(
+        "SELECT tests.*, runs.revision FROM tests JOIN runs ON runs.id = tests.run "
+        f"{where} ORDER BY tests.started", params)
+
+
+def code_hashes(db) -> set:
+    return {row[0] for row in db.execute("SELECT DISTINCT code_hash FROM tests WHERE code_hash IS NOT NULL")}
+
+
+def metric_percentiles(db, test_id, metric="duration_s", days=30, scope="",
+                       percentiles=PERCENTILES, now=None) -> dict:
+    """Nearest-rank percentiles of one metric of one scenario over the last `days` days."""
+    since = (now or time.time()) - days * DAY_S
+    query = ("FROM metrics JOIN tests ON tests.id = metrics.test WHERE tests.test_id = ? AND tests.started >= ?"
+             " AND metrics.name = ? AND metrics.scope = ?")
+    params = (test_id, since, metric, scope)
+    count = db.execute(f"SELECT COUNT(*) {query}", params).fetchone()[0]
+    summary = {"n": count}
+    for p in percentiles:
+        rank = max(0, math.ceil(p / 100 * count) - 1)
+        row = db.execute(f"SELECT metrics.value {query} ORDER BY metrics.value LIMIT 1 OFFSET ?",
+                         (*params, rank)).fetchone() if count else None
+        summary[f"p{p}"] = row[0] if row else None
+    return summary
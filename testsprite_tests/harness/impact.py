@@ -0,0 +1,148 @@
+"""Route and module impact map for selective re-runs.
+
+While a scenario runs against the Vite dev server, every application module
+it loads is requested as `/src/...` (e.g. `/src/contexts/AuthContext.tsx`).
+`ImpactPlugin` records those modules and the app routes each scenario visits
+in tmp/impact_map.json. `affected_scenarios()` then maps a set of changed
+files back to the scenarios that loaded them.
+"""
+import fnmatch
+import json
+import subprocess
+from pathlib import Path
+from urllib.parse import urlparse
+
+from .config import REPO_ROOT, TESTS_DIR, TMP_DIR, base_url
+from .runner import Plugin
+
+IMPACT_MAP_PATH = TMP_DIR / "impact_map.json"
+
+# Changes to these files can affect any scenario
+GLOBAL_PATTERNS = [
+    "package.json", "package-lock.json", "bun.lockb", "index.html", "vite.config.ts",
+    "tailwind.config.ts", "postcss.config.js", "tsconfig*.json", "public/*", ".env*",
+    "testsprite_tests/harness/*",
+]
+
+
+def module_path(url, origin) -> str:
+    """Repository path of a module served by Vite, or "" for anything else."""
+    parsed = urlparse(url)
+    if f"{parsed.scheme}://{parsed.netloc}" != origin or not parsed.path.startswith("/src/"):
+        return ""
+    return parsed.path.lstrip("/")
+
+
+def load_map(path=IMPACT_MAP_PATH) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_map(impact_map, path=IMPACT_MAP_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(impact_map, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def changed_files(since="HEAD") -> list:
+    """Files changed relative to `since`, including uncommitted and untracked ones."""
+    def git(*args):
+        output = subprocess.run(["git", *args], cwd=REPO_ROOT, capture_output=True,
+                                text=True, check=True).stdout
+        return [line for line in output.splitlines() if line]
+
+    files = set(git("diff", "--name-only", since))
+    files.update(git("ls-files", "--others", "--exclude-standard"))
+    return sorted(files)
+
+
+def _is_global(path) -> bool:
+    return any(fnmatch.fnmatch(path, pattern) for pattern in GLOBAL_PATTERNS)
+
+
+def affected_scenarios(scenarios, files, impact_map=None) -> list:
+    """Scenarios that may be affected by changes to `files`.
+
+    Scenarios with no recorded footprint are always included, as is every
+    scenario when a global file (dependencies, build config) changed.
+    """
+    impact_map = load_map() if impact_map is None else impact_map
+    files = set(files)
+    if any(_is_global(path) for path in files):
+        return list(scenarios)
+    tests_prefix = TESTS_DIR.relative_to(REPO_ROOT).as_posix() + "/"
+    selected = []
+    for scenario in scenarios:
+        footprint = impact_map.get(scenario.id)
+        script = tests_prefix + scenario.path.name
+        if footprint is None or script in files or files & set(footprint["modules"]):
+            selected.append(scenario)
+    return selected
+
+
+class ImpactPlugin(Plugin):
+    """Records the routes and /src modules each scenario loads."""
+
+    name = "impact"
+
+    def __init__(self, url=None, path=IMPACT_MAP_PATH):
+        parsed = urlparse(url or base_url())
+        self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        self.path = path
+        self.footprints = {}
+
+    async def on_context(self, context, scenario):
+        footprint = self.footprints.setdefault(scenario.id, {"routes": set(), "modules": set()})
+
+        def on_request(request):
+            module = module_path(request.url, self.origin)
+            if module:
+                footprint["modules"].add(module)
+            if request.is_navigation_request():
+                self._add_route(footprint, request.url)
+
+        def on_navigated(frame):
+            # Client-side navigations (react-router) do not issue a request
+            if frame.parent_frame is None:
+                self._add_route(footprint, frame.url)
+
+        def on_page(page):
+            page.on("framenavigated", on_navigated)
+
+        context.on("request", on_request)
+        context.on("page", on_page)
+
+    def _add_route(self, footprint, url):
+        parsed = urlparse(url)
+        if f"{parsed.scheme}://{parsed.netloc}" == self.origin:
+            footprint["routes"].add(parsed.path or "/")
+
+    async def after_scenario(self, context, scenario, result):
+        footprint = self.footprints.pop(scenario.id, None)
+        if footprint is not None:
+            result.extras["impact"] = {key: sorted(values) for key, values in footprint.items()}
+
+
+def update_map(results, path=IMPACT_MAP_PATH):
+    """Fold the footprints of `results` into the impact map.
+
+    Runs in the parent process so worker processes never race on the file.
+    The full module lists are replaced by counts in each result.
+    """
+    impact_map = load_map(path)
+    for result in results:
+        footprint = result.extras.get("impact")
+        if footprint is None:
+            continue
+        result.extras["impact"] = {key: len(values) for key, values in footprint.items()}
+        if not footprint["modules"]:
+            # Nothing served from /src (early failure or a production build): keep it unmapped
+            continue
+        # Union with earlier runs: a flow can touch different modules depending on data
+        previous = impact_map.get(result.scenario_id, {"routes": [], "modules": []})
+        impact_map[result.scenario_id] = {
+            key: sorted(set(footprint[key]) | set(previous[key])) for key in ("routes", "modules")
+        }
+    save_map(impact_map, path)
@@ -0,0 +1,115 @@
+"""Single round-trip page inspection for the debug tools.
+
+Looping over `page.locator('a').all()` with `get_attribute`, `inner_text` and
+an `evaluate(getXPath)` per element costs several CDP round trips each, which
+adds up to tens of seconds on the family dashboard pages. `inspect` collects
+links, buttons, inputs and dialogs with their XPaths (in the `xpath=html/...`
+form the generated scripts use), CSS paths, roles and bounding boxes in one
+`page.evaluate` call; `write_jsonl` streams them as JSON lines.
+"""
+import json
+import sys
+
+from playwright import async_api
+
+from . import browser_server
+from .config import DEFAULT_LAUNCH_ARGS
+
+KINDS = ("links", "buttons", "inputs", "dialogs")
+
+INSPECT_JS = """kinds => {
+    const selectors = {
+        links: "a",
+        buttons: "button, [role=button], input[type=submit], input[type=button]",
+        inputs: "input:not([type=submit]):not([type=button]), textarea, select",
+        dialogs: "dialog, [role=dialog], [role=alertdialog]",
+    };
+    const xpath = el => {
+        const parts = [];
+        for (let node = el; node && node.nodeType === 1; node = node.parentElement) {
+            const tag = node.tagName.toLowerCase();
+            const same = node.parentElement
+                ? [...node.parentElement.children].filter(c => c.tagName === node.tagName) : [node];
+            const index = same.indexOf(node) + 1;
+            parts.unshift(index > 1 ? `${tag}[${index}]` : tag);
+        }
+        return "xpath=" + parts.join("/");
+    };
+    const cssPath = el => {
+        const parts = [];
+        for (let node = el; node && node.nodeType === 1 && node !== document.documentElement;
+             node = node.parentElement) {
+            if (node.id) {
+                parts.unshift(`#${CSS.escape(node.id)}`);
+                break;
+            }
+            const tag = node.tagName.toLowerCase();
+            const index = [...node.parentElement.children].indexOf(node) + 1;
+            parts.unshift(`${tag}:nth-child(${index})`);
+        }
+        return parts.join(" > ");
+    };
+    const attributes = el => {
+        const found = {};
+        for (const name of ["id", "name", "type", "placeholder", "aria-label", "data-testid", "href"]) {
+            const value = el.getAttribute(name);
+            if (value) found[name] = value;
+        }
+        return found;
+    };
+    const records = [];
+    for (const kind of kinds) {
+        document.querySelectorAll(selectors[kind]).forEach((el, index) => {
+            const box = el.getBoundingClientRect();
+            const style = getComputedStyle(el);
+            records.push({
+                kind,
+                index,
+                tag: el.tagName.toLowerCase(),
+                role: el.getAttribute("role") || "",
+                text: (el.innerText || el.value || "").trim().replace(/\\s+/g, " ").slice(0, 200),
+                xpath: xpath(el),
+                css: cssPath(el),
+                box: {x: Math.round(box.x), y: Math.round(box.y),
+                      width: Math.round(box.width), height: Math.round(box.height)},
+                visible: box.width > 0 && box.height > 0 && style.visibility !== "hidden"
+                    && style.display !== "none",
+                disabled: !!el.disabled,
+                attributes: attributes(el),
+            });
+        });
+    }
+    return records;
+}"""
+
+
+async def inspect(page, kinds=KINDS) -> list:
+    """Links, buttons, inputs and dialogs of `page`, gathered in one evaluate call."""
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"unknown element kinds: {', '.join(sorted(unknown))}")
+    return await page.evaluate(INSPECT_JS, list(kinds))
+
+
+def write_jsonl(records, stream=None):
+    stream = sys.stdout if stream is None else stream
+    for record in records:
+        stream.write(json.dumps(record, ensure_ascii=False) + "\n")
+    stream.flush()
+
+
+async def inspect_url(url, kinds=KINDS, stream=None, storage_state=None, headless=True) -> int:
+    """Open `url` (on the browser server when it runs) and stream its elements."""
+    async with async_api.async_playwright() as playwright:
+        browser = await browser_server.connect_or_launch(playwright, headless=headless,
+                                                         args=DEFAULT_LAUNCH_ARGS)
+        try:
+            context = await browser.new_context(storage_state=storage_state)
+            page = await context.new_page()
+            await page.goto(url, wait_until="networkidle")
+            records = await inspect(page, kinds)
+            write_jsonl(records, stream)
+            await context.close()
+        finally:
+            await browser.close()
+    return len(records)
@@ -0,0 +1,347 @@
+"""Declarative form of the TC scripts and the interpreter that runs it.
+
+Past the ~45 lines of launch and teardown code they all share, the generated
+scripts are a linear list of steps: a comment, a locator and an action.
+`extract` reduces a script to a plan of such steps:
+
+    {"id": "TC002", "title": "...", "url": "http://localhost:8081",
+     "steps": [{"action": "click", "selector": "xpath=html/body/div/...",
+                "comment": "Click on 'Entrar' link", "timeout_ms": 5000}, ...]}
+
+and `render` expands a plan into one `run_test` built from a single template.
+Interpreted scenarios therefore go through the same runner and plugins as the
+scripts (event waits, session cache, retries, checkpoints), and every step
+reports its own duration. Plans can be saved with `python -m harness extract`,
+edited, and are then preferred over the script they came from.
+"""
+import ast
+import json
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import TMP_DIR
+from .runner import Plugin
+from .scenarios import Scenario, run_test_try, step_comment
+from .waiting import ACTIONS
+
+PLANS_DIR = TMP_DIR / "plans"
+TIMER_NAME = "__harness_step_timer__"
+
+# What the generated scripts use when a step does not say otherwise
+DEFAULT_DELAY_MS = 3000
+DEFAULT_TIMEOUT_MS = 5000
+NAVIGATION_TIMEOUT_MS = 10000
+
+# Locator actions whose first argument is a value to type or select
+VALUE_ACTIONS = {"fill", "type", "press", "select_option", "set_input_files"}
+CHECKS = {"is_visible": "assert_visible", "is_enabled": "assert_enabled"}
+
+
+class UnsupportedStep(ValueError):
+    """A statement the declarative form cannot express; the script runs as is."""
+
+    def __init__(self, scenario_id, line, statement):
+        super().__init__(f"{scenario_id}:{line} unsupported statement: {statement}")
+        self.line = line
+
+
+def _constant(node, default=None):
+    return node.value if isinstance(node, ast.Constant) else default
+
+
+def _keyword(call, name):
+    for keyword in call.keywords:
+        if keyword.arg == name and isinstance(keyword.value, ast.Constant):
+            return keyword.value.value
+    return None
+
+
+def _awaited_call(stmt):
+    if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await) \
+            and isinstance(stmt.value.value, ast.Call):
+        return stmt.value.value
+    return None
+
+
+def _locator(node):
+    """(selector, nth) of `frame.locator('...')` or `frame.locator('...').nth(N)`."""
+    nth = None
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) and node.func.attr == "nth":
+        nth = _constant(node.args[0]) if node.args else None
+        node = node.func.value
+    if isinstance(node, ast.Call) and isinstance(node.func, ast.Attribute) \
+            and node.func.attr == "locator" and isinstance(node.func.value, ast.Name) \
+            and node.func.value.id in ("frame", "page") and len(node.args) == 1 \
+            and isinstance(node.args[0], ast.Constant):
+        return node.args[0].value, nth
+    return None
+
+
+def _step(action, selector=None, nth=None, **values) -> dict:
+    step = {"action": action}
+    if selector is not None:
+        step["selector"] = selector
+    if nth not in (None, 0):
+        step["nth"] = nth
+    step.update((key, value) for key, value in values.items() if value is not None)
+    return step
+
+
+def _extract_steps(scenario_id, statements, source_lines) -> list:
+    """Declarative steps for the statements following the page setup."""
+    locators = {}
+    delay = 0
+    comment = ""
+    found = []
+    for stmt in statements:
+        comment = step_comment(source_lines, [stmt]) or comment
+        before = len(found)
+        call = _awaited_call(stmt)
+        target = stmt.targets[0] if isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 else None
+        if isinstance(target, ast.Name) and target.id == "frame":
+            continue
+        if isinstance(target, ast.Name) and _locator(stmt.value) is not None:
+            locators[target.id] = _locator(stmt.value)
+        elif call is not None and isinstance(call.func, ast.Attribute) \
+                and call.func.attr == "wait_for_timeout" and call.args:
+            delay = _constant(call.args[0], DEFAULT_DELAY_MS)
+        elif call is not None and isinstance(call.func, ast.Attribute) \
+                and call.func.attr in ACTIONS and isinstance(call.func.value, ast.Name) \
+                and call.func.value.id in locators and len(call.args) <= 1 \
+                and all(isinstance(arg, ast.Constant) for arg in call.args):
+            value = _constant(call.args[0]) if call.args else None
+            if call.func.attr not in VALUE_ACTIONS and value is not None:
+                raise UnsupportedStep(scenario_id, stmt.lineno, ast.unparse(stmt))
+            selector, nth = locators[call.func.value.id]
+            found.append(_step(call.func.attr, selector, nth, value=value,
+                               timeout_ms=_keyword(call, "timeout"),
+                               delay_ms=None if delay == DEFAULT_DELAY_MS else delay))
+            delay = 0
+        elif call is not None and ast.unparse(call.func) == "page.goto" and call.args \
+                and isinstance(call.args[0], ast.Constant):
+            found.append(_step("goto", url=call.args[0].value, timeout_ms=_keyword(call, "timeout")))
+        elif call is not None and ast.unparse(call.func) == "page.mouse.wheel" and len(call.args) == 2 \
+                and all(isinstance(arg, ast.Constant) for arg in call.args):
+            found.append(_step("scroll", dx=call.args[0].value, dy=call.args[1].value))
+        elif call is not None and ast.unparse(call.func) == "asyncio.sleep" \
+                and call.args and isinstance(call.args[0], ast.Constant):
+            found.append(_step("sleep", seconds=call.args[0].value))
+        elif isinstance(stmt, ast.Assert) and isinstance(stmt.test, ast.Constant) and not stmt.test.value:
+            found.append(_step("fail", message=_constant(stmt.msg, "")))
+        elif isinstance(stmt, ast.Assert) and isinstance(stmt.test, ast.Await) \
+                and isinstance(stmt.test.value, ast.Call) \
+                and isinstance(stmt.test.value.func, ast.Attribute) \
+                and stmt.test.value.func.attr in CHECKS \
+                and isinstance(stmt.test.value.func.value, ast.Name) \
+                and stmt.test.value.func.value.id in locators:
+            selector, nth = locators[stmt.test.value.func.value.id]
+            found.append(_step(CHECKS[stmt.test.value.func.attr], selector, nth,
+                               message=_constant(stmt.msg, "")))
+        else:
+            raise UnsupportedStep(scenario_id, stmt.lineno, ast.unparse(stmt))
+        if len(found) > before and comment:
+            # The comment sits above `frame = ...`; it belongs to the step's action
+            found[-1] = {**found[-1], "comment": comment}
+            comment = ""
+    return found
+
+
+def extract(scenario) -> dict:
+    """The declarative plan of a TC script; raises UnsupportedStep when it has none."""
+    source = scenario.source
+    tree = ast.parse(source, filename=scenario.filename)
+    block = run_test_try(tree)
+    setup = next((i for i, stmt in enumerate(block.body) if isinstance(stmt, ast.For)), None) \
+        if block is not None else None
+    if setup is None:
+        raise UnsupportedStep(scenario.id, 1, "no run_test() page setup")
+    url = timeout = None
+    for stmt in block.body[:setup]:
+        call = _awaited_call(stmt) or (stmt.value if isinstance(stmt, ast.Expr) else None)
+        if isinstance(call, ast.Call) and ast.unparse(call.func) == "page.goto" and call.args:
+            url = _constant(call.args[0])
+        elif isinstance(call, ast.Call) and ast.unparse(call.func) == "context.set_default_timeout":
+            timeout = _constant(call.args[0])
+    if url is None:
+        raise UnsupportedStep(scenario.id, block.lineno, "no initial page.goto()")
+    return {
+        "id": scenario.id,
+        "title": scenario.title,
+        "description": scenario.description,
+        "url": url,
+        "timeout_ms": timeout or DEFAULT_TIMEOUT_MS,
+        "steps": _extract_steps(scenario.id, block.body[setup + 1:], source.splitlines()),
+    }
+
+
+_TEMPLATE = '''import asyncio
+from playwright import async_api
+
+async def run_test():
+    pw = None
+    browser = None
+    context = None
+
+    try:
+        pw = await async_api.async_playwright().start()
+        browser = await pw.chromium.launch(headless=True)
+        context = await browser.new_context()
+        context.set_default_timeout({timeout})
+        page = await context.new_page()
+        await page.goto({url!r}, wait_until="commit", timeout={navigation})
+        try:
+            await page.wait_for_load_state("domcontentloaded", timeout=3000)
+        except async_api.Error:
+            pass
+        for frame in page.frames:
+            try:
+                await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+            except async_api.Error:
+                pass
+{steps}
+    finally:
+        if context:
+            await context.close()
+        if browser:
+            await browser.close()
+        if pw:
+            await pw.stop()
+'''
+
+
+def _locator_source(step) -> str:
+    return f"frame.locator({step['selector']!r}).nth({step.get('nth', 0)})"
+
+
+def _render_action(step) -> list:
+    action = step["action"]
+    timeout = step.get("timeout_ms")
+    if action in ACTIONS:
+        arguments = [repr(step["value"])] if "value" in step else []
+        if timeout is not None:
+            arguments.append(f"timeout={timeout}")
+        lines = [f"elem = {_locator_source(step)}"]
+        delay = step.get("delay_ms", DEFAULT_DELAY_MS)
+        call = f"await elem.{action}({', '.join(arguments)})"
+        # Same one-line shape as the scripts, which the event-wait rewrite relies on
+        lines.append(f"await page.wait_for_timeout({delay}); {call}" if delay else call)
+        return lines
+    if action == "goto":
+        return [f"await page.goto({step['url']!r}, timeout={timeout or NAVIGATION_TIMEOUT_MS})"]
+    if action == "scroll":
+        return [f"await page.mouse.wheel({step.get('dx', 0)}, {step.get('dy', 0)})"]
+    if action == "sleep":
+        return [f"await asyncio.sleep({step['seconds']})"]
+    if action == "fail":
+        return [f"assert False, {step.get('message', '')!r}"]
+    if action in CHECKS.values():
+        method = next(name for name, check in CHECKS.items() if check == action)
+        return [f"target = {_locator_source(step)}",
+                f"assert await target.{method}(), {step.get('message', '')!r}"]
+    raise ValueError(f"unknown step action {action!r}")
+
+
+def render(plan) -> str:
+    """Python source of a plan, in the shape of a generated TC script."""
+    lines = []
+    for index, step in enumerate(plan["steps"], start=1):
+        if step.get("comment"):
+            lines.append(f"# {step['comment']}")
+        lines.append("frame = context.pages[-1]")
+        lines.append(f"{TIMER_NAME}.start({index}, {step['action']!r})")
+        lines.extend(_render_action(step))
+        lines.append("")
+    steps = "\n".join(f"        {line}" if line else "" for line in lines)
+    return _TEMPLATE.format(timeout=plan.get("timeout_ms", DEFAULT_TIMEOUT_MS), url=plan["url"],
+                            navigation=NAVIGATION_TIMEOUT_MS, steps=steps)
+
+
+@dataclass
+class PlanScenario(Scenario):
+    """A scenario run from its declarative plan rather than from its script."""
+
+    plan: dict = field(default_factory=dict)
+    origin: str = "extracted"
+
+    @property
+    def source(self) -> str:
+        return render(self.plan)
+
+    @property
+    def filename(self) -> str:
+        return f"<plan {self.id}>"
+
+
+def plan_path(scenario_id, directory=PLANS_DIR) -> Path:
+    return Path(directory) / f"{scenario_id}.json"
+
+
+def save_plan(plan, directory=PLANS_DIR) -> Path:
+    path = plan_path(plan["id"], directory)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(plan, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+    return path
+
+
+def load_plan_file(scenario_id, directory=PLANS_DIR):
+    try:
+        return json.loads(plan_path(scenario_id, directory).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+
+
+def interpret(scenarios, directory=PLANS_DIR) -> list:
+    """Swap each scenario for its saved or extracted plan; scripts without one stay as they are."""
+    interpreted = []
+    for scenario in scenarios:
+        plan, origin = load_plan_file(scenario.id, directory), "file"
+        if plan is None:
+            try:
+                plan, origin = extract(scenario), "extracted"
+            except UnsupportedStep:
+                interpreted.append(scenario)
+                continue
+        interpreted.append(PlanScenario(
+            id=scenario.id, title=scenario.title, path=scenario.path,
+            description=scenario.description, category=scenario.category,
+            tags=set(scenario.tags), plan=plan, origin=origin,
+        ))
+    return interpreted
+
+
+class StepTimer:
+    def __init__(self):
+        self.timings = []
+        self._current = None
+
+    def start(self, index, action):
+        self.stop()
+        self._current = (index, action, time.monotonic())
+
+    def stop(self):
+        if self._current is not None:
+            index, action, started = self._current
+            elapsed = (time.monotonic() - started) * 1000
+            self.timings.append({"step": index, "action": action, "ms": round(elapsed, 1)})
+            self._current = None
+
+
+class InterpreterPlugin(Plugin):
+    """Times every step of the interpreted scenarios."""
+
+    name = "interpreter"
+
+    def __init__(self):
+        self.timers = {}
+
+    def scenario_globals(self, scenario) -> dict:
+        timer = self.timers[scenario.id] = StepTimer()
+        return {TIMER_NAME: timer}
+
+    async def after_scenario(self, context, scenario, result):
+        timer = self.timers.pop(scenario.id, None)
+        if timer is None or not isinstance(scenario, PlanScenario):
+            return
+        timer.stop()
+        result.extras["plan"] = {"origin": scenario.origin, "steps": timer.timings}
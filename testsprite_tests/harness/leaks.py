@@ -0,0 +1,121 @@
+"""Memory-leak detection across repeated client-side navigation.
+
+Family users keep the app open all day, and the results show components
+unmounting while their async work is still running ("Component unmounted
+during getSession"). `leaks` signs in, then cycles through a loop of routes
+`passes` times with React Router navigation (no reload, so nothing is freed by
+a new document). After each route it waits for Supabase to go quiet, forces a
+garbage collection over CDP and samples `Performance.getMetrics`:
+
+    heap_bytes  JSHeapUsedSize
+    nodes       DOM nodes
+    listeners   JS event listeners
+
+The first pass loads the lazy chunks and warms the caches, so it is left out.
+A route is flagged when a metric grew on every later pass and by more than
+its threshold in total. The report goes to tmp/leaks.json.
+"""
+import json
+import time
+from pathlib import Path
+
+from playwright import async_api
+
+from . import browser_server
+from .bench import git_revision
+from .config import DEFAULT_LAUNCH_ARGS, TMP_DIR, base_url
+from .readiness import BackendTracker, Readiness
+from .session import SessionCache, credentials_from_config
+
+LEAKS_PATH = TMP_DIR / "leaks.json"
+DEFAULT_PASSES = 6
+SETTLE_TIMEOUT_MS = 15000
+
+ROUTES = ("/app", "/app/reports", "/personal/transactions", "/family/dashboard", "/app/performance")
+
+# CDP metric name, report name, growth over the measured passes that counts as a leak
+METRICS = (
+    ("JSHeapUsedSize", "heap_bytes", 1024 * 1024),
+    ("Nodes", "nodes", 500),
+    ("JSEventListeners", "listeners", 50),
+)
+
+# React Router listens to popstate, so this navigates without reloading the document
+NAVIGATE_JS = """path => {
+    history.pushState({}, "", path);
+    dispatchEvent(new PopStateEvent("popstate", {state: {}}));
+}"""
+
+
+class MemorySampler:
+    def __init__(self, page):
+        self.page = page
+        self.session = None
+
+    async def start(self):
+        self.session = await self.page.context.new_cdp_session(self.page)
+        await self.session.send("Performance.enable")
+
+    async def sample(self) -> dict:
+        await self.session.send("HeapProfiler.collectGarbage")
+        metrics = await self.session.send("Performance.getMetrics")
+        values = {metric["name"]: metric["value"] for metric in metrics["metrics"]}
+        return {name: int(values.get(cdp_name, 0)) for cdp_name, name, _ in METRICS}
+
+
+def analyze(samples, passes) -> dict:
+    """Per-route growth after the warmup pass, flagging steady growth over its threshold."""
+    routes = {}
+    for route, series in samples.items():
+        measured = series[1:passes]
+        entry = routes[route] = {"samples": series, "growth": {}, "leaking": []}
+        for _, name, threshold in METRICS:
+            values = [sample[name] for sample in measured]
+            if len(values) < 2:
+                continue
+            growth = values[-1] - values[0]
+            entry["growth"][name] = growth
+            if growth > threshold and all(b > a for a, b in zip(values, values[1:])):
+                entry["leaking"].append(name)
+    return routes
+
+
+async def detect(routes=ROUTES, passes=DEFAULT_PASSES, url=None, headless=True) -> dict:
+    url = (url or base_url()).rstrip("/")
+    credentials = credentials_from_config()
+    if not credentials:
+        raise ValueError("leak detection needs a login in tmp/config.json (loginUser/loginPassword)")
+    samples = {route: [] for route in routes}
+    async with async_api.async_playwright() as playwright:
+        browser = await browser_server.connect_or_launch(playwright, headless=headless, args=DEFAULT_LAUNCH_ARGS)
+        try:
+            state = await SessionCache(url).storage_state(browser, credentials[0])
+            context = await browser.new_context(storage_state=state)
+            tracker = BackendTracker()
+            tracker.attach(context)
+            page = await context.new_page()
+            await Readiness(tracker, SETTLE_TIMEOUT_MS)(page, url + routes[0])
+            sampler = MemorySampler(page)
+            await sampler.start()
+            for index in range(passes):
+                for route in routes:
+                    started = time.monotonic()
+                    await page.evaluate(NAVIGATE_JS, route)
+                    await tracker.quiet(SETTLE_TIMEOUT_MS)
+                    sample = await sampler.sample()
+                    sample["settle_ms"] = round((time.monotonic() - started) * 1000, 1)
+                    samples[route].append(sample)
+                print(f"pass {index + 1}/{passes}: heap "
+                      f"{samples[routes[-1]][-1]['heap_bytes'] / 1024 / 1024:.1f} MB")
+            await context.close()
+        finally:
+            await browser.close()
+    return {**git_revision(), "created": time.time(), "base_url": url, "passes": passes,
+            "routes": analyze(samples, passes)}
+
+
+def write_report(report, path=LEAKS_PATH) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(report, indent=1), encoding="utf-8")
+    return path
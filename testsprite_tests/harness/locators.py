@@ -0,0 +1,341 @@
+"""Self-healing cache for the absolute XPaths of the generated scripts.
+
+Almost every step locates its element with an absolute XPath such as
+`xpath=html/body/div/div/div[2]/div[4]/.../button`, which breaks on any layout
+change and then burns the whole action timeout. `LocatorRewriter` routes those
+`frame.locator(...)` calls through a `HealingLocator`. After the first
+successful action on an element in a run, its fingerprint (role, text, test id
+and a few attributes) is stored in tmp/locators.json under the scenario's id,
+since the same absolute XPath can point at different elements on different
+pages. When the XPath later
+misses, or matches an element that no longer fits the fingerprint, the element
+is found through the fingerprint as soon as it is attached, and the healed
+selector is written back so the next run tries it first.
+"""
+import ast
+import json
+import time
+from pathlib import Path
+
+from playwright import async_api
+
+from .config import TMP_DIR
+from .runner import Plugin
+from .waiting import ACTIONS
+
+LOCATORS_PATH = TMP_DIR / "locators.json"
+LOCATOR_NAME = "__harness_locator__"
+DEFAULT_RESOLVE_TIMEOUT_MS = 5000
+FINGERPRINT_TIMEOUT_MS = 1000
+
+XPATH = "xpath"
+MISS = "miss"
+
+FINGERPRINT_JS = """el => {
+    const attr = name => el.getAttribute(name) || "";
+    const attributes = {};
+    for (const name of ["id", "name", "type", "placeholder", "aria-label", "href", "title"]) {
+        if (attr(name)) attributes[name] = attr(name);
+    }
+    return {
+        tag: el.tagName.toLowerCase(),
+        role: attr("role"),
+        text: (el.innerText || "").trim().replace(/\\s+/g, " ").slice(0, 80),
+        testid: attr("data-testid") || attr("data-test-id"),
+        attributes,
+    };
+}"""
+
+# Roles Playwright infers from the tag when no explicit role is set
+IMPLICIT_ROLES = {"button": "button", "a": "link", "select": "combobox", "textarea": "textbox",
+                  "h1": "heading", "h2": "heading", "h3": "heading", "h4": "heading"}
+INPUT_ROLES = {"checkbox": "checkbox", "radio": "radio", "submit": "button", "button": "button",
+               "email": "textbox", "text": "textbox", "password": "", "search": "searchbox",
+               "number": "spinbutton"}
+
+
+def is_absolute_xpath(selector) -> bool:
+    return isinstance(selector, str) and (selector.startswith("xpath=html/")
+                                          or selector.startswith("xpath=/html/"))
+
+
+def load_cache(path=LOCATORS_PATH) -> dict:
+    """Cached entries by scenario id, then by XPath."""
+    try:
+        cache = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+    # Entries keyed by the XPath alone predate the per-scenario layout
+    return {key: entries for key, entries in cache.items() if not is_absolute_xpath(key)}
+
+
+def save_cache(cache, path=LOCATORS_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(cache, indent=1, sort_keys=True), encoding="utf-8")
+
+
+def _quoted(value) -> str:
+    return json.dumps(value, ensure_ascii=False)
+
+
+def implicit_role(fingerprint) -> str:
+    if fingerprint.get("role"):
+        return fingerprint["role"]
+    tag = fingerprint.get("tag", "")
+    if tag == "input":
+        return INPUT_ROLES.get(fingerprint.get("attributes", {}).get("type", "text"), "")
+    if tag == "a" and "href" not in fingerprint.get("attributes", {}):
+        return ""
+    return IMPLICIT_ROLES.get(tag, "")
+
+
+def same_element(fingerprint, cached) -> bool:
+    """Whether `fingerprint` plausibly describes the element `cached` was taken from."""
+    if fingerprint.get("tag") != cached.get("tag"):
+        return False
+    if cached.get("testid") and fingerprint.get("testid") != cached["testid"]:
+        return False
+    cached_id = cached.get("attributes", {}).get("id")
+    if cached_id and fingerprint.get("attributes", {}).get("id") != cached_id:
+        return False
+    if not cached.get("text") and not cached.get("attributes"):
+        return True
+    # Either may legitimately change (a live amount, a toggled aria-label), not both
+    return (bool(cached.get("text")) and fingerprint.get("text") == cached["text"]) \
+        or (bool(cached.get("attributes")) and fingerprint.get("attributes") == cached["attributes"])
+
+
+async def fingerprint_of(locator):
+    try:
+        return await locator.evaluate(FINGERPRINT_JS, timeout=FINGERPRINT_TIMEOUT_MS)
+    except async_api.Error:
+        return None
+
+
+def candidates(entry) -> list:
+    """(strategy, selector) pairs to try when the XPath misses, most specific first."""
+    found = []
+    if entry.get("healed"):
+        found.append(("cache", entry["healed"]["selector"]))
+    fingerprint = entry.get("fingerprint") or {}
+    tag = fingerprint.get("tag") or "*"
+    attributes = fingerprint.get("attributes", {})
+    text = fingerprint.get("text", "")
+    if fingerprint.get("testid"):
+        found.append(("testid", f"[data-testid={_quoted(fingerprint['testid'])}]"))
+    if attributes.get("id"):
+        found.append(("id", f"[id={_quoted(attributes['id'])}]"))
+    role = implicit_role(fingerprint)
+    if role and text:
+        found.append(("role", f"role={role}[name={_quoted(text)}]"))
+    for name in ("name", "placeholder", "aria-label", "href", "title"):
+        if attributes.get(name):
+            found.append(("attributes", f"{tag}[{name}={_quoted(attributes[name])}]"))
+    if text:
+        found.append(("text", f"{tag}:text-is({_quoted(text)})"))
+    # A candidate already tried through the cache is not tried twice
+    seen = set()
+    return [(strategy, selector) for strategy, selector in found
+            if not (selector in seen or seen.add(selector))]
+
+
+class LocatorResolver:
+    """Resolves XPaths against the page, falling back to the cached fingerprints."""
+
+    def __init__(self, cache, timeout_ms=DEFAULT_RESOLVE_TIMEOUT_MS):
+        self.cache = cache
+        self.timeout_ms = timeout_ms
+        self.learned = {}
+        self.healed = {}
+        self.resolutions = []
+
+    def _record(self, selector, strategy, started):
+        elapsed = (time.monotonic() - started) * 1000
+        self.resolutions.append((selector, strategy, elapsed))
+
+    async def resolve(self, frame, selector, index=None, timeout=None):
+        """The locator to act on and the strategy that found it."""
+        started = time.monotonic()
+        primary = frame.locator(selector)
+        primary = primary.nth(index) if index is not None else primary
+        entry = self.cache.get(selector, {})
+        options = candidates(entry)
+        if not options:
+            self._record(selector, XPATH, started)
+            return primary, XPATH
+        fallbacks = frame.locator(options[0][1])
+        for _, fallback in options[1:]:
+            fallbacks = fallbacks.or_(frame.locator(fallback))
+        budget_ms = timeout or self.timeout_ms
+        try:
+            # Returns as soon as either the XPath or any fallback is attached
+            await primary.or_(fallbacks).first.wait_for(state="attached", timeout=budget_ms)
+        except async_api.Error:
+            self._record(selector, MISS, started)
+            return primary, MISS
+        attached = await primary.count() > 0
+        if attached:
+            # After a layout shift the XPath can point at a different element
+            cached = entry.get("fingerprint")
+            current = await fingerprint_of(primary.first) if cached else None
+            if cached is None or current is None or same_element(current, cached):
+                self._record(selector, XPATH, started)
+                return primary, XPATH
+        # Checked once, without waiting: something is already attached
+        for strategy, fallback in options:
+            located = frame.locator(fallback)
+            if await located.count() == 1:
+                if strategy != "cache":
+                    self.healed[selector] = {"strategy": strategy, "selector": fallback}
+                self._record(selector, strategy, started)
+                return located, strategy
+        # An attached XPath whose element changed its own text (an amount, a date) is still used,
+        # and its fingerprint is learned again once the action passes
+        strategy = XPATH if attached else MISS
+        self._record(selector, strategy, started)
+        return primary, strategy
+
+    async def learn(self, selector, locator):
+        """Fingerprint the element an XPath matched, once per run."""
+        if selector in self.learned:
+            return
+        fingerprint = await fingerprint_of(locator)
+        if fingerprint is not None:
+            self.learned[selector] = fingerprint
+
+    def summary(self) -> dict:
+        strategies = {}
+        for _, strategy, elapsed in self.resolutions:
+            entry = strategies.setdefault(strategy, {"count": 0, "ms": 0.0})
+            entry["count"] += 1
+            entry["ms"] = round(entry["ms"] + elapsed, 1)
+        return {
+            "strategies": strategies,
+            "healed": [{"xpath": selector, **healed} for selector, healed in self.healed.items()],
+            "learned": self.learned,
+        }
+
+
+class HealingLocator:
+    """Stands in for `frame.locator(xpath)`; resolves the element when it is used."""
+
+    def __init__(self, resolver, frame, selector, index=None):
+        self._resolver = resolver
+        self._frame = frame
+        self._selector = selector
+        self._index = index
+        self._resolved = None
+        self._strategy = None
+
+    def nth(self, index):
+        return HealingLocator(self._resolver, self._frame, self._selector, index)
+
+    @property
+    def first(self):
+        return self.nth(0)
+
+    async def _resolve(self, timeout=None):
+        if self._resolved is None:
+            self._resolved, self._strategy = await self._resolver.resolve(self._frame, self._selector,
+                                                                          self._index, timeout)
+        return self._resolved
+
+    async def wait_for(self, **options):
+        locator = await self._resolve(options.get("timeout"))
+        return await locator.wait_for(**options)
+
+    def __getattr__(self, name):
+        if name not in ACTIONS:
+            locator = self._frame.locator(self._selector)
+            return getattr(locator.nth(self._index) if self._index is not None else locator, name)
+
+        async def action(*args, **kwargs):
+            locator = await self._resolve(kwargs.get("timeout"))
+            try:
+                outcome = await getattr(locator, name)(*args, **kwargs)
+            except async_api.Error:
+                # A retry resolves the element again
+                self._resolved = None
+                raise
+            # Only an element the XPath itself found, and only once the step passed
+            if self._strategy in (XPATH, MISS):
+                await self._resolver.learn(self._selector, locator)
+            return outcome
+
+        return action
+
+
+class LocatorRewriter(ast.NodeTransformer):
+    """Turns `frame.locator('xpath=html/...')` into `__harness_locator__(frame, 'xpath=html/...')`."""
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        func = node.func
+        if isinstance(func, ast.Attribute) and func.attr == "locator" and len(node.args) == 1 \
+                and not node.keywords and isinstance(node.args[0], ast.Constant) \
+                and is_absolute_xpath(node.args[0].value):
+            call = ast.Call(func=ast.Name(LOCATOR_NAME, ast.Load()),
+                            args=[func.value, node.args[0]], keywords=[])
+            return ast.copy_location(call, node)
+        return node
+
+
+class LocatorCachePlugin(Plugin):
+    """Heals broken absolute XPaths from the fingerprints in tmp/locators.json."""
+
+    name = "locators"
+
+    def __init__(self, path=LOCATORS_PATH, timeout_ms=DEFAULT_RESOLVE_TIMEOUT_MS):
+        self.path = path
+        self.timeout_ms = timeout_ms
+        self.cache = {}
+        self.resolvers = {}
+
+    async def setup(self, runner):
+        self.cache = load_cache(self.path)
+
+    def transformers(self, scenario) -> list:
+        return [LocatorRewriter()]
+
+    def scenario_globals(self, scenario) -> dict:
+        resolver = self.resolvers[scenario.id] = LocatorResolver(self.cache.get(scenario.id, {}), self.timeout_ms)
+
+        def locator(frame, selector):
+            return HealingLocator(resolver, frame, selector)
+
+        return {LOCATOR_NAME: locator}
+
+    async def after_scenario(self, context, scenario, result):
+        resolver = self.resolvers.pop(scenario.id, None)
+        if resolver is not None and resolver.resolutions:
+            result.extras["locators"] = resolver.summary()
+
+
+def update_cache(results, path=LOCATORS_PATH):
+    """Fold learned fingerprints and healed selectors into the cache.
+
+    Runs in the parent process, like impact.update_map; the fingerprints are
+    dropped from each result afterwards.
+    """
+    cache = load_cache(path)
+    changed = False
+    for result in results:
+        report = result.extras.get("locators")
+        if report is None:
+            continue
+        entries = cache.setdefault(result.scenario_id, {})
+        for selector, fingerprint in report.pop("learned", {}).items():
+            entry = entries.setdefault(selector, {})
+            if entry.get("fingerprint") != fingerprint:
+                entry["fingerprint"] = fingerprint
+                entry.pop("healed", None)
+                changed = True
+        for healed in report["healed"]:
+            entry = entries.setdefault(healed["xpath"], {})
+            entry["healed"] = {"strategy": healed["strategy"], "selector": healed["selector"],
+                               "at": time.time()}
+            changed = True
+    if changed:
+        save_cache(cache, path)
+    return cache
@@ -0,0 +1,111 @@
+"""Content-addressed store for the scenario scripts referenced by results.
+
+Every TestSprite record embeds the full script in `code`, although it only
+changes when the test is regenerated. The harness writes `codeHash` instead
+("sha256:<hex>" of the script) and keeps each distinct script once, gzipped,
+under tmp/objects/<first 2 hex digits>/<remaining digits>.gz. Whether a
+script changed between two runs is then a comparison of their hashes.
+
+Every result file the harness writes with hashes is recorded as a GC root
+in tmp/objects/roots.json. `gc` removes the objects that no root, no other
+JSON file in tmp/ and no history row references any more. Objects written
+within GRACE_S are kept, so a run that has stored its scripts but not yet
+written its results does not lose them.
+"""
+import gzip
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+
+from .config import TMP_DIR
+
+OBJECTS_DIR = TMP_DIR / "objects"
+ROOTS_NAME = "roots.json"
+HASH_PREFIX = "sha256:"
+GRACE_S = 60 * 60
+
+
+def digest(text) -> str:
+    return HASH_PREFIX + hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def object_path(ref, directory=OBJECTS_DIR) -> Path:
+    hexdigest = ref.removeprefix(HASH_PREFIX)
+    return Path(directory) / hexdigest[:2] / f"{hexdigest[2:]}.gz"
+
+
+def put(text, directory=OBJECTS_DIR) -> str:
+    """Store `text` unless an identical object exists; returns its reference."""
+    ref = digest(text)
+    path = object_path(ref, directory)
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        partial = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        partial.write_bytes(gzip.compress(text.encode("utf-8"), mtime=0))
+        os.replace(partial, path)
+    return ref
+
+
+def get(ref, directory=OBJECTS_DIR) -> str:
+    """The text of an object, given its full reference or a unique prefix of its hex digest."""
+    path = object_path(ref, directory)
+    if not path.exists():
+        matches = sorted(path.parent.glob(f"{path.name[:-len('.gz')]}*.gz"))
+        if len(matches) != 1:
+            raise KeyError(f"{ref}: {'ambiguous' if matches else 'no such object'}")
+        path = matches[0]
+    return gzip.decompress(path.read_bytes()).decode("utf-8")
+
+
+def pack_records(records, directory=OBJECTS_DIR) -> int:
+    """Move each record's `code` into the store, leaving `codeHash`; returns bytes removed."""
+    saved = 0
+    for record in records:
+        code = record.pop("code", None)
+        if code is None:
+            continue
+        record["codeHash"] = put(code, directory)
+        saved += len(code)
+    return saved
+
+
+def load_roots(directory=OBJECTS_DIR) -> list:
+    try:
+        return json.loads((Path(directory) / ROOTS_NAME).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return []
+
+
+def add_root(path, directory=OBJECTS_DIR):
+    """Record `path` as a result file whose hashes keep their objects alive."""
+    path = str(Path(path).resolve())
+    roots = load_roots(directory)
+    if path not in roots:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        (Path(directory) / ROOTS_NAME).write_text(json.dumps(sorted(roots + [path]), indent=1), encoding="utf-8")
+
+
+def root_files(directory=OBJECTS_DIR, scan_dir=TMP_DIR) -> list:
+    """The recorded roots that still exist, plus every JSON file directly in `scan_dir`."""
+    paths = {Path(root) for root in load_roots(directory)} | set(Path(scan_dir).glob("*.json"))
+    return sorted(path for path in paths if path.exists())
+
+
+def referenced(records) -> set:
+    return {record["codeHash"] for record in records if isinstance(record, dict) and record.get("codeHash")}
+
+
+def gc(refs, directory=OBJECTS_DIR, dry_run=False, now=None) -> list:
+    """Remove the objects outside `refs` older than GRACE_S; returns the removed paths."""
+    keep = {object_path(ref, directory) for ref in refs}
+    cutoff = (now or time.time()) - GRACE_S
+    removed = []
+    for path in sorted(Path(directory).glob("??/*.gz")):
+        if path in keep or path.stat().st_mtime > cutoff:
+            continue
+        removed.append(path)
+        if not dry_run:
+            path.unlink()
+    return removed
@@ -0,0 +1,123 @@
+"""Named device and network profiles applied through CDP.
+
+Most users open the app on a phone, but every scenario runs on a fast desktop.
+`--profile` gives a scenario context a device viewport, and gives each of its
+pages a CPU slowdown (`Emulation.setCPUThrottlingRate`) and network
+conditions (`Network.emulateNetworkConditions`):
+
+    desktop             1280x720, no throttling (the default)
+    mobile              412x915 touch device, 4x CPU slowdown
+    slow-3g             mobile, 4x CPU slowdown, 400 kbit/s and 2 s round trips
+    offline-after-load  desktop, network cut once the first page has loaded
+
+The profile goes to `harness.profile` in the results, next to the timings it
+produced. `WindowRewriter` turns the browser expressions some scripts write
+as Python, such as TC014's `page.mouse.wheel(0, window.innerHeight)`, into
+`await page.evaluate("window.innerHeight")`, so they read the real viewport.
+"""
+import ast
+from dataclasses import asdict, dataclass, field
+
+from .runner import Plugin, watch_pages
+
+DEFAULT_PROFILE = "desktop"
+
+# Chrome DevTools' "Slow 3G" preset, in bytes per second and milliseconds
+SLOW_3G = {"offline": False, "latency": 2000, "downloadThroughput": 50000, "uploadThroughput": 50000}
+OFFLINE = {"offline": True, "latency": 0, "downloadThroughput": -1, "uploadThroughput": -1}
+
+MOBILE_USER_AGENT = ("Mozilla/5.0 (Linux; Android 11; moto g power (2022)) AppleWebKit/537.36 "
+                     "(KHTML, like Gecko) Chrome/124.0.0.0 Mobile Safari/537.36")
+
+
+@dataclass(frozen=True)
+class Profile:
+    name: str
+    viewport: dict = field(default_factory=lambda: {"width": 1280, "height": 720})
+    mobile: bool = False
+    cpu_rate: float = 1
+    network: dict = None
+    offline_after_load: bool = False
+
+    def context_options(self) -> dict:
+        options = {"viewport": dict(self.viewport)}
+        if self.mobile:
+            options.update(device_scale_factor=2.625, is_mobile=True, has_touch=True,
+                           user_agent=MOBILE_USER_AGENT)
+        return options
+
+    @property
+    def throttled(self) -> bool:
+        return self.cpu_rate != 1 or self.network is not None or self.offline_after_load
+
+
+MOBILE_VIEWPORT = {"width": 412, "height": 915}
+
+PROFILES = {
+    "desktop": Profile("desktop"),
+    "mobile": Profile("mobile", MOBILE_VIEWPORT, mobile=True, cpu_rate=4),
+    "slow-3g": Profile("slow-3g", MOBILE_VIEWPORT, mobile=True, cpu_rate=4, network=SLOW_3G),
+    "offline-after-load": Profile("offline-after-load", offline_after_load=True),
+}
+
+
+async def throttle(page, profile):
+    """Apply the profile's CPU and network conditions to `page` over CDP."""
+    if not profile.throttled:
+        return
+    session = await page.context.new_cdp_session(page)
+    if profile.cpu_rate != 1:
+        await session.send("Emulation.setCPUThrottlingRate", {"rate": profile.cpu_rate})
+    if profile.network is not None or profile.offline_after_load:
+        await session.send("Network.enable")
+    if profile.network is not None:
+        await session.send("Network.emulateNetworkConditions", profile.network)
+    if profile.offline_after_load:
+        async def go_offline(_):
+            await session.send("Network.emulateNetworkConditions", OFFLINE)
+
+        page.once("load", go_offline)
+
+
+async def apply_profile(context, profile):
+    """Throttle every page `context` opens."""
+    if profile.throttled:
+        watch_pages(context, lambda page: throttle(page, profile))
+
+
+class WindowRewriter(ast.NodeTransformer):
+    """Evaluates `window.<property>` in the page, for scripts that never define `window` themselves."""
+
+    def visit_Module(self, tree):
+        assigned = any(isinstance(node, ast.Name) and node.id == "window" and not isinstance(node.ctx, ast.Load)
+                       for node in ast.walk(tree))
+        return tree if assigned else self.generic_visit(tree)
+
+    def visit_Attribute(self, node):
+        if isinstance(node.value, ast.Name) and node.value.id == "window" and isinstance(node.ctx, ast.Load):
+            call = ast.Call(func=ast.Attribute(ast.Name("page", ast.Load()), "evaluate", ast.Load()),
+                            args=[ast.Constant(f"window.{node.attr}")], keywords=[])
+            return ast.copy_location(ast.Await(call), node)
+        return self.generic_visit(node)
+
+
+class ProfilePlugin(Plugin):
+    """Runs every scenario under one named device and network profile."""
+
+    name = "profile"
+
+    def __init__(self, profile=DEFAULT_PROFILE):
+        self.profile = PROFILES[profile]
+
+    def context_options(self, scenario) -> dict:
+        return self.profile.context_options()
+
+    def transformers(self, scenario) -> list:
+        return [WindowRewriter()]
+
+    async def on_context(self, context, scenario):
+        await apply_profile(context, self.profile)
+
+    async def after_scenario(self, context, scenario, result):
+        result.extras["profile"] = {key: value for key, value in asdict(self.profile).items()
+                                    if value not in (None, False)}
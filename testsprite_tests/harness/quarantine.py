@@ -0,0 +1,81 @@
+"""Quarantine lane for scenarios that end in a placeholder `assert False`.
+
+Many generated scripts finish with `assert False, 'Test plan execution
+failed: generic failure assertion'` when TestSprite could not work out the
+expected result. They fail by construction, so the runner detects them
+statically and, depending on the lane mode:
+
+    skip   reports them without running them
+    last   runs them after every other scenario (default)
+    smoke  runs them last with the placeholder removed and a tight budget,
+           to check that the steps still execute
+"""
+import ast
+from dataclasses import dataclass
+
+from .runner import PASSED, Plugin
+
+QUARANTINED = "QUARANTINED"
+LANE_MODES = ("skip", "last", "smoke")
+DEFAULT_SMOKE_BUDGET_S = 60.0
+
+
+@dataclass
+class Placeholder:
+    line: int
+    message: str
+
+
+def _is_placeholder(node) -> bool:
+    return isinstance(node, ast.Assert) and isinstance(node.test, ast.Constant) \
+        and not node.test.value
+
+
+def placeholder_assertions(source) -> list:
+    """`assert False`-style statements in a script, with their messages."""
+    found = []
+    for node in ast.walk(ast.parse(source)):
+        if _is_placeholder(node):
+            message = node.msg.value if isinstance(node.msg, ast.Constant) else ""
+            found.append(Placeholder(node.lineno, str(message)))
+    return found
+
+
+def partition(scenarios) -> tuple:
+    """Split scenarios into (runnable, quarantined)."""
+    runnable, quarantined = [], []
+    for scenario in scenarios:
+        target = quarantined if placeholder_assertions(scenario.source) else runnable
+        target.append(scenario)
+    return runnable, quarantined
+
+
+class PlaceholderRemover(ast.NodeTransformer):
+    def visit_Assert(self, node):
+        return ast.copy_location(ast.Pass(), node) if _is_placeholder(node) else node
+
+
+class QuarantinePlugin(Plugin):
+    """Marks results of the quarantine lane; in smoke mode also strips the placeholders."""
+
+    name = "quarantine"
+
+    def __init__(self, smoke=False):
+        self.smoke = smoke
+
+    def transformers(self, scenario) -> list:
+        return [PlaceholderRemover()] if self.smoke else []
+
+    async def after_scenario(self, context, scenario, result):
+        result.extras["lane"] = "smoke" if self.smoke else "quarantine"
+        if self.smoke and result.status == PASSED:
+            # The steps ran, but nothing was actually asserted
+            result.status = QUARANTINED
+
+
+def report(scenarios) -> list:
+    lines = []
+    for scenario in scenarios:
+        for placeholder in placeholder_assertions(scenario.source):
+            lines.append(f"{scenario.id}:{placeholder.line}  {placeholder.message}")
+    return lines
@@ -0,0 +1,200 @@
+"""One readiness probe for the start of every scenario.
+
+The generated scripts open the app with `page.goto(..., wait_until="commit")`,
+then wait up to 3 s for `domcontentloaded` on the page and again on each
+frame, one after the other. None of that says whether the app can be used.
+`ReadinessRewriter` replaces the three statements with
+`await __harness_ready__(page, url, navigation_timeout=...)`, which navigates
+(with the goto's own timeout) and then waits for the app's own signals in
+order, within `--ready-timeout`:
+
+    navigation  the document was committed
+    root        React mounted something into #root
+    auth        AuthContext resolved the session (`<html data-auth="signed-in|signed-out">`)
+    network     no Supabase request in flight for QUIET_MS
+
+Each phase's time goes to `harness.ready` in the results. When the budget
+runs out, the remaining phases are skipped and the scenario goes on, like the
+`try/except async_api.Error: pass` blocks it replaces.
+"""
+import ast
+import asyncio
+import time
+
+from playwright import async_api
+
+from .har import BACKEND_URL
+from .runner import Plugin
+from .scenarios import run_test_try
+
+READY_NAME = "__harness_ready__"
+DEFAULT_READY_TIMEOUT_MS = 10000
+NAVIGATION_TIMEOUT_MS = 10000
+QUIET_MS = 100
+POLL_S = 0.025
+
+PHASES = ("navigation", "root", "auth", "network")
+
+ROOT_JS = "() => { const root = document.getElementById('root'); return !!root && root.childElementCount > 0; }"
+AUTH_JS = "() => ['signed-in', 'signed-out'].includes(document.documentElement.dataset.auth)"
+
+
+class BackendTracker:
+    """Counts the Supabase requests a context has in flight."""
+
+    def __init__(self):
+        self.pending = set()
+        self.idle_since = time.monotonic()
+
+    def attach(self, context):
+        context.on("request", self._started)
+        context.on("requestfinished", self._done)
+        context.on("requestfailed", self._done)
+
+    def _started(self, request):
+        if BACKEND_URL.search(request.url):
+            self.pending.add(request)
+
+    def _done(self, request):
+        if request in self.pending:
+            self.pending.discard(request)
+            if not self.pending:
+                self.idle_since = time.monotonic()
+
+    async def quiet(self, timeout_ms, quiet_ms=QUIET_MS) -> bool:
+        deadline = time.monotonic() + timeout_ms / 1000
+        while True:
+            if not self.pending and (time.monotonic() - self.idle_since) * 1000 >= quiet_ms:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            await asyncio.sleep(POLL_S)
+
+
+class Readiness:
+    def __init__(self, tracker, timeout_ms=DEFAULT_READY_TIMEOUT_MS):
+        self.tracker = tracker
+        self.timeout_ms = timeout_ms
+        self.probes = []
+
+    async def __call__(self, page, url=None, navigation_timeout=NAVIGATION_TIMEOUT_MS):
+        """Navigate to `url` (when given) and wait until the app is usable within `timeout_ms`."""
+        budget = self.timeout_ms / 1000
+        started = time.monotonic()
+        probe = {"url": url or page.url, "phases": {}, "ready": False}
+        self.probes.append(probe)
+
+        def remaining_ms():
+            return max(0.0, budget - (time.monotonic() - started)) * 1000
+
+        async def navigation():
+            await page.goto(url, wait_until="commit", timeout=navigation_timeout)
+            return True
+
+        async def function(expression):
+            await page.wait_for_function(expression, timeout=remaining_ms() or 1)
+            return True
+
+        phases = {
+            "navigation": navigation if url else None,
+            "root": lambda: function(ROOT_JS),
+            "auth": lambda: function(AUTH_JS),
+            "network": lambda: self.tracker.quiet(remaining_ms()),
+        }
+        for name in PHASES:
+            wait = phases[name]
+            if wait is None:
+                continue
+            phase_started = time.monotonic()
+            try:
+                satisfied = await wait()
+            except async_api.Error:
+                if name == "navigation":
+                    # A failed navigation is the scenario's error, as with the original goto
+                    raise
+                satisfied = False
+            probe["phases"][name] = round((time.monotonic() - phase_started) * 1000, 1)
+            if not satisfied:
+                probe["timed_out"] = name
+                break
+        else:
+            probe["ready"] = True
+        probe["ms"] = round((time.monotonic() - started) * 1000, 1)
+        return probe["ready"]
+
+
+def _is_goto(stmt):
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await)):
+        return None
+    call = stmt.value.value
+    if isinstance(call, ast.Call) and ast.unparse(call.func) == "page.goto" and call.args:
+        return call
+    return None
+
+
+def _is_load_wait(stmt) -> bool:
+    """The `try: await page.wait_for_load_state(...)` block or the `for frame in page.frames` loop."""
+    if isinstance(stmt, ast.For):
+        return ast.unparse(stmt.iter) == "page.frames"
+    if isinstance(stmt, ast.Try) and len(stmt.body) == 1:
+        return "wait_for_load_state" in ast.unparse(stmt.body[0])
+    return False
+
+
+class ReadinessRewriter(ast.NodeTransformer):
+    """Replaces the opening goto and its load-state waits with the readiness probe."""
+
+    def visit_Module(self, tree):
+        block = run_test_try(tree)
+        if block is None:
+            return tree
+        body = []
+        replaced = False
+        statements = iter(block.body)
+        for stmt in statements:
+            call = None if replaced else _is_goto(stmt)
+            if call is None:
+                body.append(stmt)
+                continue
+            replaced = True
+            timeout = next((k.value for k in call.keywords if k.arg == "timeout"), None)
+            ready = ast.Expr(ast.Await(ast.Call(
+                func=ast.Name(READY_NAME, ast.Load()),
+                args=[ast.Name("page", ast.Load()), call.args[0]],
+                keywords=[ast.keyword("navigation_timeout", timeout)] if timeout is not None else [],
+            )))
+            body.append(ast.copy_location(ready, stmt))
+            for following in statements:
+                if not _is_load_wait(following):
+                    body.append(following)
+                    break
+        block.body = body
+        return tree
+
+
+class ReadinessPlugin(Plugin):
+    """Opens every scenario through the readiness probe and reports its phases."""
+
+    name = "readiness"
+
+    def __init__(self, timeout_ms=DEFAULT_READY_TIMEOUT_MS):
+        self.timeout_ms = timeout_ms
+        self.trackers = {}
+        self.probes = {}
+
+    def transformers(self, scenario) -> list:
+        return [ReadinessRewriter()]
+
+    def scenario_globals(self, scenario) -> dict:
+        tracker = self.trackers[scenario.id] = BackendTracker()
+        ready = self.probes[scenario.id] = Readiness(tracker, self.timeout_ms)
+        return {READY_NAME: ready, "harness_ready": ready}
+
+    async def on_context(self, context, scenario):
+        self.trackers[scenario.id].attach(context)
+
+    async def after_scenario(self, context, scenario, result):
+        self.trackers.pop(scenario.id, None)
+        ready = self.probes.pop(scenario.id, None)
+        if ready is not None and ready.probes:
+            result.extras["ready"] = ready.probes
@@ -0,0 +1,58 @@
+"""Conversion of runner results to the tmp/test_results.json schema."""
+import json
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .config import RESULTS_PATH
+
+
+def iso_timestamp(epoch: float) -> str:
+    # Matches the "2025-09-11T19:04:42.493Z" format written by TestSprite
+    moment = datetime.fromtimestamp(epoch, tz=timezone.utc)
+    return moment.strftime("%Y-%m-%dT%H:%M:%S.") + f"{moment.microsecond // 1000:03d}Z"
+
+
+def parse_timestamp(value: str) -> float:
+    return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
+
+
+def load_records(path=RESULTS_PATH) -> list:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return []
+
+
+def known_test_ids(path=RESULTS_PATH) -> dict:
+    """Map "TC002" to the TestSprite testId of an earlier run, when there is one."""
+    ids = {}
+    for record in load_records(path):
+        title = record.get("title", "")
+        if title[:5].startswith("TC") and record.get("testId"):
+            ids[title[:5]] = record["testId"]
+    return ids
+
+
+def to_record(result, scenario, test_ids=None) -> dict:
+    record = {
+        "testId": (test_ids or {}).get(scenario.id, scenario.id),
+        "title": scenario.full_title,
+        "description": scenario.description,
+        "code": scenario.source,
+        "testStatus": result.status,
+        "testError": result.error,
+        "testType": "FRONTEND",
+        "createFrom": "harness",
+        "created": iso_timestamp(result.started),
+        "modified": iso_timestamp(result.finished),
+    }
+    if result.extras:
+        record["harness"] = {"worker": result.worker, **result.extras}
+    return record
+
+
+def write_records(records, path) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(records, indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
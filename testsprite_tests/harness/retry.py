@@ -0,0 +1,142 @@
+"""Step-level retries with flake classification.
+
+Each locator action in a script (`await elem.click(timeout=5000)`) is
+rewritten into `await __harness_step__(lambda: elem.click(timeout=5000), line,
+"click")`. When the action times out or loses its element before any input
+was dispatched, only that action is retried after a short backoff: the
+locator is resolved again against the current DOM and the action re-runs its
+actionability checks. Errors after dispatch (a click that was delivered but
+whose navigation timed out, say) are not retried, so a form is never
+submitted twice. Every attempt is recorded; a scenario that passed with
+retried steps is reported as flaky rather than as a failure.
+"""
+import ast
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from playwright import async_api
+
+from .runner import Plugin
+from .waiting import ACTIONS
+
+STEP_NAME = "__harness_step__"
+DEFAULT_STEP_RETRIES = 2
+BACKOFF_S = 0.25
+
+STABLE = "stable"
+FLAKY = "flaky"
+FAILED = "failed"
+
+# Call log lines Playwright writes once the input event has been dispatched
+DISPATCHED = ("performing ", "action done", "scheduled navigations")
+DETACHED = ("not attached to the DOM", "Element is detached")
+
+
+def retryable(exc) -> bool:
+    """Whether `exc` was raised while waiting for the element, before the action reached the page."""
+    message = str(exc)
+    if any(marker in message for marker in DISPATCHED):
+        return False
+    return isinstance(exc, async_api.TimeoutError) or any(marker in message for marker in DETACHED)
+
+
+@dataclass
+class StepRecord:
+    line: int
+    action: str
+    attempts: int
+    passed: bool
+    duration_ms: float
+    errors: list = field(default_factory=list)
+
+
+class StepRetrier:
+    def __init__(self, retries=DEFAULT_STEP_RETRIES):
+        self.retries = retries
+        self.records = []
+
+    async def __call__(self, make_action, line, action):
+        started = time.monotonic()
+        errors = []
+        while True:
+            try:
+                outcome = await make_action()
+            except async_api.Error as exc:
+                errors.append(str(exc).splitlines()[0][:200])
+                if len(errors) > self.retries or not retryable(exc):
+                    self._record(line, action, errors, False, started)
+                    raise
+                await asyncio.sleep(BACKOFF_S * 2 ** (len(errors) - 1))
+                continue
+            self._record(line, action, errors, True, started)
+            return outcome
+
+    def _record(self, line, action, errors, passed, started):
+        attempts = len(errors) + (1 if passed else 0)
+        duration = (time.monotonic() - started) * 1000
+        self.records.append(StepRecord(line, action, attempts, passed, round(duration, 1), errors))
+
+    def summary(self, passed) -> dict:
+        """Retried steps, classified by whether the scenario as a whole passed."""
+        retried = [r for r in self.records if r.attempts > 1 or not r.passed]
+        if not passed:
+            classification = FAILED
+        elif retried:
+            classification = FLAKY
+        else:
+            classification = STABLE
+        return {
+            "classification": classification,
+            "steps": len(self.records),
+            "retried": [
+                {"line": r.line, "action": r.action, "attempts": r.attempts,
+                 "passed": r.passed, "errors": r.errors}
+                for r in retried
+            ],
+        }
+
+
+class StepActionRewriter(ast.NodeTransformer):
+    """Wraps `await <locator>.<action>(...)` statements in the step retrier."""
+
+    def visit_Expr(self, node):
+        if not isinstance(node.value, ast.Await):
+            return node
+        call = node.value.value
+        if not (isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute)
+                and call.func.attr in ACTIONS and isinstance(call.func.value, ast.Name)
+                and call.func.value.id != "page"):
+            return node
+        thunk = ast.Lambda(
+            args=ast.arguments(posonlyargs=[], args=[], kwonlyargs=[], kw_defaults=[], defaults=[]),
+            body=call,
+        )
+        wrapped = ast.Call(
+            func=ast.Name(STEP_NAME, ast.Load()),
+            args=[thunk, ast.Constant(node.lineno), ast.Constant(call.func.attr)],
+            keywords=[],
+        )
+        return ast.copy_location(ast.Expr(ast.Await(wrapped)), node)
+
+
+class StepRetryPlugin(Plugin):
+    """Installs a `StepRetrier` per scenario and classifies the run as stable, flaky or failed."""
+
+    name = "retry"
+
+    def __init__(self, retries=DEFAULT_STEP_RETRIES):
+        self.retries = retries
+        self.retriers = {}
+
+    def transformers(self, scenario) -> list:
+        return [StepActionRewriter()]
+
+    def scenario_globals(self, scenario) -> dict:
+        retrier = self.retriers[scenario.id] = StepRetrier(self.retries)
+        return {STEP_NAME: retrier}
+
+    async def after_scenario(self, context, scenario, result):
+        retrier = self.retriers.pop(scenario.id, None)
+        if retrier is not None:
+            result.extras["steps"] = retrier.summary(result.passed)
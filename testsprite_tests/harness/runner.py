@@ -0,0 +1,265 @@
+"""Concurrent runner that executes the TC scripts against one shared browser.
+
+The generated scripts start Playwright, launch Chromium and tear everything
+down on their own. The runner executes them unchanged but hands them a shim in
+place of `async_api`: `launch()` returns the worker's shared browser and
+`close()`/`stop()` leave it running, so each scenario only pays for a new
+browser context.
+"""
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+from playwright import async_api
+
+from . import browser_server
+from .config import DEFAULT_LAUNCH_ARGS
+from .scenarios import load_run_test
+
+PASSED = "PASSED"
+FAILED = "FAILED"
+
+DEFAULT_CONCURRENCY = 4
+
+
+@dataclass
+class ScenarioResult:
+    scenario_id: str
+    title: str
+    status: str = PASSED
+    error: str = ""
+    started: float = 0.0
+    finished: float = 0.0
+    worker: str = ""
+    extras: dict = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return max(self.finished - self.started, 0.0)
+
+    @property
+    def passed(self) -> bool:
+        return self.status == PASSED
+
+
+class Plugin:
+    """Hook points the runner calls around every scenario.
+
+    Subclasses override only what they need; every hook is optional.
+    """
+
+    name = "plugin"
+
+    async def setup(self, runner):
+        pass
+
+    async def teardown(self, runner):
+        pass
+
+    async def before_scenario(self, scenario):
+        """Called before the script is loaded; failures count against the scenario."""
+        pass
+
+    def transformers(self, scenario) -> list:
+        """ast.NodeTransformer instances applied to the script before it is compiled."""
+        return []
+
+    def scenario_globals(self, scenario) -> dict:
+        """Module globals injected into the loaded script."""
+        return {}
+
+    def context_options(self, scenario) -> dict:
+        """Extra keyword arguments for browser.new_context()."""
+        return {}
+
+    async def on_context(self, context, scenario):
+        pass
+
+    async def after_scenario(self, context, scenario, result):
+        """Called before the context is closed; `context` is None if the script never opened one."""
+        pass
+
+
+def watch_pages(context, setup):
+    """Run `await setup(page)` once for every page `context` opens.
+
+    Pages from `context.new_page()` are set up before the call returns, so the
+    script's first goto already sees the result; popups only show up through
+    the "page" event and are set up as soon as possible.
+    """
+    pending = {}
+    new_page = context.new_page
+
+    def start(page):
+        if page not in pending:
+            pending[page] = asyncio.ensure_future(setup(page))
+        return pending[page]
+
+    async def watched_new_page(*args, **kwargs):
+        page = await new_page(*args, **kwargs)
+        await start(page)
+        return page
+
+    context.new_page = watched_new_page
+    context.on("page", start)
+
+
+class _ScenarioContext:
+    """BrowserContext proxy whose close() is deferred until plugins are done with it."""
+
+    def __init__(self, context):
+        self._context = context
+
+    async def close(self, **_):
+        pass
+
+    def __getattr__(self, name):
+        return getattr(self._context, name)
+
+
+class _SharedBrowser:
+    """Stands in for the Browser a script would normally launch."""
+
+    def __init__(self, runner, scenario):
+        self._runner = runner
+        self._scenario = scenario
+        self.contexts = []
+
+    async def new_context(self, **options):
+        context = await self._runner.new_context(self._scenario, **options)
+        self.contexts.append(context)
+        return _ScenarioContext(context)
+
+    async def close(self, **_):
+        pass
+
+    async def release(self):
+        for context in self.contexts:
+            try:
+                await context.close()
+            except async_api.Error:
+                pass
+
+    def __getattr__(self, name):
+        return getattr(self._runner.browser, name)
+
+
+class _BrowserType:
+    def __init__(self, shared):
+        self._shared = shared
+
+    async def launch(self, **_):
+        return self._shared
+
+
+class _Playwright:
+    def __init__(self, shared):
+        self.chromium = _BrowserType(shared)
+
+    async def stop(self):
+        pass
+
+
+class _PlaywrightStarter:
+    def __init__(self, shared):
+        self._playwright = _Playwright(shared)
+
+    async def start(self):
+        return self._playwright
+
+    async def __aenter__(self):
+        return self._playwright
+
+    async def __aexit__(self, *_):
+        pass
+
+
+class _ApiShim:
+    """Replacement for the `async_api` module inside a loaded scenario."""
+
+    def __init__(self, shared):
+        self._shared = shared
+
+    def async_playwright(self):
+        return _PlaywrightStarter(self._shared)
+
+    def __getattr__(self, name):
+        return getattr(async_api, name)
+
+
+class Runner:
+    def __init__(self, scenarios, *, concurrency=DEFAULT_CONCURRENCY, headless=True,
+                 launch_args=None, scenario_timeout=None, plugins=(), worker="w0",
+                 server_port=None):
+        self.scenarios = list(scenarios)
+        self.concurrency = max(1, concurrency)
+        self.headless = headless
+        self.launch_args = list(DEFAULT_LAUNCH_ARGS if launch_args is None else launch_args)
+        self.scenario_timeout = scenario_timeout
+        self.plugins = list(plugins)
+        self.worker = worker
+        self.server_port = server_port
+        self.playwright = None
+        self.browser = None
+
+    async def launch_browser(self, playwright):
+        if self.server_port is not None:
+            return await browser_server.attach(playwright, self.server_port)
+        return await playwright.chromium.launch(headless=self.headless, args=self.launch_args)
+
+    async def new_context(self, scenario, **options):
+        for plugin in self.plugins:
+            options.update(plugin.context_options(scenario))
+        context = await self.browser.new_context(**options)
+        for plugin in self.plugins:
+            await plugin.on_context(context, scenario)
+        return context
+
+    async def run(self) -> list:
+        async with async_api.async_playwright() as playwright:
+            self.playwright = playwright
+            self.browser = await self.launch_browser(playwright)
+            try:
+                for plugin in self.plugins:
+                    await plugin.setup(self)
+                semaphore = asyncio.Semaphore(self.concurrency)
+
+                async def guarded(scenario):
+                    async with semaphore:
+                        return await self.run_scenario(scenario)
+
+                results = await asyncio.gather(*(guarded(s) for s in self.scenarios))
+                for plugin in self.plugins:
+                    await plugin.teardown(self)
+            finally:
+                await self.browser.close()
+        return list(results)
+
+    async def run_scenario(self, scenario) -> ScenarioResult:
+        result = ScenarioResult(scenario.id, scenario.full_title, worker=self.worker)
+        shared = _SharedBrowser(self, scenario)
+        result.started = time.time()
+        try:
+            for plugin in self.plugins:
+                await plugin.before_scenario(scenario)
+            overrides = {"async_api": _ApiShim(shared)}
+            transformers = []
+            for plugin in self.plugins:
+                overrides.update(plugin.scenario_globals(scenario))
+                transformers.extend(plugin.transformers(scenario))
+            run_test = load_run_test(scenario, overrides, transformers)
+            await asyncio.wait_for(run_test(), self.scenario_timeout)
+        except AssertionError as exc:
+            result.status, result.error = FAILED, str(exc) or "Assertion failed"
+        except asyncio.TimeoutError:
+            result.status = FAILED
+            result.error = f"Scenario exceeded its {self.scenario_timeout}s budget"
+        except Exception as exc:
+            result.status, result.error = FAILED, f"{type(exc).__name__}: {exc}"
+        finally:
+            result.finished = time.time()
+            context = shared.contexts[0] if shared.contexts else None
+            for plugin in self.plugins:
+                await plugin.after_scenario(context, scenario, result)
+            await shared.release()
+        return result
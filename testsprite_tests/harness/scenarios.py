@@ -0,0 +1,136 @@
+"""Discovery and loading of the generated TC scripts."""
+import ast
+import json
+import re
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from .config import TEST_PLAN_PATH, TESTS_DIR
+
+SCRIPT_PATTERN = re.compile(r"^(TC\d{3})_(.+)\.py$")
+
+
+@dataclass
+class Scenario:
+    id: str
+    title: str
+    path: Path
+    description: str = ""
+    category: str = ""
+    tags: set = field(default_factory=set)
+
+    @property
+    def source(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+    @property
+    def filename(self) -> str:
+        return str(self.path)
+
+    @property
+    def full_title(self) -> str:
+        # Same "TC002-User Login ..." form used in tmp/test_results.json
+        return f"{self.id}-{self.title}"
+
+
+def load_plan(path=TEST_PLAN_PATH) -> dict:
+    """Index testsprite_frontend_test_plan.json by test id."""
+    try:
+        entries = json.loads(Path(path).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return {}
+    return {entry["id"]: entry for entry in entries}
+
+
+def discover(directory=TESTS_DIR, ids=None) -> list:
+    """Return the TC scripts in `directory`, optionally limited to `ids`."""
+    plan = load_plan()
+    wanted = {i.upper() for i in ids} if ids else None
+    scenarios = []
+    for path in sorted(Path(directory).glob("TC*.py")):
+        match = SCRIPT_PATTERN.match(path.name)
+        if not match:
+            continue
+        scenario_id = match.group(1)
+        if wanted is not None and scenario_id not in wanted:
+            continue
+        entry = plan.get(scenario_id, {})
+        scenarios.append(Scenario(
+            id=scenario_id,
+            title=entry.get("title") or match.group(2).replace("_", " "),
+            path=path,
+            description=entry.get("description", ""),
+            category=entry.get("category", ""),
+        ))
+    return scenarios
+
+
+def _is_entrypoint(node) -> bool:
+    # Matches the trailing `asyncio.run(run_test())` and `if __name__ == "__main__":` blocks
+    if isinstance(node, ast.Expr) and isinstance(node.value, ast.Call):
+        func = node.value.func
+        return isinstance(func, ast.Attribute) and func.attr == "run" \
+            and isinstance(func.value, ast.Name) and func.value.id == "asyncio"
+    if isinstance(node, ast.If) and isinstance(node.test, ast.Compare):
+        left = node.test.left
+        return isinstance(left, ast.Name) and left.id == "__name__"
+    return False
+
+
+def _is_step_start(stmt) -> bool:
+    # Every generated step begins with `frame = context.pages[-1]`
+    return isinstance(stmt, ast.Assign) and len(stmt.targets) == 1 \
+        and isinstance(stmt.targets[0], ast.Name) and stmt.targets[0].id == "frame"
+
+
+def split_steps(statements):
+    """Split a statement list into (prefix, [step, ...]) at each `frame = ...` assignment."""
+    starts = [i for i, stmt in enumerate(statements) if _is_step_start(stmt)]
+    if not starts:
+        return statements, []
+    prefix = statements[:starts[0]]
+    bounds = starts + [len(statements)]
+    return prefix, [statements[a:b] for a, b in zip(bounds, bounds[1:])]
+
+
+def step_comment(source_lines, step) -> str:
+    """The generated comment above a step ("# Click on 'Entrar' ..."), or ""."""
+    line = step[0].lineno - 2
+    while line >= 0 and source_lines[line].strip().startswith("#"):
+        if not source_lines[line].strip().startswith("# Interact"):
+            return source_lines[line].strip().lstrip("# ")
+        line -= 1
+    return ""
+
+
+def run_test_try(tree):
+    """The `try:` block of `run_test` holding the scenario steps, or None."""
+    for node in ast.walk(tree):
+        if isinstance(node, ast.AsyncFunctionDef) and node.name == "run_test":
+            for stmt in node.body:
+                if isinstance(stmt, ast.Try):
+                    return stmt
+    return None
+
+
+def compile_scenario(scenario: Scenario, transformers=()):
+    """Compile a TC script without its module-level entry point."""
+    tree = ast.parse(scenario.source, filename=scenario.filename)
+    tree.body = [node for node in tree.body if not _is_entrypoint(node)]
+    for transformer in transformers:
+        tree = transformer.visit(tree)
+    ast.fix_missing_locations(tree)
+    return compile(tree, scenario.filename, "exec")
+
+
+def load_run_test(scenario: Scenario, overrides=None, transformers=()):
+    """Execute a TC script as a module and return its `run_test` coroutine function.
+
+    `overrides` replaces module globals after the script's own imports ran, which
+    is how the runner swaps `async_api` for its shared-browser shim.
+    """
+    namespace = {"__name__": f"testsprite.{scenario.id}", "__file__": str(scenario.path)}
+    exec(compile_scenario(scenario, transformers), namespace)
+    if overrides:
+        namespace.update(overrides)
+    return namespace["run_test"]
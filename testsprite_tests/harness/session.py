@@ -0,0 +1,285 @@
+"""Authenticated session cache shared across scenarios.
+
+Most scenarios start with the same four steps: click 'Entrar', fill the
+e-mail, fill the password and submit. The cache logs in once per credential,
+saves the context's `storage_state` (which holds the Supabase session in
+localStorage) under tmp/sessions/, and later contexts start already signed in.
+The login steps are then removed from the script and replaced by a wait for
+the redirect to /app. Expired sessions trigger a fresh login, and so does a
+session the backend rejects (a revoked token, a restarted fake backend): when
+the redirect does not come, the stored state is replaced by a new login and
+loaded into the running page.
+"""
+import ast
+import asyncio
+import hashlib
+import json
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+from playwright import async_api
+
+from .config import TMP_DIR, base_url, load_config
+from .runner import Plugin
+from .scenarios import run_test_try, split_steps
+
+SESSIONS_DIR = TMP_DIR / "sessions"
+SESSION_READY_NAME = "__harness_session_ready__"
+
+# Supabase keeps the session under `sb-<project-ref>-auth-token`
+AUTH_KEY_PATTERN = re.compile(r"^sb-.+-auth-token$")
+
+# Renew sessions this many seconds before the access token expires
+EXPIRY_MARGIN_S = 120
+
+# Scenarios whose subject is the login flow itself keep their real login steps
+AUTH_SCENARIOS = frozenset({"TC001", "TC002", "TC003", "TC004", "TC005", "TC019"})
+
+LOGIN_TIMEOUT_MS = 15000
+
+
+@dataclass(frozen=True)
+class Credential:
+    email: str
+    password: str
+
+    @property
+    def slug(self) -> str:
+        return hashlib.sha1(self.email.encode("utf-8")).hexdigest()[:12]
+
+
+def credentials_from_config(config=None) -> list:
+    """The loginUser/loginPassword pair plus any extra `credentials` entries."""
+    config = load_config() if config is None else config
+    credentials = []
+    if config.get("loginUser") and config.get("loginPassword"):
+        credentials.append(Credential(config["loginUser"], config["loginPassword"]))
+    for entry in config.get("credentials", []):
+        credentials.append(Credential(entry["email"], entry["password"]))
+    return credentials
+
+
+def token_expiry(state) -> float:
+    """Return the `expires_at` epoch of the Supabase session in a storage_state, or 0."""
+    for origin in state.get("origins", []):
+        for item in origin.get("localStorage", []):
+            if not AUTH_KEY_PATTERN.match(item.get("name", "")):
+                continue
+            try:
+                session = json.loads(item["value"])
+            except (TypeError, ValueError):
+                continue
+            # supabase-js v1 nested the session under `currentSession`
+            session = session.get("currentSession", session)
+            return float(session.get("expires_at") or 0)
+    return 0.0
+
+
+def is_fresh(state, margin_s=EXPIRY_MARGIN_S, now=None) -> bool:
+    now = time.time() if now is None else now
+    return token_expiry(state) - margin_s > now
+
+
+class SessionCache:
+    def __init__(self, url=None, directory=SESSIONS_DIR, margin_s=EXPIRY_MARGIN_S):
+        self.url = (url or base_url()).rstrip("/")
+        self.directory = Path(directory)
+        self.margin_s = margin_s
+        self._locks = {}
+
+    def path_for(self, credential) -> Path:
+        return self.directory / f"{credential.slug}.json"
+
+    def load(self, credential):
+        try:
+            state = json.loads(self.path_for(credential).read_text(encoding="utf-8"))
+        except (FileNotFoundError, ValueError):
+            return None
+        return state if is_fresh(state, self.margin_s) else None
+
+    def save(self, credential, state):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path_for(credential).write_text(json.dumps(state), encoding="utf-8")
+
+    async def storage_state(self, browser, credential) -> dict:
+        """Return a fresh storage_state for `credential`, logging in when needed."""
+        lock = self._locks.setdefault(credential, asyncio.Lock())
+        async with lock:
+            state = self.load(credential)
+            if state is None:
+                state = await self.login(browser, credential)
+                self.save(credential, state)
+            return state
+
+    async def renew(self, browser, credential, rejected) -> dict:
+        """Replace a `rejected` storage_state with a new login, unless another scenario already did."""
+        lock = self._locks.setdefault(credential, asyncio.Lock())
+        async with lock:
+            state = self.load(credential)
+            if state is None or state == rejected:
+                state = await self.login(browser, credential)
+                self.save(credential, state)
+            return state
+
+    async def login(self, browser, credential) -> dict:
+        context = await browser.new_context()
+        try:
+            page = await context.new_page()
+            await page.goto(f"{self.url}/login", timeout=LOGIN_TIMEOUT_MS)
+            await page.locator('input[type="email"]').fill(credential.email)
+            await page.locator('input[type="password"]').fill(credential.password)
+            await page.locator('button[type="submit"]').click()
+            await page.wait_for_url(re.compile(r"/app"), timeout=LOGIN_TIMEOUT_MS)
+            await page.wait_for_function(
+                "() => Object.keys(localStorage).some(k => /^sb-.+-auth-token$/.test(k))",
+                timeout=LOGIN_TIMEOUT_MS,
+            )
+            state = await context.storage_state()
+        finally:
+            await context.close()
+        return state
+
+
+def _step_action(statements):
+    """Return (method, first string argument) of the step's awaited locator call."""
+    for stmt in statements:
+        if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await):
+            call = stmt.value.value
+            if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) \
+                    and isinstance(call.func.value, ast.Name) and call.func.value.id == "elem":
+                argument = call.args[0].value if call.args and isinstance(call.args[0], ast.Constant) else None
+                return call.func.attr, argument
+    return None, None
+
+
+def find_login_steps(steps, credentials):
+    """Return (first, last, credential) step indexes of a scripted login, or None."""
+    actions = [_step_action(step) for step in steps]
+    for index, (method, value) in enumerate(actions):
+        if method != "fill":
+            continue
+        for credential in credentials:
+            if value != credential.email or index + 1 >= len(actions):
+                continue
+            if actions[index + 1] != ("fill", credential.password):
+                continue
+            submit = next((i for i in range(index + 2, len(actions)) if actions[i][0] == "click"), None)
+            if submit is None:
+                continue
+            first = index - 1 if index > 0 and actions[index - 1][0] == "click" else index
+            return first, submit, credential
+    return None
+
+
+def scripted_login(source, credentials):
+    """The credential a script logs in with through the UI, or None."""
+    tree = ast.parse(source)
+    block = run_test_try(tree)
+    if block is None:
+        return None
+    _, steps = split_steps(block.body)
+    found = find_login_steps(steps, credentials)
+    return found[2] if found else None
+
+
+class LoginStepsRemover(ast.NodeTransformer):
+    """Replaces the scripted login with a wait for the authenticated redirect."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+
+    def visit_Module(self, tree):
+        block = run_test_try(tree)
+        if block is None:
+            return tree
+        prefix, steps = split_steps(block.body)
+        found = find_login_steps(steps, self.credentials)
+        if found is None:
+            return tree
+        first, last, _ = found
+        ready = ast.Expr(ast.Await(ast.Call(
+            func=ast.Name(SESSION_READY_NAME, ast.Load()),
+            args=[ast.Name("page", ast.Load())],
+            keywords=[],
+        )))
+        ast.copy_location(ready, steps[first][0])
+        kept = [stmt for step in steps[:first] for stmt in step]
+        kept.append(ready)
+        kept.extend(stmt for step in steps[last + 1:] for stmt in step)
+        block.body = prefix + kept
+        return tree
+
+
+async def _redirected(page) -> bool:
+    # An authenticated visit to "/" is redirected to /app by Index.tsx
+    try:
+        await page.wait_for_url(re.compile(r"/app"), timeout=LOGIN_TIMEOUT_MS)
+    except async_api.Error:
+        return False
+    return True
+
+
+async def load_state(page, state, url):
+    """Put a storage_state's cookies and localStorage into a running page, then open `url`."""
+    if state.get("cookies"):
+        await page.context.add_cookies(state["cookies"])
+    for origin in state.get("origins", []):
+        if page.url.startswith(origin["origin"]):
+            await page.evaluate("items => items.forEach(item => localStorage.setItem(item.name, item.value))",
+                                origin["localStorage"])
+    await page.goto(url, timeout=LOGIN_TIMEOUT_MS)
+
+
+class SessionPlugin(Plugin):
+    """Starts scenario contexts already signed in and skips their login steps."""
+
+    name = "session"
+
+    def __init__(self, cache=None, credentials=None, real_login=AUTH_SCENARIOS):
+        self.cache = cache or SessionCache()
+        self.credentials = credentials if credentials is not None else credentials_from_config()
+        self.real_login = frozenset(real_login)
+        self.states = {}
+        self.logins = {}
+        self.renewed = set()
+        self.browser = None
+
+    async def setup(self, runner):
+        self.browser = runner.browser
+
+    async def before_scenario(self, scenario):
+        if scenario.id in self.real_login:
+            return
+        credential = scripted_login(scenario.source, self.credentials)
+        if credential is not None:
+            self.states[scenario.id] = await self.cache.storage_state(self.browser, credential)
+            self.logins[scenario.id] = credential
+
+    def transformers(self, scenario) -> list:
+        if scenario.id in self.states:
+            return [LoginStepsRemover(self.credentials)]
+        return []
+
+    def scenario_globals(self, scenario) -> dict:
+        async def session_ready(page):
+            if await _redirected(page) or scenario.id not in self.states:
+                return
+            # The backend rejected the cached session: log in again and retry once
+            state = await self.cache.renew(self.browser, self.logins[scenario.id], self.states[scenario.id])
+            self.renewed.add(scenario.id)
+            await load_state(page, state, self.cache.url)
+            await _redirected(page)
+
+        return {SESSION_READY_NAME: session_ready}
+
+    def context_options(self, scenario) -> dict:
+        state = self.states.get(scenario.id)
+        return {"storage_state": state} if state is not None else {}
+
+    async def after_scenario(self, context, scenario, result):
+        self.logins.pop(scenario.id, None)
+        if self.states.pop(scenario.id, None) is not None:
+            result.extras["session"] = "renewed" if scenario.id in self.renewed else "cached"
+        self.renewed.discard(scenario.id)
@@ -0,0 +1,108 @@
+"""Duration-aware split of scenarios across worker processes or hosts.
+
+Durations come from the per-run history kept in tmp/durations.json and, for
+scenarios without history, from the `created`/`modified` timestamps of
+earlier result files. Shards are filled longest-first, always into the shard
+with the least estimated time, so a long scenario never ends up queued last
+on a busy shard.
+"""
+import heapq
+import json
+import statistics
+from pathlib import Path
+
+from .config import HARNESS_RESULTS_PATH, RESULTS_PATH, TMP_DIR
+from .results import load_records, parse_timestamp
+
+DURATIONS_PATH = TMP_DIR / "durations.json"
+
+# Runs remembered per scenario
+HISTORY_LIMIT = 20
+
+# Estimate for scenarios that have never run, in seconds
+DEFAULT_DURATION_S = 120.0
+
+
+def durations_from_records(records) -> dict:
+    durations = {}
+    for record in records:
+        scenario_id = record.get("title", "")[:5]
+        try:
+            elapsed = parse_timestamp(record["modified"]) - parse_timestamp(record["created"])
+        except (KeyError, ValueError):
+            continue
+        if scenario_id.startswith("TC") and elapsed > 0:
+            durations.setdefault(scenario_id, []).append(elapsed)
+    return durations
+
+
+def load_history(path=DURATIONS_PATH) -> dict:
+    try:
+        return json.loads(Path(path).read_text(encoding="utf-8"))
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def record_durations(results, path=DURATIONS_PATH):
+    """Append this run's durations to the history file."""
+    history = load_history(path)
+    for result in results:
+        runs = history.setdefault(result.scenario_id, [])
+        runs.append(round(result.duration, 3))
+        del runs[:-HISTORY_LIMIT]
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(history, indent=2, sort_keys=True), encoding="utf-8")
+
+
+def estimate_durations(result_paths=(RESULTS_PATH, HARNESS_RESULTS_PATH), history_path=DURATIONS_PATH) -> dict:
+    """Median known duration per scenario id.
+
+    The harness's own history wins; result-file timestamps only fill in
+    scenarios the harness has not run yet.
+    """
+    samples = {}
+    for path in result_paths:
+        for scenario_id, values in durations_from_records(load_records(path)).items():
+            samples.setdefault(scenario_id, []).extend(values)
+    samples.update({k: v for k, v in load_history(history_path).items() if v})
+    return {scenario_id: statistics.median(values) for scenario_id, values in samples.items() if values}
+
+
+def plan_shards(scenarios, count, durations=None, default=DEFAULT_DURATION_S) -> list:
+    """Split `scenarios` into `count` shards of balanced estimated runtime.
+
+    The plan is deterministic for the same inputs, so every host computing it
+    with the same durations file picks a disjoint shard.
+    """
+    durations = estimate_durations() if durations is None else durations
+    count = max(1, count)
+    ordered = sorted(scenarios, key=lambda s: (-durations.get(s.id, default), s.id))
+    heap = [(0.0, index) for index in range(count)]
+    shards = [[] for _ in range(count)]
+    for scenario in ordered:
+        total, index = heapq.heappop(heap)
+        shards[index].append(scenario)
+        heapq.heappush(heap, (total + durations.get(scenario.id, default), index))
+    return shards
+
+
+def parse_shard(value) -> tuple:
+    """Parse "2/4" into (1, 4): the zero-based index and the shard count."""
+    index, _, total = value.partition("/")
+    index, total = int(index), int(total)
+    if not 1 <= index <= total:
+        raise ValueError(f"shard {value!r} out of range")
+    return index - 1, total
+
+
+def merge_records(paths) -> list:
+    """Combine shard result files, keeping the latest record per scenario."""
+    latest = {}
+    for path in paths:
+        for record in load_records(path):
+            key = record.get("title", "")[:5] or record.get("testId")
+            current = latest.get(key)
+            if current is None or record.get("modified", "") > current.get("modified", ""):
+                latest[key] = record
+    return [latest[key] for key in sorted(latest)]
@@ -0,0 +1,262 @@
+"""Tracing kept only for failed or slow scenarios, with a per-step summary.
+
+A failed TC script leaves a `testError` string and a video link behind. With
+`--trace`, every scenario context records a Playwright trace (screenshots and
+DOM snapshots), and its first page a Chromium performance trace over CDP.
+Both are discarded when the scenario passes within `--trace-budget`. For
+failed or over-budget runs they go to tmp/traces/, with a small summary that
+splits the run into the script's steps and lists for each:
+
+    long_tasks      main-thread tasks over LONG_TASK_MS
+    layout_thrash   tasks forcing LAYOUT_THRASH_COUNT or more synchronous layouts from script
+    slow_requests   requests over SLOW_REQUEST_MS
+
+Chromium runs one performance trace at a time. While another scenario holds
+it, only the Playwright trace and the network part of the summary are kept;
+use `--concurrency 1` to get both for every scenario.
+"""
+import ast
+import asyncio
+import bisect
+import gzip
+import json
+import time
+from pathlib import Path
+
+from playwright import async_api
+
+from .config import TMP_DIR
+from .runner import Plugin, watch_pages
+from .scenarios import run_test_try, split_steps, step_comment
+
+TRACES_DIR = TMP_DIR / "traces"
+STEP_NAME = "__harness_trace_step__"
+MARK_PREFIX = "harness-step-"
+
+LONG_TASK_MS = 50
+LAYOUT_THRASH_COUNT = 3
+SLOW_REQUEST_MS = 1000
+TOP = 5
+
+TRACE_CATEGORIES = ",".join([
+    "toplevel",
+    "devtools.timeline",
+    "disabled-by-default-devtools.timeline",
+    "blink.user_timing",
+    "v8.execute",
+])
+TASK_EVENTS = {"RunTask", "ThreadControllerImpl::RunTask"}
+SCRIPT_EVENTS = {"FunctionCall", "EvaluateScript", "EventDispatch", "TimerFire", "FireAnimationFrame",
+                 "v8.callFunction", "V8.Execute"}
+
+
+class PerformanceTrace:
+    """A CDP `Tracing` session on one page, collecting its events in memory."""
+
+    def __init__(self):
+        self.session = None
+        self.events = []
+        self.error = None
+        self._complete = None
+
+    async def start(self, page):
+        self.session = await page.context.new_cdp_session(page)
+        self._complete = asyncio.get_running_loop().create_future()
+        self.session.on("Tracing.dataCollected", lambda params: self.events.extend(params["value"]))
+        self.session.on("Tracing.tracingComplete", lambda _: self._complete.done() or self._complete.set_result(True))
+        try:
+            await self.session.send("Tracing.start", {"categories": TRACE_CATEGORIES,
+                                                      "transferMode": "ReportEvents"})
+        except async_api.Error as exc:
+            # "Tracing has already been started": another scenario holds the browser's tracer
+            self.error = str(exc).splitlines()[0]
+            self.session = None
+
+    async def stop(self) -> list:
+        if self.session is None:
+            return []
+        try:
+            await self.session.send("Tracing.end")
+            await asyncio.wait_for(self._complete, 10)
+        except (async_api.Error, asyncio.TimeoutError) as exc:
+            self.error = str(exc).splitlines()[0] if str(exc) else type(exc).__name__
+        return self.events
+
+
+class StepMarks:
+    """Step boundaries, in epoch ms and as `performance.mark()` entries in the trace."""
+
+    def __init__(self):
+        self.steps = []
+
+    async def __call__(self, page, index, label):
+        self.steps.append({"step": index, "label": label, "at": time.time() * 1000})
+        try:
+            await page.evaluate("name => performance.mark(name)", f"{MARK_PREFIX}{index}")
+        except async_api.Error:
+            pass
+
+
+class StepMarker(ast.NodeTransformer):
+    """Adds `await __harness_trace_step__(page, n, "comment")` at the start of every step."""
+
+    def __init__(self, source):
+        self.source_lines = source.splitlines()
+
+    def visit_Module(self, tree):
+        block = run_test_try(tree)
+        if block is None:
+            return tree
+        prefix, steps = split_steps(block.body)
+        body = list(prefix)
+        for index, step in enumerate(steps, 1):
+            call = ast.Call(func=ast.Name(STEP_NAME, ast.Load()),
+                            args=[ast.Name("page", ast.Load()), ast.Constant(index),
+                                  ast.Constant(step_comment(self.source_lines, step)[:80])],
+                            keywords=[])
+            body.append(ast.copy_location(ast.Expr(ast.Await(call)), step[0]))
+            body.extend(step)
+        block.body = body
+        return tree
+
+
+def _main_threads(events) -> set:
+    return {(e["pid"], e["tid"]) for e in events
+            if e.get("ph") == "M" and e.get("name") == "thread_name"
+            and e.get("args", {}).get("name") == "CrRendererMain"}
+
+
+def _step_at(boundaries, ts):
+    """Index of the step running at `ts`, given sorted (start, step) pairs; 0 before the first."""
+    current = 0
+    for start, step in boundaries:
+        if start > ts:
+            break
+        current = step
+    return current
+
+
+def summarize(events, steps, requests) -> list:
+    """Per-step long tasks, layout thrash and slow requests."""
+    summary = {0: {"step": 0, "label": "page load"}}
+    for step in steps:
+        summary[step["step"]] = {"step": step["step"], "label": step["label"]}
+    for entry in summary.values():
+        entry.update(long_tasks={"count": 0, "total_ms": 0.0, "max_ms": 0.0}, layout_thrash=[], slow_requests=[])
+
+    threads = _main_threads(events)
+    complete = sorted((e for e in events if e.get("ph") == "X" and (e.get("pid"), e.get("tid")) in threads),
+                      key=lambda e: e["ts"])
+    marks = sorted((e["ts"], int(e["name"][len(MARK_PREFIX):])) for e in events
+                   if e.get("name", "").startswith(MARK_PREFIX) and e["name"][len(MARK_PREFIX):].isdigit())
+    starts = [e["ts"] for e in complete]
+    for position, task in enumerate(complete):
+        if task["name"] not in TASK_EVENTS:
+            continue
+        duration = task.get("dur", 0) / 1000
+        entry = summary.get(_step_at(marks, task["ts"]), summary[0])
+        end = bisect.bisect_left(starts, task["ts"] + task.get("dur", 0), position + 1)
+        inside = complete[position + 1:end]
+        scripts = [(e["ts"], e["ts"] + e.get("dur", 0)) for e in inside if e["name"] in SCRIPT_EVENTS]
+        forced = sum(1 for e in inside if e["name"] == "Layout"
+                     and any(start <= e["ts"] < stop for start, stop in scripts))
+        if duration > LONG_TASK_MS:
+            long_tasks = entry["long_tasks"]
+            long_tasks["count"] += 1
+            long_tasks["total_ms"] = round(long_tasks["total_ms"] + duration, 1)
+            long_tasks["max_ms"] = round(max(long_tasks["max_ms"], duration), 1)
+        if forced >= LAYOUT_THRASH_COUNT:
+            entry["layout_thrash"].append({"forced_layouts": forced, "task_ms": round(duration, 1)})
+
+    boundaries = sorted((step["at"], step["step"]) for step in steps)
+    for request in requests:
+        if request["ms"] >= SLOW_REQUEST_MS:
+            entry = summary.get(_step_at(boundaries, request["at"]), summary[0])
+            entry["slow_requests"].append({k: request[k] for k in ("method", "url", "type", "status", "ms")})
+
+    for entry in summary.values():
+        entry["layout_thrash"] = sorted(entry["layout_thrash"], key=lambda t: -t["forced_layouts"])[:TOP]
+        entry["slow_requests"] = sorted(entry["slow_requests"], key=lambda r: -r["ms"])[:TOP]
+    return [summary[key] for key in sorted(summary)]
+
+
+class ScenarioTrace:
+    def __init__(self):
+        self.marks = StepMarks()
+        self.performance = None
+        self.requests = []
+
+    def attach(self, context):
+        context.on("requestfinished", self._finished)
+
+    async def _finished(self, request):
+        timing = request.timing
+        if timing.get("responseEnd", -1) < 0:
+            return
+        try:
+            response = await request.response()
+        except async_api.Error:
+            response = None
+        self.requests.append({"method": request.method, "url": request.url[:200],
+                              "type": request.resource_type, "status": response.status if response else None,
+                              "at": timing["startTime"], "ms": round(timing["responseEnd"], 1)})
+
+    async def trace_page(self, page):
+        # Chromium traces one page at a time; later pages keep only the Playwright trace
+        if self.performance is None:
+            self.performance = PerformanceTrace()
+            await self.performance.start(page)
+
+
+class TracePlugin(Plugin):
+    """Records traces for every scenario and keeps them only when it fails or runs over budget."""
+
+    name = "tracing"
+
+    def __init__(self, budget_s=None, directory=TRACES_DIR):
+        self.budget_s = budget_s
+        self.directory = Path(directory)
+        self.traces = {}
+
+    def transformers(self, scenario) -> list:
+        return [StepMarker(scenario.source)]
+
+    def scenario_globals(self, scenario) -> dict:
+        trace = self.traces[scenario.id] = ScenarioTrace()
+        return {STEP_NAME: trace.marks}
+
+    async def on_context(self, context, scenario):
+        trace = self.traces[scenario.id]
+        await context.tracing.start(screenshots=True, snapshots=True, title=scenario.full_title)
+        trace.attach(context)
+        watch_pages(context, trace.trace_page)
+
+    async def after_scenario(self, context, scenario, result):
+        trace = self.traces.pop(scenario.id, None)
+        if trace is None or context is None:
+            return
+        events = await trace.performance.stop() if trace.performance else []
+        over_budget = self.budget_s is not None and result.duration > self.budget_s
+        if result.passed and not over_budget:
+            await context.tracing.stop()
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stem = self.directory / f"{scenario.id}-{time.strftime('%Y%m%d-%H%M%S')}"
+        report = {"reason": "failed" if not result.passed else "over budget",
+                  "playwright": f"{stem}.zip"}
+        await context.tracing.stop(path=report["playwright"])
+        if events:
+            report["performance"] = f"{stem}.trace.json.gz"
+            with gzip.open(report["performance"], "wt", encoding="utf-8") as stream:
+                json.dump({"traceEvents": events}, stream)
+        elif trace.performance is not None and trace.performance.error:
+            report["performance_error"] = trace.performance.error
+        report["steps"] = summarize(events, trace.marks.steps, trace.requests)
+        Path(f"{stem}.summary.json").write_text(json.dumps(report, indent=1, ensure_ascii=False),
+                                                encoding="utf-8")
+        result.extras["trace"] = {**report, "summary": f"{stem}.summary.json",
+                                  "steps": [s for s in report["steps"] if _notable(s)]}
+
+
+def _notable(step) -> bool:
+    return bool(step["long_tasks"]["count"] or step["layout_thrash"] or step["slow_requests"])
@@ -0,0 +1,208 @@
+"""Core Web Vitals for the performance scenarios.
+
+TC018 clicks through the Relatórios tabs and the Performance page and then
+only checks that the text "LCP" is on screen. For the scenarios given to
+`--vitals` (TC018 by default), an init script installs PerformanceObserver
+hooks before the app loads. It splits the visit into segments: the initial
+load, every client-side route change and every `[role=tab]` switch. For each
+segment it records:
+
+    ttfb_ms, fcp_ms, lcp_ms   initial load only; browsers report them once per document
+    cls                       layout shifts not caused by input, summed per segment
+    inp_ms                    slowest interaction in the segment, one per interactionId
+                              (ignoring the slowest of every 50, as INP does)
+
+The segments are checked against budgets, and any excess fails the scenario.
+The defaults are the "good" thresholds and can be changed under
+`vitalsBudgets` in tmp/config.json, globally or per route prefix:
+
+    "vitalsBudgets": {"lcp_ms": 3000, "routes": {"/app/reports": {"inp_ms": 300}}}
+
+The report goes to tmp/vitals/<TC>.json and to `harness.vitals` in the results.
+"""
+import json
+import time
+from pathlib import Path
+
+from playwright import async_api
+
+from .config import TMP_DIR, load_config
+from .runner import FAILED, Plugin
+
+VITALS_DIR = TMP_DIR / "vitals"
+VITALS_SCENARIOS = frozenset({"TC018"})
+FLUSH_NAME = "__harness_vitals_flush__"
+
+METRICS = ("ttfb_ms", "fcp_ms", "lcp_ms", "cls", "inp_ms")
+DEFAULT_BUDGETS = {"ttfb_ms": 800, "fcp_ms": 1800, "lcp_ms": 2500, "cls": 0.1, "inp_ms": 200}
+
+VITALS_JS = """(() => {
+    if (window.__harnessVitals) return;
+    const documentId = Math.random().toString(36).slice(2);
+    const segments = [];
+    const start = (route, kind, started) => segments.push({
+        route, kind, started: Math.round(started),
+        ttfb_ms: null, fcp_ms: null, lcp_ms: null, cls: 0, inp_ms: null, interactions: 0,
+    });
+    const at = time => {
+        let found = segments[0];
+        for (const segment of segments) if (segment.started <= time) found = segment;
+        return found;
+    };
+    const observe = (type, callback, options) => {
+        try {
+            new PerformanceObserver(list => list.getEntries().forEach(callback))
+                .observe({type, buffered: true, ...options});
+        } catch (error) {
+            // Entry type not supported by this browser
+        }
+    };
+    start(location.pathname, "load", 0);
+    const load = segments[0];
+    observe("navigation", entry => { load.ttfb_ms = Math.round(entry.responseStart); });
+    observe("paint", entry => {
+        if (entry.name === "first-contentful-paint") load.fcp_ms = Math.round(entry.startTime);
+    });
+    observe("largest-contentful-paint", entry => { load.lcp_ms = Math.round(entry.startTime); });
+    observe("layout-shift", entry => {
+        if (!entry.hadRecentInput) at(entry.startTime).cls += entry.value;
+    });
+    // pointerdown, pointerup and click of one tap share an interactionId, and first-input repeats one
+    const interactions = new Map();
+    const interaction = entry => {
+        if (!entry.interactionId) return;
+        const known = interactions.get(entry.interactionId);
+        const segment = known ? known.segment : at(entry.startTime);
+        const duration = Math.max(known ? known.duration : 0, Math.round(entry.duration));
+        interactions.set(entry.interactionId, {segment, duration});
+        const durations = [...interactions.values()]
+            .filter(item => item.segment === segment).map(item => item.duration).sort((a, b) => b - a);
+        segment.interactions = durations.length;
+        // INP ignores the slowest interaction of every 50
+        segment.inp_ms = durations[Math.min(Math.floor(durations.length / 50), durations.length - 1)];
+    };
+    observe("event", interaction, {durationThreshold: 16});
+    observe("first-input", interaction);
+    const routeChanged = () => {
+        if (segments[segments.length - 1].route.split(" › ")[0] !== location.pathname) {
+            start(location.pathname, "route", performance.now());
+        }
+    };
+    for (const name of ["pushState", "replaceState"]) {
+        const original = history[name];
+        history[name] = function (...args) {
+            const value = original.apply(this, args);
+            routeChanged();
+            return value;
+        };
+    }
+    addEventListener("popstate", routeChanged);
+    document.addEventListener("pointerdown", event => {
+        const tab = event.target.closest && event.target.closest("[role=tab]");
+        if (tab && tab.getAttribute("aria-selected") !== "true") {
+            start(`${location.pathname} › ${tab.textContent.trim()}`, "tab", event.timeStamp);
+        }
+    }, true);
+    const report = () => ({document: documentId, url: location.href, segments});
+    addEventListener("pagehide", () => {
+        if (window.__harness_vitals_flush__) window.__harness_vitals_flush__(report());
+    });
+    window.__harnessVitals = {report};
+})();"""
+
+REPORT_JS = "() => window.__harnessVitals ? window.__harnessVitals.report() : null"
+
+
+def load_budgets(config=None) -> dict:
+    config = load_config() if config is None else config
+    configured = dict(config.get("vitalsBudgets", {}))
+    routes = configured.pop("routes", {})
+    return {"default": {**DEFAULT_BUDGETS, **configured}, "routes": routes}
+
+
+def budget_for(budgets, route) -> dict:
+    budget = dict(budgets["default"])
+    # Longer prefixes are more specific and applied last
+    for prefix in sorted(budgets["routes"], key=len):
+        if route.startswith(prefix):
+            budget.update(budgets["routes"][prefix])
+    return budget
+
+
+def check_budgets(segments, budgets) -> list:
+    violations = []
+    for segment in segments:
+        budget = budget_for(budgets, segment["route"])
+        for metric in METRICS:
+            value = segment.get(metric)
+            if value is not None and metric in budget and value > budget[metric]:
+                violations.append({"route": segment["route"], "metric": metric,
+                                   "value": value, "budget": budget[metric]})
+    return violations
+
+
+def describe(violation) -> str:
+    unit = "" if violation["metric"] == "cls" else "ms"
+    name = violation["metric"].removesuffix("_ms").upper()
+    return f"{name} {violation['value']}{unit} > {violation['budget']}{unit} on {violation['route']}"
+
+
+class VitalsCollector:
+    """Segments reported by each document of one scenario's context."""
+
+    def __init__(self):
+        self.documents = {}
+
+    def flush(self, source, report):
+        self.documents[report["document"]] = report
+
+    async def collect(self, context) -> list:
+        for page in context.pages:
+            try:
+                report = await page.evaluate(REPORT_JS)
+            except async_api.Error:
+                continue
+            if report:
+                self.documents[report["document"]] = report
+        segments = []
+        for report in self.documents.values():
+            for segment in report["segments"]:
+                segment["cls"] = round(segment["cls"], 4)
+                segments.append(segment)
+        return segments
+
+
+class VitalsPlugin(Plugin):
+    """Measures Core Web Vitals per route and tab, and fails scenarios over budget."""
+
+    name = "vitals"
+
+    def __init__(self, scenarios=VITALS_SCENARIOS, enforce=True, budgets=None, directory=VITALS_DIR):
+        self.scenarios = frozenset(scenarios)
+        self.enforce = enforce
+        self.budgets = load_budgets() if budgets is None else budgets
+        self.directory = Path(directory)
+        self.collectors = {}
+
+    async def on_context(self, context, scenario):
+        if scenario.id not in self.scenarios:
+            return
+        collector = self.collectors[scenario.id] = VitalsCollector()
+        await context.expose_binding(FLUSH_NAME, collector.flush)
+        await context.add_init_script(VITALS_JS)
+
+    async def after_scenario(self, context, scenario, result):
+        collector = self.collectors.pop(scenario.id, None)
+        if collector is None or context is None:
+            return
+        segments = await collector.collect(context)
+        violations = check_budgets(segments, self.budgets)
+        report = {"scenario": scenario.id, "measured_at": time.time(), "segments": segments,
+                  "budgets": self.budgets, "violations": violations}
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"{scenario.id}.json"
+        path.write_text(json.dumps(report, indent=1, ensure_ascii=False), encoding="utf-8")
+        result.extras["vitals"] = {"segments": segments, "violations": violations, "path": str(path)}
+        if violations and self.enforce and result.passed:
+            result.status = FAILED
+            result.error = "Web vitals over budget: " + "; ".join(describe(v) for v in violations)
@@ -0,0 +1,198 @@
+"""Event-driven waits replacing the fixed `page.wait_for_timeout(3000)` sleeps.
+
+The generated scripts pause three seconds before every action. At load time
+`FixedDelayRewriter` turns each `await page.wait_for_timeout(N)` into
+`await __harness_wait__(page, elem, N)`, where `elem` is the locator used by
+the following statement. The `Waiter` then returns as soon as that locator is
+visible (or, with no locator, once the network has settled), waiting at most
+the per-step bound (`--step-timeout`). The closing `asyncio.sleep(5)` is
+dropped and reported apart from the time saved on waits.
+"""
+import ast
+import time
+from dataclasses import dataclass, field
+
+from playwright import async_api
+
+from .runner import Plugin
+
+WAIT_NAME = "__harness_wait__"
+
+# Locator methods the generated scripts call right after a fixed delay
+ACTIONS = {"click", "fill", "check", "uncheck", "select_option", "press", "hover",
+           "dblclick", "type", "set_input_files"}
+
+DEFAULT_STEP_TIMEOUT_MS = 10000
+
+
+@dataclass
+class WaitRecord:
+    kind: str
+    waited_ms: float
+    fixed_ms: float
+    satisfied: bool
+
+
+@dataclass
+class Waiter:
+    step_timeout_ms: float = DEFAULT_STEP_TIMEOUT_MS
+    records: list = field(default_factory=list)
+
+    def _record(self, kind, started, fixed_ms, satisfied):
+        waited = (time.monotonic() - started) * 1000
+        self.records.append(WaitRecord(kind, waited, fixed_ms, satisfied))
+
+    def _bound(self, timeout_ms):
+        return timeout_ms or self.step_timeout_ms
+
+    async def actionable(self, locator, timeout_ms=None, fixed_ms=0):
+        """Wait until `locator` is visible; the action that follows checks that it is enabled."""
+        started = time.monotonic()
+        satisfied = True
+        try:
+            await locator.wait_for(state="visible", timeout=self._bound(timeout_ms))
+        except async_api.Error:
+            # Let the action that follows raise its own, more specific error
+            satisfied = False
+        self._record("actionable", started, fixed_ms, satisfied)
+        return satisfied
+
+    async def network_settled(self, page, timeout_ms=None, fixed_ms=0):
+        """Wait for Playwright's `networkidle` state (no requests for 500 ms)."""
+        started = time.monotonic()
+        satisfied = True
+        try:
+            await page.wait_for_load_state("networkidle", timeout=self._bound(timeout_ms))
+        except async_api.Error:
+            satisfied = False
+        self._record("network", started, fixed_ms, satisfied)
+        return satisfied
+
+    async def until(self, page, expression, arg=None, timeout_ms=None, fixed_ms=0):
+        """Wait until the JavaScript `expression` is truthy in the page."""
+        started = time.monotonic()
+        satisfied = True
+        try:
+            await page.wait_for_function(expression, arg=arg, timeout=self._bound(timeout_ms))
+        except async_api.Error:
+            satisfied = False
+        self._record("condition", started, fixed_ms, satisfied)
+        return satisfied
+
+    async def settle(self, page, target, fixed_ms):
+        """Drop-in replacement for `page.wait_for_timeout(fixed_ms)` before `target`."""
+        if target is not None:
+            return await self.actionable(target, fixed_ms=fixed_ms)
+        if page is not None:
+            return await self.network_settled(page, fixed_ms=fixed_ms)
+        self.records.append(WaitRecord("skipped", 0.0, fixed_ms, True))
+        return True
+
+    def summary(self) -> dict:
+        waits = [r for r in self.records if r.kind != "skipped"]
+        waited = sum(r.waited_ms for r in waits)
+        fixed = sum(r.fixed_ms for r in waits)
+        return {
+            "steps": len(waits),
+            "unsatisfied": sum(not r.satisfied for r in waits),
+            "waited_s": round(waited / 1000, 3),
+            "fixed_s": round(fixed / 1000, 3),
+            "saved_s": round((fixed - waited) / 1000, 3),
+            "skipped_s": round(sum(r.fixed_ms for r in self.records if r.kind == "skipped") / 1000, 3),
+        }
+
+
+def _fixed_delay(stmt):
+    """Return the (page, delay) nodes of `await page.wait_for_timeout(delay)`."""
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await)):
+        return None
+    call = stmt.value.value
+    if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) \
+            and call.func.attr == "wait_for_timeout" and len(call.args) == 1:
+        return call.func.value, call.args[0]
+    return None
+
+
+def _trailing_sleep(stmt):
+    """Return the delay node of `await asyncio.sleep(seconds)`."""
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await)):
+        return None
+    call = stmt.value.value
+    if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) \
+            and call.func.attr == "sleep" and isinstance(call.func.value, ast.Name) \
+            and call.func.value.id == "asyncio" and len(call.args) == 1:
+        return call.args[0]
+    return None
+
+
+def _action_target(stmt):
+    """Return the locator name of `await elem.click(...)`-style statements."""
+    if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Await)):
+        return None
+    call = stmt.value.value
+    if isinstance(call, ast.Call) and isinstance(call.func, ast.Attribute) \
+            and call.func.attr in ACTIONS and isinstance(call.func.value, ast.Name):
+        return call.func.value.id
+    return None
+
+
+def _wait_call(page, target, delay_ms, origin):
+    call = ast.Call(
+        func=ast.Name(WAIT_NAME, ast.Load()),
+        args=[page, ast.Name(target, ast.Load()) if target else ast.Constant(None), delay_ms],
+        keywords=[],
+    )
+    return ast.copy_location(ast.Expr(ast.Await(call)), origin)
+
+
+class FixedDelayRewriter(ast.NodeTransformer):
+    """Rewrites fixed sleeps into calls to the harness waiter."""
+
+    def generic_visit(self, node):
+        super().generic_visit(node)
+        for name in ("body", "orelse", "finalbody"):
+            statements = getattr(node, name, None)
+            if isinstance(statements, list) and statements and isinstance(statements[0], ast.stmt):
+                setattr(node, name, self._rewrite(statements))
+        return node
+
+    def _rewrite(self, statements):
+        rewritten = []
+        for index, stmt in enumerate(statements):
+            following = statements[index + 1] if index + 1 < len(statements) else None
+            delay = _fixed_delay(stmt)
+            if delay is not None:
+                page, delay_ms = delay
+                target = _action_target(following) if following is not None else None
+                rewritten.append(_wait_call(page, target, delay_ms, stmt))
+                continue
+            seconds = _trailing_sleep(stmt)
+            if seconds is not None and following is None:
+                # The closing `await asyncio.sleep(5)` runs after the last assertion
+                delay_ms = ast.BinOp(seconds, ast.Mult(), ast.Constant(1000))
+                rewritten.append(_wait_call(ast.Constant(None), None, delay_ms, stmt))
+                continue
+            rewritten.append(stmt)
+        return rewritten
+
+
+class EventWaitPlugin(Plugin):
+    """Installs a `Waiter` in every scenario and reports the sleep time saved."""
+
+    name = "waits"
+
+    def __init__(self, step_timeout_ms=DEFAULT_STEP_TIMEOUT_MS):
+        self.step_timeout_ms = step_timeout_ms
+        self.waiters = {}
+
+    def transformers(self, scenario) -> list:
+        return [FixedDelayRewriter()]
+
+    def scenario_globals(self, scenario) -> dict:
+        waiter = self.waiters[scenario.id] = Waiter(self.step_timeout_ms)
+        return {WAIT_NAME: waiter.settle, "harness_waiter": waiter}
+
+    async def after_scenario(self, context, scenario, result):
+        waiter = self.waiters.pop(scenario.id, None)
+        if waiter is not None:
+            result.extras["waits"] = waiter.summary()
@@ -0,0 +1,66 @@
+import ast
+import textwrap
+
+import pytest
+
+# Trimmed copy of a generated TC script: opening goto, two steps, closing sleep
+SAMPLE_SCRIPT = textwrap.dedent('''\
+    import asyncio
+    from playwright import async_api
+
+    async def run_test():
+        pw = None
+        browser = None
+        context = None
+
+        try:
+            pw = await async_api.async_playwright().start()
+            browser = await pw.chromium.launch(headless=True)
+            context = await browser.new_context()
+            page = await context.new_page()
+
+            await page.goto("http://localhost:8081", wait_until="commit", timeout=10000)
+
+            try:
+                await page.wait_for_load_state("domcontentloaded", timeout=3000)
+            except async_api.Error:
+                pass
+
+            for frame in page.frames:
+                try:
+                    await frame.wait_for_load_state("domcontentloaded", timeout=3000)
+                except async_api.Error:
+                    pass
+
+            # Interact with the page elements to simulate user flow
+            # Click on 'Entrar' link to go to login page
+            frame = context.pages[-1]
+            elem = frame.locator('xpath=html/body/div/div/header/div/div[2]/a').nth(0)
+            await page.wait_for_timeout(3000); await elem.click(timeout=5000)
+
+            # Input valid email
+            frame = context.pages[-1]
+            elem = frame.locator('xpath=html/body/div/form/div/input').nth(0)
+            await page.wait_for_timeout(3000); await elem.fill('teste2@teste')
+
+            assert window.innerWidth >= 1024, 'Desktop layout expected'
+            await asyncio.sleep(5)
+
+        finally:
+            if context:
+                await context.close()
+            if browser:
+                await browser.close()
+
+    asyncio.run(run_test())
+''')
+
+
+@pytest.fixture
+def sample_source():
+    return SAMPLE_SCRIPT
+
+
+@pytest.fixture
+def sample_tree():
+    return ast.parse(SAMPLE_SCRIPT)
@@ -0,0 +1,14 @@
+from harness.bench import percentile
+
+
+def test_nearest_rank():
+    values = [5, 1, 4, 2, 3, 6, 8, 7, 10, 9]
+    assert percentile(values, 50) == 5
+    assert percentile(values, 90) == 9
+    assert percentile(values, 99) == 10
+    assert percentile(values, 0) == 1
+
+
+def test_empty_and_single():
+    assert percentile([], 50) is None
+    assert percentile([42.0], 99) == 42.0
@@ -0,0 +1,37 @@
+import ast
+
+from harness.checkpoint import Checkpoint, choose_checkpoint, prefix_hashes
+
+
+def steps(source):
+    return [ast.parse(step).body for step in source]
+
+
+def test_hashes_identify_the_code_before_each_step():
+    hashes = prefix_hashes(steps(["a = 1", "b = 2"]))
+    assert len(hashes) == 3 and len(set(hashes)) == 3
+    assert prefix_hashes(steps(["a = 1", "c = 3"]))[:2] == hashes[:2]
+    assert prefix_hashes(steps(["a = 1", "c = 3"]))[2] != hashes[2]
+
+
+def test_hashes_ignore_line_numbers():
+    assert prefix_hashes(steps(["a = 1"])) == prefix_hashes(steps(["\n\na = 1"]))
+
+
+def checkpoint(name, step, prefix_hash, created=0.0):
+    return Checkpoint(name, step, prefix_hash, "http://localhost:8081/app", {}, created=created)
+
+
+def test_latest_valid_checkpoint_wins():
+    hashes = prefix_hashes(steps(["a = 1", "b = 2", "c = 3"]))
+    saved = [
+        checkpoint("after login", 1, hashes[1]),
+        checkpoint("step 2", 2, hashes[2], created=1.0),
+        checkpoint("step 2", 2, hashes[2], created=2.0),
+        checkpoint("stale", 3, "0" * 40),
+        checkpoint("beyond", 9, hashes[0]),
+    ]
+    assert choose_checkpoint(saved, hashes) is saved[2]
+    assert choose_checkpoint(saved, hashes, "after login") is saved[0]
+    assert choose_checkpoint(saved, hashes, "stale") is None
+    assert choose_checkpoint([], hashes) is None
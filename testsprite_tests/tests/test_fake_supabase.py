@@ -0,0 +1,67 @@
+import pytest
+
+from harness.fake_supabase import FakeSupabase, Field, UniqueViolation, _test, parse_filters, parse_select
+
+ROWS = [
+    {"id": 1, "name": "Casa", "amount": 10.5, "archived": False, "tags": ["a", "b"], "meta": {"k": 1}},
+    {"id": 2, "name": "carro", "amount": 200, "archived": True, "tags": [], "meta": {}},
+    {"id": 3, "name": "Férias", "amount": None, "archived": None, "tags": ["b"], "meta": {}},
+]
+
+
+def matching(params):
+    predicates = parse_filters(params)
+    return [row["id"] for row in ROWS if all(p(row) for p in predicates)]
+
+
+@pytest.mark.parametrize("column, operator, value, expected", [
+    ("id", "eq", "1", [1]),
+    ("id", "neq", "1", [2, 3]),
+    ("amount", "gt", "10.5", [2]),
+    ("amount", "gte", "10.5", [1, 2]),
+    ("amount", "lt", "100", [1]),
+    ("amount", "lte", "200", [1, 2]),
+    ("archived", "is", "null", [3]),
+    ("archived", "is", "true", [2]),
+    ("id", "in", "(1,3)", [1, 3]),
+    ("name", "like", "C%", [1]),
+    ("name", "ilike", "c%", [1, 2]),
+    ("tags", "cs", "{b}", [1, 3]),
+    ("meta", "cs", '{"k": 1}', [1]),
+])
+def test_operators(column, operator, value, expected):
+    assert [row["id"] for row in ROWS if _test(row, column, operator, value)] == expected
+
+
+def test_unsupported_operator():
+    with pytest.raises(ValueError):
+        _test(ROWS[0], "id", "fts", "x")
+
+
+def test_filters_skip_reserved_params_and_negate():
+    assert matching([("select", "*"), ("limit", "1"), ("id", "not.eq.1")]) == [2, 3]
+
+
+def test_logic_filters_nest():
+    assert matching([("or", "(id.eq.1,and(amount.gt.100,archived.is.true))")]) == [1, 2]
+    assert matching([("not.or", "(id.eq.1,id.eq.2)")]) == [3]
+    assert matching([("and", "(id.gte.2,not.and(name.eq.carro))")]) == [3]
+
+
+def test_select_with_aliases_hints_and_embeds():
+    assert parse_select("id,total:amount::text,owner:profiles!goals_user_id_fkey(name,email)") == [
+        Field("id", "id"),
+        Field("amount", "total"),
+        Field("profiles", "owner", [Field("name", "name"), Field("email", "email")], "goals_user_id_fkey"),
+    ]
+
+
+def test_empty_select_is_everything():
+    assert parse_select("") == [Field("*", "*")]
+
+
+def test_duplicate_key_is_a_unique_violation():
+    rows = [{"id": "a", "name": "Casa"}]
+    with pytest.raises(UniqueViolation):
+        FakeSupabase.insert(rows, [{"id": "a", "name": "Outra"}], None, False, False)
+    assert FakeSupabase.insert(rows, [{"id": "a", "name": "Outra"}], None, True, False)[0]["name"] == "Outra"
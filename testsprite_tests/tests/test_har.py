@@ -0,0 +1,25 @@
+from harness.har import MatchRule, request_key
+
+
+def test_query_is_sorted_and_cache_busters_dropped():
+    key = request_key("get", "http://x/rest/v1/goals?select=*&_=123&family_id=eq.1", "")
+    assert key == ("GET", "/rest/v1/goals", "family_id=eq.1&select=%2A", "")
+
+
+def test_timestamps_are_masked():
+    first = request_key("POST", "http://x/rest/v1/rpc/f", '{"at": "2025-07-28T10:00:00.123Z"}')
+    second = request_key("POST", "http://x/rest/v1/rpc/f", '{"at": "2025-07-29T11:30:00+01:00"}')
+    assert first == second
+    assert first[3] == '{"at": "<timestamp>"}'
+
+
+def test_token_body_is_ignored():
+    first = request_key("POST", "http://x/auth/v1/token?grant_type=refresh_token", '{"refresh_token": "a"}')
+    second = request_key("POST", "http://x/auth/v1/token?grant_type=refresh_token", '{"refresh_token": "b"}')
+    assert first == second
+
+
+def test_extra_rules_drop_their_params():
+    rules = (MatchRule(r"/rest/v1/transactions", ignore_params=("created_at",)),)
+    key = request_key("GET", "http://x/rest/v1/transactions?created_at=gte.1&limit=5", None, rules)
+    assert key == ("GET", "/rest/v1/transactions", "limit=5", "")
@@ -0,0 +1,44 @@
+import json
+from contextlib import closing
+
+import pytest
+
+from harness import history
+from harness.results import iso_timestamp
+
+NOW = 1_760_000_000.0
+
+
+def test_records_stream_across_chunk_boundaries(tmp_path):
+    records = [{"title": f"TC{n:03d}", "testError": "x" * n, "nested": {"list": [1, "]", "{"]}} for n in range(50)]
+    path = tmp_path / "results.json"
+    path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+    assert list(history.iter_records(path, chunk_size=7)) == records
+
+
+def test_empty_array_and_non_array(tmp_path):
+    empty = tmp_path / "empty.json"
+    empty.write_text(" [ ] ", encoding="utf-8")
+    assert list(history.iter_records(empty)) == []
+    other = tmp_path / "object.json"
+    other.write_text('{"title": "TC001"}', encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(history.iter_records(other))
+
+
+def test_truncated_file_raises(tmp_path):
+    path = tmp_path / "truncated.json"
+    path.write_text('[{"title": "TC001"}, {"title": "TC0', encoding="utf-8")
+    with pytest.raises(json.JSONDecodeError):
+        list(history.iter_records(path, chunk_size=4))
+
+
+def test_percentiles_of_recent_runs_only(tmp_path):
+    with closing(history.connect(tmp_path / "history.sqlite")) as db, db:
+        writer = history.HistoryWriter(db)
+        for day, duration in [(40, 1000), *((day, day) for day in range(1, 11))]:
+            started = NOW - day * history.DAY_S
+            writer.add({"title": "TC018-Performance Testing for Dashboard Load",
+                        "created": iso_timestamp(started), "modified": iso_timestamp(started + duration)})
+        assert history.metric_percentiles(db, "TC018", now=NOW) == {"n": 10, "p50": 5.0, "p90": 9.0, "p99": 10.0}
+        assert history.metric_percentiles(db, "TC001", now=NOW) == {"n": 0, "p50": None, "p90": None, "p99": None}
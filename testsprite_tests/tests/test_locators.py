@@ -0,0 +1,110 @@
+import asyncio
+import time
+
+from harness.locators import XPATH, LocatorResolver, candidates, is_absolute_xpath, same_element
+
+BUTTON = {"tag": "button", "text": "Entrar", "attributes": {"type": "submit"}}
+
+
+def test_candidates_most_specific_first():
+    entry = {"fingerprint": {"tag": "input", "testid": "email", "text": "",
+                             "attributes": {"id": "email", "type": "email", "name": "email",
+                                            "placeholder": "O seu email"}}}
+    assert candidates(entry) == [
+        ("testid", '[data-testid="email"]'),
+        ("id", '[id="email"]'),
+        ("attributes", 'input[name="email"]'),
+        ("attributes", 'input[placeholder="O seu email"]'),
+    ]
+
+
+def test_candidates_use_the_implicit_role_and_text():
+    assert candidates({"fingerprint": BUTTON}) == [
+        ("role", 'role=button[name="Entrar"]'),
+        ("text", 'button:text-is("Entrar")'),
+    ]
+
+
+def test_healed_selector_is_tried_first_and_once():
+    entry = {"fingerprint": BUTTON, "healed": {"selector": 'role=button[name="Entrar"]'}}
+    assert candidates(entry) == [
+        ("cache", 'role=button[name="Entrar"]'),
+        ("text", 'button:text-is("Entrar")'),
+    ]
+
+
+def test_links_without_href_have_no_role():
+    assert candidates({"fingerprint": {"tag": "a", "text": "Sair"}}) == [("text", 'a:text-is("Sair")')]
+
+
+def test_no_fingerprint_no_candidates():
+    assert candidates({}) == []
+
+
+def test_same_element_tolerates_one_change():
+    assert same_element({**BUTTON, "text": "A entrar..."}, BUTTON)
+    assert not same_element({**BUTTON, "text": "Sair", "attributes": {}}, BUTTON)
+    assert not same_element({**BUTTON, "tag": "a"}, BUTTON)
+
+
+def test_only_absolute_xpaths_are_healed():
+    assert is_absolute_xpath("xpath=html/body/div/a")
+    assert not is_absolute_xpath("text=Entrar")
+
+
+class StubLocator:
+    """The few Locator calls `LocatorResolver.resolve` makes, over a {selector: fingerprint} page."""
+
+    def __init__(self, page, selectors):
+        self.page = page
+        self.selectors = selectors
+
+    def nth(self, index):
+        return self
+
+    @property
+    def first(self):
+        return self
+
+    def or_(self, other):
+        return StubLocator(self.page, self.selectors + other.selectors)
+
+    async def count(self):
+        return sum(selector in self.page for selector in self.selectors)
+
+    async def wait_for(self, state, timeout):
+        if not await self.count():
+            await asyncio.sleep(timeout / 1000)
+            raise AssertionError("not attached")
+
+    async def evaluate(self, expression, timeout):
+        return self.page[self.selectors[0]]
+
+
+class StubFrame:
+    def __init__(self, page):
+        self.page = page
+
+    def locator(self, selector):
+        return StubLocator(self.page, [selector])
+
+
+def test_changed_text_keeps_the_attached_xpath_without_waiting():
+    xpath = "xpath=html/body/div/span"
+    cache = {xpath: {"fingerprint": {"tag": "span", "text": "12,00 €", "attributes": {}}}}
+    frame = StubFrame({xpath: {"tag": "span", "text": "15,00 €", "attributes": {}}})
+    started = time.monotonic()
+    locator, strategy = asyncio.run(LocatorResolver(cache).resolve(frame, xpath, 0))
+    assert strategy == XPATH and locator.selectors == [xpath]
+    assert time.monotonic() - started < 0.5
+
+
+def test_moved_element_is_healed_from_its_fingerprint():
+    xpath = "xpath=html/body/div/button"
+    cache = {xpath: {"fingerprint": BUTTON}}
+    frame = StubFrame({xpath: {"tag": "button", "text": "Cancelar", "attributes": {}},
+                       'role=button[name="Entrar"]': BUTTON})
+    resolver = LocatorResolver(cache)
+    locator, strategy = asyncio.run(resolver.resolve(frame, xpath, 0))
+    assert strategy == "role" and locator.selectors == ['role=button[name="Entrar"]']
+    assert resolver.healed == {xpath: {"strategy": "role", "selector": 'role=button[name="Entrar"]'}}
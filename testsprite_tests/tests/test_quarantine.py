@@ -0,0 +1,18 @@
+from harness.quarantine import Placeholder, placeholder_assertions
+
+
+def test_placeholders_with_their_messages():
+    source = (
+        "async def run_test():\n"
+        "    assert await elem.is_visible(), 'real check'\n"
+        "    assert False, 'Test plan execution failed: generic failure assertion.'\n"
+        "    assert 0\n"
+    )
+    assert placeholder_assertions(source) == [
+        Placeholder(3, "Test plan execution failed: generic failure assertion."),
+        Placeholder(4, ""),
+    ]
+
+
+def test_sample_script_has_none(sample_source):
+    assert placeholder_assertions(sample_source) == []
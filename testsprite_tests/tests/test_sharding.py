@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+from harness.sharding import plan_shards
+
+
+def scenarios(*ids):
+    return [SimpleNamespace(id=i) for i in ids]
+
+
+def test_longest_scenarios_are_spread_first():
+    durations = {"TC001": 100, "TC002": 60, "TC003": 50, "TC004": 10}
+    shards = plan_shards(scenarios("TC001", "TC002", "TC003", "TC004"), 2, durations)
+    assert [[s.id for s in shard] for shard in shards] == [["TC001", "TC004"], ["TC002", "TC003"]]
+
+
+def test_plan_is_deterministic_and_disjoint():
+    items = scenarios(*(f"TC{n:03d}" for n in range(1, 21)))
+    first = plan_shards(items, 3, {})
+    second = plan_shards(list(reversed(items)), 3, {})
+    assert [[s.id for s in shard] for shard in first] == [[s.id for s in shard] for shard in second]
+    assert sorted(s.id for shard in first for s in shard) == [s.id for s in items]
+
+
+def test_unknown_durations_use_the_default():
+    shards = plan_shards(scenarios("TC001", "TC002", "TC003"), 2, {"TC003": 1.0}, default=10.0)
+    assert [[s.id for s in shard] for shard in shards] == [["TC001", "TC003"], ["TC002"]]
+
+
+def test_at_least_one_shard():
+    assert len(plan_shards(scenarios("TC001"), 0, {})) == 1
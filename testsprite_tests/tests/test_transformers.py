@@ -0,0 +1,107 @@
+import ast
+
+from harness.checkpoint import CHECKPOINT_NAME, CheckpointInserter, Checkpointer
+from harness.locators import LOCATOR_NAME, LocatorRewriter
+from harness.profiles import WindowRewriter
+from harness.quarantine import PlaceholderRemover
+from harness.readiness import READY_NAME, ReadinessRewriter
+from harness.retry import STEP_NAME, StepActionRewriter
+from harness.session import SESSION_READY_NAME, Credential, LoginStepsRemover
+from harness.tracing import STEP_NAME as TRACE_STEP_NAME, StepMarker
+from harness.waiting import WAIT_NAME, FixedDelayRewriter
+
+
+def rewrite(tree, transformer) -> str:
+    tree = ast.fix_missing_locations(transformer.visit(tree))
+    compile(tree, "<sample>", "exec")
+    return ast.unparse(tree)
+
+
+def test_fixed_delays_wait_for_the_next_action(sample_tree):
+    code = rewrite(sample_tree, FixedDelayRewriter())
+    assert "wait_for_timeout" not in code
+    assert f"await {WAIT_NAME}(page, elem, 3000)" in code
+    assert f"await {WAIT_NAME}(None, None, 5 * 1000)" in code
+    assert "asyncio.sleep" not in code
+
+
+def test_readiness_replaces_goto_and_load_waits(sample_tree):
+    code = rewrite(sample_tree, ReadinessRewriter())
+    assert f"await {READY_NAME}(page, 'http://localhost:8081', navigation_timeout=10000)" in code
+    assert "page.goto" not in code
+    assert "wait_for_load_state" not in code
+    assert "page.frames" not in code
+
+
+def test_locators_route_absolute_xpaths_only(sample_tree):
+    code = rewrite(sample_tree, LocatorRewriter())
+    assert f"{LOCATOR_NAME}(frame, 'xpath=html/body/div/form/div/input').nth(0)" in code
+    assert ".locator(" not in code
+    assert ast.unparse(LocatorRewriter().visit(ast.parse("frame.locator('text=Entrar')"))) \
+        == "frame.locator('text=Entrar')"
+
+
+def test_step_actions_are_wrapped_with_their_line(sample_tree):
+    code = rewrite(sample_tree, StepActionRewriter())
+    assert f"await {STEP_NAME}(lambda: elem.click(timeout=5000), 32, 'click')" in code
+    assert f"await {STEP_NAME}(lambda: elem.fill('teste2@teste'), 37, 'fill')" in code
+    # Page-level calls are not element actions
+    assert "await page.wait_for_timeout(3000)" in code
+
+
+def test_step_marker_labels_steps_with_their_comment(sample_tree, sample_source):
+    code = rewrite(sample_tree, StepMarker(sample_source))
+    assert f"await {TRACE_STEP_NAME}(page, 1, \"Click on 'Entrar' link to go to login page\")" in code
+    assert f"await {TRACE_STEP_NAME}(page, 2, 'Input valid email')" in code
+
+
+def test_window_properties_are_read_from_the_page(sample_tree):
+    code = rewrite(sample_tree, WindowRewriter())
+    assert "assert await page.evaluate('window.innerWidth') >= 1024" in code
+
+
+def test_window_rewriter_leaves_scripts_binding_window(sample_tree):
+    tree = ast.parse("window = get_window()\nassert window.innerWidth >= 1024")
+    assert "page.evaluate" not in rewrite(tree, WindowRewriter())
+
+
+def test_placeholder_assertions_become_pass():
+    tree = ast.parse("assert False, 'Test plan execution failed'\nassert ok, 'kept'")
+    assert rewrite(tree, PlaceholderRemover()) == "pass\nassert ok, 'kept'"
+
+
+def test_login_steps_are_replaced_by_the_session_wait():
+    source = SAMPLE_LOGIN
+    code = rewrite(ast.parse(source), LoginStepsRemover([Credential("teste2@teste", "teste14")]))
+    assert f"await {SESSION_READY_NAME}(page)" in code
+    assert "teste14" not in code
+    assert "Dashboard" in code
+
+
+def test_checkpoints_follow_every_step(sample_tree, sample_source):
+    code = rewrite(sample_tree, CheckpointInserter(sample_source, Checkpointer()))
+    assert code.count(f"await {CHECKPOINT_NAME}(page, ") == 2
+    assert f"await {CHECKPOINT_NAME}(page, \"step 1: Click on 'Entrar' link to go to login page\", 1, " in code
+
+
+SAMPLE_LOGIN = '''
+async def run_test():
+    try:
+        page = await context.new_page()
+        frame = context.pages[-1]
+        elem = frame.locator('xpath=html/body/a').nth(0)
+        await elem.click(timeout=5000)
+        frame = context.pages[-1]
+        elem = frame.locator('xpath=html/body/form/input').nth(0)
+        await elem.fill('teste2@teste')
+        frame = context.pages[-1]
+        elem = frame.locator('xpath=html/body/form/input[2]').nth(0)
+        await elem.fill('teste14')
+        frame = context.pages[-1]
+        elem = frame.locator('xpath=html/body/form/button').nth(0)
+        await elem.click(timeout=5000)
+        frame = context.pages[-1]
+        assert await frame.locator('text=Dashboard').is_visible()
+    finally:
+        pass
+'''